@@ -0,0 +1,12 @@
+# tasks.py
+from django.db.models import F
+
+from apps.tasks.queue import task
+
+from .models import BlogPost
+
+
+@task
+def increment_post_views(post_id):
+    """افزایش بازدید پست با F() خارج از مسیر درخواست"""
+    BlogPost.objects.filter(pk=post_id).update(views=F('views') + 1)
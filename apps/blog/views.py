@@ -7,6 +7,8 @@ from django.views.generic import ListView
 from django.utils import timezone
 from django.db.models import Q
 from django.http import Http404
+from apps.main.fragment_cache import cache_fragment
+from .tasks import increment_post_views
 
 class BlogListView(ListView):
     model = BlogPost
@@ -57,8 +59,9 @@ def post_detail_view(request, slug):
     if post.publish_at and post.publish_at > timezone.now():
         raise Http404("Post not published yet")
 
-    # افزایش بازدید
-    post.increment_views()
+    # افزایش بازدید در پس‌زمینه؛ مقدار نمایش‌داده‌شده همین‌جا یکی بیشتر می‌شود
+    increment_post_views.delay(post.pk)
+    post.views += 1
 
     # مقالات مرتبط
     related_qs = BlogPost.objects.filter(status='published').exclude(pk=post.pk)
@@ -105,6 +108,7 @@ def post_detail_view(request, slug):
 
 
 
+@cache_fragment('blog:blogmain')
 def blog_main(request):
     """صفحه اصلی — ارسال ۵ مقاله پربازدید"""
     top_blogs = BlogPost.objects.order_by('-views')[:5]
@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from .models import Product, DiscountBasket, DiscountDetail, Copon
+from .discount_index import schedule_discount_refresh
 
 # Register your models here.
 
@@ -32,10 +34,15 @@ class DiscountBasketAdmin(admin.ModelAdmin):
 
         discount_basket = queryset.first()
 
-        # اضافه کردن تمام محصولات به سبد تخفیف
-        products = Product.objects.all()
-        for product in products:
-            DiscountDetail.objects.get_or_create(discountBasket=discount_basket, product=product)
+        # اضافه کردن تمام محصولات به سبد تخفیف (بدون سیگنال تک‌تک ردیف‌ها)
+        existing_ids = discount_basket.discountOfBasket.values_list('product_id', flat=True)
+        new_product_ids = Product.objects.exclude(id__in=existing_ids).values_list('id', flat=True)
+        with transaction.atomic():
+            DiscountDetail.objects.bulk_create(
+                [DiscountDetail(discountBasket=discount_basket, product_id=product_id) for product_id in new_product_ids],
+                batch_size=1000,
+            )
+            schedule_discount_refresh(discount_basket.discountOfBasket.values_list('product_id', flat=True))
 
         self.message_user(request, "تمام محصولات به سبد تخفیف اضافه شدند")
 
@@ -0,0 +1,154 @@
+# discount_index.py
+import threading
+
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from apps.product.models import Product
+from .models import DiscountDetail
+
+BATCH_SIZE = 1000
+
+_deleting_baskets = threading.local()
+
+# پس از هر بازمحاسبه با شناسه محصولات تغییرکرده (bulk_update سیگنال post_save ندارد)
+discount_index_updated = Signal()
+
+
+def _iter_in_batches(queryset):
+    """پیمایش دسته‌ای بر اساس pk (iterator در Django 4.0 با prefetch_related کار نمی‌کند)"""
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:BATCH_SIZE])
+        if not batch:
+            return
+        yield from batch
+        last_pk = batch[-1].pk
+
+
+def compute_discount_index(product_ids=None, now=None):
+    """
+    محاسبه تخفیف مؤثر هر محصول با یک کوئری روی سبدهای تخفیف.
+
+    خروجی: {product_id: (درصد تخفیف فعال، نزدیک‌ترین زمان شروع/پایان سبد)}
+    محصولاتی که سبد فعال یا آینده‌ای ندارند در خروجی نیستند.
+    """
+    now = now or timezone.now()
+    details = DiscountDetail.objects.filter(
+        discountBasket__isActive=True,
+        discountBasket__endDate__gte=now,
+    )
+    if product_ids is not None:
+        details = details.filter(product_id__in=product_ids)
+
+    index = {}
+    rows = details.values_list(
+        'product_id', 'discountBasket__discount', 'discountBasket__startDate', 'discountBasket__endDate'
+    )
+    for product_id, discount, start_date, end_date in rows:
+        percent, refresh_at = index.get(product_id, (0, None))
+        if start_date <= now:
+            percent = max(percent, discount)
+            boundary = end_date
+        else:
+            boundary = start_date
+        if refresh_at is None or boundary < refresh_at:
+            refresh_at = boundary
+        index[product_id] = (percent, refresh_at)
+    return index
+
+
+def refresh_discount_index(product_ids=None, now=None):
+    """به‌روزرسانی ستون‌های تخفیف محصولات؛ تعداد ردیف‌های تغییرکرده را برمی‌گرداند"""
+    now = now or timezone.now()
+    if product_ids is not None:
+        product_ids = set(product_ids)
+        if not product_ids:
+            return 0
+
+    index = compute_discount_index(product_ids, now=now)
+
+    products = Product.objects.only('id', 'price', 'discountPercent', 'finalPrice', 'discountRefreshAt')
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+
+    changed = []
+    changed_ids = []
+    updated = 0
+    for product in _iter_in_batches(products):
+        percent, refresh_at = index.get(product.id, (0, None))
+        final_price = Product.calculate_final_price(product.price, percent)
+        if (product.discountPercent, product.finalPrice, product.discountRefreshAt) == (percent, final_price, refresh_at):
+            continue
+        product.discountPercent = percent
+        product.finalPrice = final_price
+        product.discountRefreshAt = refresh_at
+        changed.append(product)
+        changed_ids.append(product.id)
+        if len(changed) >= BATCH_SIZE:
+            Product.objects.bulk_update(changed, ['discountPercent', 'finalPrice', 'discountRefreshAt'])
+            updated += len(changed)
+            changed = []
+
+    if changed:
+        Product.objects.bulk_update(changed, ['discountPercent', 'finalPrice', 'discountRefreshAt'])
+        updated += len(changed)
+    if changed_ids:
+        discount_index_updated.send(sender=Product, product_ids=changed_ids)
+    return updated
+
+
+def refresh_stale_discounts(now=None):
+    """بازمحاسبه محصولاتی که یکی از سبدهایشان از زمان شروع یا پایان عبور کرده است"""
+    now = now or timezone.now()
+    stale_ids = Product.objects.filter(discountRefreshAt__lte=now).values_list('id', flat=True)
+    return refresh_discount_index(list(stale_ids), now=now)
+
+
+def find_discount_index_mismatches(product_ids=None):
+    """
+    مقایسه ستون‌های ذخیره‌شده با محاسبه مستقیم پایتونی؛ لیست اختلاف‌ها را برمی‌گرداند.
+
+    ردیف‌های stale هنگام خواندن به محاسبه مستقیم برمی‌گردند و با task
+    دوره‌ای refresh_discounts (یا rebuild_discount_index --stale) اصلاح می‌شوند.
+    """
+    products = Product.objects.prefetch_related('productOfDiscount__discountBasket')
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+
+    mismatches = []
+    for product in _iter_in_batches(products):
+        expected_percent = product.calculate_discount_percentage()
+        expected_price = Product.calculate_final_price(product.price, expected_percent)
+        if (product.discountPercent, product.finalPrice) != (expected_percent, expected_price):
+            mismatches.append({
+                'product_id': product.id,
+                'stale': not product.is_discount_index_fresh(),
+                'stored_percent': product.discountPercent,
+                'expected_percent': expected_percent,
+                'stored_price': product.finalPrice,
+                'expected_price': expected_price,
+            })
+    return mismatches
+
+
+def schedule_discount_refresh(product_ids):
+    """بازمحاسبه پس از commit تراکنش جاری (یا بلافاصله در حالت autocommit)"""
+    product_ids = set(product_ids)
+    if product_ids:
+        transaction.on_commit(lambda: refresh_discount_index(product_ids))
+
+
+def is_basket_being_deleted(basket_id):
+    return basket_id in getattr(_deleting_baskets, 'ids', ())
+
+
+def mark_basket_deleting(basket_id, deleting):
+    ids = getattr(_deleting_baskets, 'ids', None)
+    if ids is None:
+        ids = _deleting_baskets.ids = set()
+    if deleting:
+        ids.add(basket_id)
+    else:
+        ids.discard(basket_id)
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.discount.discount_index import find_discount_index_mismatches
+
+
+class Command(BaseCommand):
+    help = 'مقایسه ستون‌های تخفیف ذخیره‌شده با محاسبه مستقیم Product.calculate_discount_percentage'
+
+    def handle(self, *args, **options):
+        mismatches = find_discount_index_mismatches()
+        for row in mismatches:
+            self.stdout.write(
+                "product={product_id} stale={stale} percent {stored_percent}->{expected_percent} "
+                "price {stored_price}->{expected_price}".format(**row)
+            )
+        if mismatches:
+            raise CommandError(f'{len(mismatches)} اختلاف پیدا شد؛ rebuild_discount_index را اجرا کنید')
+        self.stdout.write(self.style.SUCCESS('شاخص تخفیف با محاسبه مستقیم یکسان است'))
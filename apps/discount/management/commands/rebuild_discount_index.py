@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.discount.discount_index import refresh_discount_index, refresh_stale_discounts
+
+
+class Command(BaseCommand):
+    help = 'بازسازی ستون‌های تخفیف محصولات (discountPercent / finalPrice) از روی سبدهای تخفیف'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale', action='store_true',
+            help='فقط محصولاتی که سبدشان از زمان شروع/پایان عبور کرده (task دوره‌ای refresh_discounts هر دقیقه همین را اجرا می‌کند)',
+        )
+
+    def handle(self, *args, **options):
+        if options['stale']:
+            updated = refresh_stale_discounts()
+        else:
+            updated = refresh_discount_index()
+        self.stdout.write(self.style.SUCCESS(f'{updated} محصول به‌روزرسانی شد'))
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('discount', '0014_alter_copon_enddate_alter_copon_startdate_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='discountbasket',
+            index=models.Index(fields=['isActive', 'endDate', 'startDate'], name='basket_active_dates_idx'),
+        ),
+    ]
@@ -31,6 +31,10 @@ class DiscountBasket(models.Model):
     class Meta:
         verbose_name = ' سبد تخفیف '
         verbose_name_plural =  'سبد تخفیف ها '
+        indexes = [
+            # شاخص تخفیف: سبدهای فعالی که هنوز تمام نشده‌اند (isActive و endDate >= now)
+            models.Index(fields=['isActive', 'endDate', 'startDate'], name='basket_active_dates_idx'),
+        ]
 
 
 class DiscountDetail(models.Model):
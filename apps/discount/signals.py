@@ -0,0 +1,32 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .discount_index import is_basket_being_deleted, mark_basket_deleting, schedule_discount_refresh
+from .models import DiscountBasket, DiscountDetail
+
+
+@receiver(post_save, sender=DiscountBasket)
+def refresh_basket_products(sender, instance, **kwargs):
+    product_ids = instance.discountOfBasket.values_list('product_id', flat=True)
+    schedule_discount_refresh(product_ids)
+
+
+@receiver(pre_delete, sender=DiscountBasket)
+def refresh_deleted_basket_products(sender, instance, **kwargs):
+    # جزئیات سبد به صورت cascade حذف می‌شوند؛ یک بار برای همه محصولات بازمحاسبه کن
+    mark_basket_deleting(instance.pk, True)
+    product_ids = instance.discountOfBasket.values_list('product_id', flat=True)
+    schedule_discount_refresh(product_ids)
+
+
+@receiver(post_delete, sender=DiscountBasket)
+def forget_deleted_basket(sender, instance, **kwargs):
+    mark_basket_deleting(instance.pk, False)
+
+
+@receiver(post_save, sender=DiscountDetail)
+@receiver(post_delete, sender=DiscountDetail)
+def refresh_detail_product(sender, instance, **kwargs):
+    if is_basket_being_deleted(instance.discountBasket_id):
+        return
+    schedule_discount_refresh([instance.product_id])
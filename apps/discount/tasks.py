@@ -0,0 +1,14 @@
+# tasks.py
+from apps.tasks.queue import task
+
+from .discount_index import refresh_stale_discounts
+
+
+@task(every=60)
+def refresh_discounts():
+    """
+    بازمحاسبه محصولاتی که سبد تخفیفشان شروع یا تمام شده (همان کار
+    rebuild_discount_index --stale) تا مرتب‌سازی قیمت و کارت‌ها ستون‌های
+    تازه بخوانند.
+    """
+    return refresh_stale_discounts()
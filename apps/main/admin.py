@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import SliderSite, SliderMain, Banner
+from .slides import invalidate_slides
 
 @admin.register(SliderSite)
 class SliderSiteAdmin(admin.ModelAdmin):
@@ -17,10 +18,12 @@ class SliderSiteAdmin(admin.ModelAdmin):
 
     def make_active(self, request, queryset):
         queryset.update(isActive=True)
+        invalidate_slides()
     make_active.short_description = "فعال کردن اسلایدرهای انتخاب شده"
 
     def make_inactive(self, request, queryset):
         queryset.update(isActive=False)
+        invalidate_slides()
     make_inactive.short_description = "غیرفعال کردن اسلایدرهای انتخاب شده"
 
 
@@ -40,10 +43,12 @@ class SliderMainAdmin(admin.ModelAdmin):
 
     def make_active(self, request, queryset):
         queryset.update(isActive=True)
+        invalidate_slides()
     make_active.short_description = "فعال کردن اسلایدرهای اصلی انتخاب شده"
 
     def make_inactive(self, request, queryset):
         queryset.update(isActive=False)
+        invalidate_slides()
     make_inactive.short_description = "غیرفعال کردن اسلایدرهای اصلی انتخاب شده"
 
 
@@ -63,8 +68,10 @@ class BannerAdmin(admin.ModelAdmin):
 
     def make_active(self, request, queryset):
         queryset.update(isActive=True)
+        invalidate_slides()
     make_active.short_description = "فعال کردن بنرهای انتخاب شده"
 
     def make_inactive(self, request, queryset):
         queryset.update(isActive=False)
+        invalidate_slides()
     make_inactive.short_description = "غیرفعال کردن بنرهای انتخاب شده"
\ No newline at end of file
@@ -0,0 +1,40 @@
+# cache_versions.py
+import uuid
+
+from django.core.cache import caches
+
+
+def _version_key(namespace):
+    return f'{namespace}:version'
+
+
+def namespace_version(namespace, alias='default'):
+    """
+    نسخه فعلی یک فضای نام کش (مثل 'fragment:product:recently').
+
+    کلیدهای داده با این نسخه ساخته می‌شوند و با bump_namespaces همه آن‌ها
+    یکجا بی‌اعتبار می‌شوند. نسخه یک uuid است و هر بار کامل بازنویسی می‌شود،
+    پس نوشتن هم‌زمان دو پروسه فقط یکی از دو نسخه جدید را باقی می‌گذارد که
+    برای بی‌اعتبار کردن کافی است.
+    """
+    cache = caches[alias]
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_namespaces(namespaces, alias='default'):
+    """نسخه جدید برای فضاهای نام؛ خروجی {namespace: نسخه جدید}"""
+    versions = {namespace: uuid.uuid4().hex for namespace in namespaces}
+    if versions:
+        caches[alias].set_many(
+            {_version_key(namespace): version for namespace, version in versions.items()}, None,
+        )
+    return versions
+
+
+def bump_namespace(namespace, alias='default'):
+    return bump_namespaces([namespace], alias)[namespace]
@@ -0,0 +1,186 @@
+# fragment_cache.py
+import logging
+import time
+from functools import wraps
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.http import HttpResponse
+
+from apps.discount.discount_index import discount_index_updated
+from .cache_versions import bump_namespaces, namespace_version
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 300
+# مدت نگه‌داری نسخه منقضی‌شده برای پاسخ به بقیه درخواست‌ها حین بازسازی
+STALE_GRACE = getattr(settings, 'FRAGMENT_CACHE_STALE_GRACE', 120)
+LOCK_TIMEOUT = getattr(settings, 'FRAGMENT_CACHE_LOCK_TIMEOUT', 10)
+LOCK_WAIT = getattr(settings, 'FRAGMENT_CACHE_LOCK_WAIT', 2.0)
+LOCK_POLL_INTERVAL = 0.05
+STAT_KINDS = ('hits', 'stale', 'misses')
+
+
+def fragment_config(name):
+    """تنظیمات یک بخش از FRAGMENT_CACHE: {'timeout': ثانیه, 'models': ['app.Model']}"""
+    return getattr(settings, 'FRAGMENT_CACHE', {}).get(name)
+
+
+def _namespace(name):
+    return f'fragment:{name}'
+
+
+def _content_key(name, version):
+    return f'fragment:content:{name}:{version}'
+
+
+def _lock_key(name, version):
+    return f'fragment:lock:{name}:{version}'
+
+
+def _stat_key(name, kind):
+    return f'fragment:stats:{name}:{kind}'
+
+
+def _count(name, kind):
+    key = _stat_key(name, kind)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass
+
+
+def _response(entry):
+    _, content, content_type = entry
+    return HttpResponse(content, content_type=content_type)
+
+
+def _render_and_store(view, request, args, kwargs, name, version, timeout):
+    response = view(request, *args, **kwargs)
+    # view می‌تواند اعتبار را کوتاه‌تر کند (مثلاً تا پایان یک اسلاید)
+    timeout = min(timeout, getattr(response, 'fragment_timeout', timeout))
+    if timeout > 0 and response.status_code == 200 and not getattr(response, 'streaming', False):
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render()
+        entry = (time.time() + timeout, response.content, response['Content-Type'])
+        cache.set(_content_key(name, version), entry, int(timeout) + 1 + STALE_GRACE)
+    return response
+
+
+def cache_fragment(name):
+    """
+    کش خروجی view های render_partial با نام همان URL (مثل 'product:recently').
+
+    مدت اعتبار و مدل‌هایی که تغییرشان بخش را باطل می‌کند از FRAGMENT_CACHE
+    خوانده می‌شود؛ بخش‌هایی که در تنظیمات نیستند کش نمی‌شوند. پس از پایان
+    مدت اعتبار فقط یک worker (قفل cache.add) بخش را از نو می‌سازد و بقیه تا
+    STALE_GRACE ثانیه همان نسخه قبلی را برمی‌گردانند؛ اگر نسخه‌ای نباشد حداکثر
+    LOCK_WAIT ثانیه منتظر نتیجه می‌مانند.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            config = fragment_config(name)
+            if config is None or request.method != 'GET':
+                return view(request, *args, **kwargs)
+
+            timeout = config.get('timeout', DEFAULT_TIMEOUT)
+            version = namespace_version(_namespace(name))
+            content_key = _content_key(name, version)
+            lock_key = _lock_key(name, version)
+            entry = cache.get(content_key)
+
+            if entry is not None:
+                if entry[0] > time.time():
+                    _count(name, 'hits')
+                    return _response(entry)
+                if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+                    _count(name, 'stale')
+                    return _response(entry)
+            elif not cache.add(lock_key, 1, LOCK_TIMEOUT):
+                # worker دیگری در حال ساخت همین بخش است
+                deadline = time.monotonic() + LOCK_WAIT
+                while time.monotonic() < deadline:
+                    time.sleep(LOCK_POLL_INTERVAL)
+                    entry = cache.get(content_key)
+                    if entry is not None:
+                        _count(name, 'hits')
+                        return _response(entry)
+                _count(name, 'misses')
+                return view(request, *args, **kwargs)
+
+            _count(name, 'misses')
+            try:
+                return _render_and_store(view, request, args, kwargs, name, version, timeout)
+            finally:
+                cache.delete(lock_key)
+
+        return wrapper
+    return decorator
+
+
+def invalidate_fragments(names):
+    bump_namespaces([_namespace(name) for name in names])
+
+
+def fragment_stats(names=None):
+    """شمارش hit / stale / miss هر بخش (مشترک بین پروسه‌ها) به‌همراه نرخ hit"""
+    names = list(names if names is not None else getattr(settings, 'FRAGMENT_CACHE', {}))
+    keys = [_stat_key(name, kind) for name in names for kind in STAT_KINDS]
+    values = cache.get_many(keys)
+    stats = {}
+    for name in names:
+        counts = {kind: values.get(_stat_key(name, kind), 0) for kind in STAT_KINDS}
+        total = sum(counts.values())
+        counts['hit_rate'] = (counts['hits'] + counts['stale']) / total if total else 0.0
+        stats[name] = counts
+    return stats
+
+
+def reset_fragment_stats(names=None):
+    names = list(names if names is not None else getattr(settings, 'FRAGMENT_CACHE', {}))
+    cache.delete_many([_stat_key(name, kind) for name in names for kind in STAT_KINDS])
+
+
+_fragments_by_model = {}
+
+
+def invalidate_model_fragments(*models):
+    """باطل کردن بخش‌های وابسته به مدل‌ها (برای تغییرات بدون سیگنال مثل queryset.update)"""
+    invalidate_fragments({name for model in models for name in _fragments_by_model.get(model, ())})
+
+
+def _invalidate_for_model(sender, **kwargs):
+    invalidate_model_fragments(sender)
+
+
+def _invalidate_for_m2m(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_fragments(_fragments_by_model.get(sender, ()))
+
+
+def connect_signals():
+    """اتصال سیگنال مدل‌های FRAGMENT_CACHE؛ از MainConfig.ready فراخوانی می‌شود"""
+    for name, config in getattr(settings, 'FRAGMENT_CACHE', {}).items():
+        for label in config.get('models', ()):
+            model = apps.get_model(label)
+            _fragments_by_model.setdefault(model, set()).add(name)
+            # جدول‌های میانی m2m مدل هم (مثل دسته‌بندی‌های محصول)
+            for field in model._meta.many_to_many:
+                _fragments_by_model.setdefault(field.remote_field.through, set()).add(name)
+
+    for model in _fragments_by_model:
+        uid = f'fragment_cache:{model._meta.label_lower}'
+        if model._meta.auto_created:
+            m2m_changed.connect(_invalidate_for_m2m, sender=model, dispatch_uid=uid)
+        else:
+            post_save.connect(_invalidate_for_model, sender=model, dispatch_uid=uid)
+            post_delete.connect(_invalidate_for_model, sender=model, dispatch_uid=uid)
+    # تغییر قیمت‌ها با bulk_update شاخص تخفیف (بدون post_save)
+    discount_index_updated.connect(_invalidate_for_model, dispatch_uid='fragment_cache:discount_index')
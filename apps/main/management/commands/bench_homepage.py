@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from apps.main import views
+from apps.main.fragment_cache import fragment_stats, invalidate_fragments, reset_fragment_stats
+
+
+class Command(BaseCommand):
+    help = 'تعداد کوئری و زمان رندر صفحه اصلی با کش سرد و گرم بخش‌های render_partial'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='تعداد درخواست با کش گرم')
+
+    def _render(self):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            response = views.main(request)
+        return len(queries.captured_queries), (time.perf_counter() - started) * 1000, response
+
+    def handle(self, *args, **options):
+        names = list(getattr(settings, 'FRAGMENT_CACHE', {}))
+        invalidate_fragments(names)
+        reset_fragment_stats(names)
+
+        cold_queries, cold_ms, response = self._render()
+        if response.status_code != 200:
+            self.stderr.write(self.style.ERROR(f'status {response.status_code}'))
+            return
+
+        warm = [self._render() for _ in range(options['requests'])]
+        warm_queries = max(queries for queries, _, _ in warm)
+        warm_ms = sorted(ms for _, ms, _ in warm)
+
+        self.stdout.write(f'cold: {cold_queries} queries, {cold_ms:.1f} ms')
+        self.stdout.write(
+            f"warm: {warm_queries} queries (max), median {warm_ms[len(warm_ms) // 2]:.1f} ms, "
+            f"p95 {warm_ms[int(len(warm_ms) * 0.95) - 1]:.1f} ms"
+        )
+        for name, counts in fragment_stats(names).items():
+            self.stdout.write(
+                f"{name:<40} hits={counts['hits']} stale={counts['stale']} "
+                f"misses={counts['misses']} hit_rate={counts['hit_rate']:.2%}"
+            )
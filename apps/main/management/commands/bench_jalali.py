@@ -0,0 +1,44 @@
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+import jdatetime
+from django.core.management.base import BaseCommand
+
+import utils
+
+
+class Command(BaseCommand):
+    help = 'مقایسه تبدیل تاریخ شمسی با jdatetime برای هر ردیف و لایه مشترک utils.to_jalali'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', nargs='+', type=int, default=[100, 1000, 10000])
+        parser.add_argument('--days', type=int, default=90, help='بازه روزهای متمایز در داده آزمایشی')
+
+    def handle(self, *args, **options):
+        rnd = random.Random(1)
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        self.stdout.write(f"{'rows':>7} {'format':<16} {'jdatetime ms':>13} {'to_jalali ms':>13} {'batch ms':>9}")
+        for rows in options['rows']:
+            values = [
+                start + timedelta(days=rnd.randrange(options['days']), seconds=rnd.randrange(86400))
+                for _ in range(rows)
+            ]
+            for fmt in ('%Y/%m/%d', '%Y/%m/%d %H:%M'):
+                utils._jalali_date.cache_clear()
+
+                started = time.perf_counter()
+                legacy = [jdatetime.datetime.fromgregorian(datetime=value).strftime(fmt) for value in values]
+                legacy_ms = (time.perf_counter() - started) * 1000
+
+                started = time.perf_counter()
+                single = [utils.to_jalali(value, fmt) for value in values]
+                single_ms = (time.perf_counter() - started) * 1000
+
+                started = time.perf_counter()
+                batch = utils.to_jalali_many(values, fmt)
+                batch_ms = (time.perf_counter() - started) * 1000
+
+                if not legacy == single == batch:
+                    self.stderr.write(self.style.ERROR(f'خروجی متفاوت برای قالب {fmt}'))
+                self.stdout.write(f'{rows:>7} {fmt:<16} {legacy_ms:>13.1f} {single_ms:>13.1f} {batch_ms:>9.1f}')
@@ -0,0 +1,193 @@
+import json
+import logging
+import platform
+import resource
+import time
+import tracemalloc
+from dataclasses import asdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.main.synthetic import SyntheticCatalog, add_size_arguments, invalidate_caches, size_from_options
+from apps.product.models import Category, Product
+from apps.search.analytics import search_analytics
+
+# معیارهایی که در --compare مقایسه می‌شوند؛ افزایش آن‌ها پسرفت است
+COMPARED_METRICS = ('p50_ms', 'p95_ms', 'avg_queries', 'max_queries', 'peak_kb')
+
+
+class Rollback(Exception):
+    pass
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, int(round(len(ordered) * fraction)) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'بنچمارک سرتاسری صفحات فروشگاه روی کاتالوگ مصنوعی: p50/p95 زمان، تعداد کوئری و '
+        'حافظه هر مسیر؛ خروجی JSON برای مقایسه اجراها'
+    )
+
+    def add_arguments(self, parser):
+        add_size_arguments(parser)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--prefix', help='پیشوند slug ها (پیش‌فرض bench<seed>، جدا از داده seed_catalog)')
+        parser.add_argument('--requests', type=int, default=30, help='تعداد درخواست زمان‌گیری‌شده برای هر مسیر')
+        parser.add_argument('--output', help='ذخیره نتیجه در فایل JSON')
+        parser.add_argument('--compare', help='مقایسه با نتیجه JSON اجرای قبلی')
+        parser.add_argument('--keep', action='store_true', help='داده مصنوعی بعد از اجرا حذف نشود')
+
+    def handle(self, *args, **options):
+        size = size_from_options(options)
+        # شماره موبایل‌های 0900 و پیشوند bench تا با کاتالوگ seed_catalog همان seed تداخل نداشته باشد
+        catalog = SyntheticCatalog(
+            size, seed=options['seed'], prefix=options['prefix'] or f"bench{options['seed']}", mobile_prefix='0900',
+        )
+        if catalog.exists():
+            raise CommandError(
+                f'داده با پیشوند «{catalog.prefix}» از اجرای --keep قبلی مانده است؛ --seed یا --prefix دیگری بدهید'
+            )
+        # بافر جستجو بدون timer تا نوشتن‌ها داخل همین تراکنش بمانند
+        flush_interval, search_analytics.flush_interval = search_analytics.flush_interval, 0
+        # خط لاگ هر درخواست از QueryInstrumentationMiddleware خروجی را شلوغ می‌کند
+        sql_logger = logging.getLogger('apps.main.sql')
+        sql_logger_disabled, sql_logger.disabled = sql_logger.disabled, True
+        setup_test_environment()
+        try:
+            with transaction.atomic():
+                started = time.perf_counter()
+                catalog.generate()
+                seed_seconds = time.perf_counter() - started
+                invalidate_caches()
+                routes = self._run(catalog, options['requests'])
+                search_analytics.flush()
+                if not options['keep']:
+                    raise Rollback
+        except Rollback:
+            pass
+        finally:
+            teardown_test_environment()
+            search_analytics.flush_interval = flush_interval
+            sql_logger.disabled = sql_logger_disabled
+            # کش‌ها نباید به داده‌ای اشاره کنند که rollback شده است
+            invalidate_caches()
+
+        result = {
+            'meta': {
+                'seed': options['seed'],
+                'size': asdict(size),
+                'requests': options['requests'],
+                'seed_seconds': round(seed_seconds, 2),
+                'timestamp': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'cache': settings.CACHES['default']['BACKEND'],
+                'python': platform.python_version(),
+                'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            },
+            'routes': routes,
+        }
+        self._print(routes)
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as previous_file:
+                self._compare(json.load(previous_file)['routes'], routes)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output_file:
+                json.dump(result, output_file, ensure_ascii=False, indent=2)
+
+    def _routes(self, catalog):
+        """(نام، متد، آدرس، بدنه JSON) هر مسیر؛ سبد خرید به ترتیب add / update / summary / remove"""
+        product = Product.objects.filter(pk__in=catalog.product_ids, isActive=True).order_by('id').first()
+        category = Category.objects.filter(pk__in=catalog.category_ids).order_by('id').first()
+        cart_item = {'product_id': product.id, 'quantity': 1, 'detail': ''}
+        return [
+            ('main:index', 'get', reverse('main:index'), None),
+            ('product:shop', 'get', reverse('product:shop', args=[category.slug]), None),
+            ('product:product_detail', 'get', reverse('product:product_detail', args=[product.slug]), None),
+            ('search:search_suggestions', 'get',
+             f"{reverse('search:search_suggestions')}?q={product.title.split()[0][:3]}", None),
+            ('order:add_to_cart', 'post', reverse('order:add_to_cart'), cart_item),
+            ('order:update_cart_quantity', 'post', reverse('order:update_cart_quantity'), {**cart_item, 'quantity': 2}),
+            ('order:cart_summary', 'get', reverse('order:cart_summary'), None),
+            ('order:remove_from_cart', 'post', reverse('order:remove_from_cart'), cart_item),
+            ('panel:orders', 'get', reverse('panel:orders'), None),
+        ]
+
+    @staticmethod
+    def _request(client, method, url, body):
+        if method == 'post':
+            return client.post(url, data=json.dumps(body), content_type='application/json')
+        return client.get(url)
+
+    def _run(self, catalog, count):
+        client = Client()
+        client.force_login(catalog.users[0])
+        routes = {}
+        for name, method, url, body in self._routes(catalog):
+            # درخواست اول کش‌ها و شاخص‌ها را گرم می‌کند و جدا گزارش می‌شود
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as cold_queries:
+                response = self._request(client, method, url, body)
+            cold_ms = (time.perf_counter() - started) * 1000
+
+            timings, queries = [], []
+            for _ in range(count):
+                started = time.perf_counter()
+                with CaptureQueriesContext(connection) as captured:
+                    self._request(client, method, url, body)
+                timings.append((time.perf_counter() - started) * 1000)
+                queries.append(len(captured.captured_queries))
+
+            tracemalloc.start()
+            self._request(client, method, url, body)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            routes[name] = {
+                'url': url,
+                'status': response.status_code,
+                'cold_ms': round(cold_ms, 2),
+                'cold_queries': len(cold_queries.captured_queries),
+                'p50_ms': round(percentile(timings, 0.5), 2) if timings else None,
+                'p95_ms': round(percentile(timings, 0.95), 2) if timings else None,
+                'avg_queries': round(sum(queries) / len(queries), 1) if queries else None,
+                'max_queries': max(queries) if queries else None,
+                'peak_kb': round(peak / 1024, 1),
+            }
+        return routes
+
+    def _print(self, routes):
+        self.stdout.write(
+            f"{'route':<28} {'status':>6} {'cold ms':>8} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'queries':>8} {'peak kb':>8}"
+        )
+        for name, row in routes.items():
+            line = (
+                f"{name:<28} {row['status']:>6} {row['cold_ms']:>8} {row['p50_ms']!s:>8} {row['p95_ms']!s:>8} "
+                f"{row['max_queries']!s:>8} {row['peak_kb']:>8}"
+            )
+            self.stdout.write(line if row['status'] < 400 else self.style.ERROR(line))
+
+    def _compare(self, previous, routes):
+        self.stdout.write(self.style.MIGRATE_HEADING('compare'))
+        for name, row in routes.items():
+            before = previous.get(name)
+            if before is None:
+                continue
+            changes = []
+            for metric in COMPARED_METRICS:
+                old, new = before.get(metric), row.get(metric)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old * 100
+                text = f'{metric} {old} -> {new} ({change:+.1f}%)'
+                changes.append(self.style.ERROR(text) if change > 10 else text)
+            self.stdout.write(f"{name:<28} " + ', '.join(changes))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.main.slides import deactivate_expired
+
+
+class Command(BaseCommand):
+    help = 'غیرفعال کردن اسلایدرها و بنرهای منقضی‌شده (برای اجرای دوره‌ای با cron)'
+
+    def handle(self, *args, **options):
+        for model_name, count in deactivate_expired().items():
+            self.stdout.write(f'{model_name}: {count}')
@@ -0,0 +1,94 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from apps.discount.models import DiscountDetail
+from apps.order.models import Order, OrderDetail
+from apps.product.models import Comment, LikeOrUnlike, Product
+from apps.product.product_cards import annotate_product_cards
+from apps.search.models import PopularSearch, SearchHistory
+
+
+def hot_querysets():
+    """
+    کوئری‌های پرتکرار با همان شکل view ها (product، order، panel، search).
+
+    شناسه‌ها از اولین ردیف موجود برداشته می‌شوند تا planner روی داده واقعی
+    تصمیم بگیرد؛ خروجی {نام: queryset}.
+    """
+    now = timezone.now()
+    product = Product.objects.filter(isActive=True).order_by('-createAt').first()
+    product_id = product.pk if product else 0
+    brand_id = product.brand_id if product else 0
+    customer_id = Order.objects.values_list('customer_id', flat=True).first() or 0
+
+    return {
+        # product.views.latest_products_view / show_by_filter
+        'product.recently': Product.objects.filter(isActive=True).order_by('-createAt')[:20],
+        'product.cards': annotate_product_cards(Product.objects.filter(isActive=True).order_by('-createAt'))[:20],
+        'product.brand_price': Product.objects.filter(brand_id=brand_id, isActive=True).order_by('price'),
+        'product.card_likes': LikeOrUnlike.objects.filter(product_id=product_id, like=True),
+        'product.comments': Comment.objects.filter(product_id=product_id, isActive=True, parent__isnull=True),
+        # product.views.best_selling_products_view
+        'product.best_selling': Product.objects.filter(orderItems__order__isFinally=True).annotate(
+            total_sold=Sum('orderItems__qty'),
+        ).filter(total_sold__gt=0).order_by('-total_sold')[:20],
+        # panel.views.orders_view / dashboard
+        'panel.orders_page': Order.objects.filter(customer_id=customer_id).order_by('-registerDate', '-id')[:21],
+        'panel.orders_by_status': Order.objects.filter(
+            customer_id=customer_id, status='delivered',
+        ).order_by('-registerDate', '-id')[:21],
+        'panel.status_counts': Order.objects.filter(customer_id=customer_id).order_by().values_list(
+            'status',
+        ).annotate(total=Count('id')),
+        'panel.purchased_products': OrderDetail.objects.filter(
+            order__customer_id=customer_id, order__status='delivered',
+        ).values_list('product', flat=True).distinct(),
+        # discount.discount_index.compute_discount_index
+        'discount.active_baskets': DiscountDetail.objects.filter(
+            discountBasket__isActive=True, discountBasket__endDate__gte=now,
+        ).values_list('product_id', 'discountBasket__discount', 'discountBasket__startDate', 'discountBasket__endDate'),
+        # search.analytics
+        'search.history_range': SearchHistory.objects.filter(created_at__gte=now - timedelta(days=1)),
+        'search.popular_lookup': PopularSearch.objects.filter(query__iexact='samsung'),
+    }
+
+
+class Command(BaseCommand):
+    help = 'ثبت EXPLAIN کوئری‌های پرتکرار؛ با --save قبل از migrate و --compare بعد از آن'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='نام کوئری‌ها (پیش‌فرض: همه)')
+        parser.add_argument('--save', help='ذخیره plan ها در فایل JSON')
+        parser.add_argument('--compare', help='مقایسه با plan های ذخیره‌شده قبلی')
+
+    def handle(self, *args, **options):
+        querysets = hot_querysets()
+        names = options['names'] or list(querysets)
+        plans = {name: {'sql': str(querysets[name].query), 'plan': querysets[name].explain()} for name in names}
+
+        previous = {}
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as plans_file:
+                previous = json.load(plans_file)
+
+        for name, current in plans.items():
+            before = previous.get(name)
+            if before is None:
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                self.stdout.write(current['plan'])
+            elif before['plan'] == current['plan']:
+                self.stdout.write(self.style.MIGRATE_HEADING(f'{name} (unchanged)'))
+                self.stdout.write(current['plan'])
+            else:
+                self.stdout.write(self.style.MIGRATE_HEADING(f'{name} (changed)'))
+                self.stdout.write('before:\n' + before['plan'])
+                self.stdout.write('after:\n' + current['plan'])
+            self.stdout.write('')
+
+        if options['save']:
+            with open(options['save'], 'w', encoding='utf-8') as plans_file:
+                json.dump(plans, plans_file, ensure_ascii=False, indent=2)
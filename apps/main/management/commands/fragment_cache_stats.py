@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from apps.main.fragment_cache import fragment_stats, invalidate_fragments, reset_fragment_stats
+
+
+class Command(BaseCommand):
+    help = 'نمایش نرخ hit کش بخش‌های صفحه اصلی؛ با --reset شمارنده‌ها و با --clear خود کش پاک می‌شود'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='نام بخش‌ها (پیش‌فرض: همه بخش‌های FRAGMENT_CACHE)')
+        parser.add_argument('--reset', action='store_true')
+        parser.add_argument('--clear', action='store_true')
+
+    def handle(self, *args, **options):
+        names = options['names'] or None
+        stats = fragment_stats(names)
+        for name, counts in stats.items():
+            self.stdout.write(
+                f"{name:<40} hits={counts['hits']} stale={counts['stale']} "
+                f"misses={counts['misses']} hit_rate={counts['hit_rate']:.2%}"
+            )
+        if options['reset']:
+            reset_fragment_stats(list(stats))
+        if options['clear']:
+            invalidate_fragments(list(stats))
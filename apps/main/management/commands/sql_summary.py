@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.main.middleware import endpoint_summary, reset_endpoint_summary
+
+
+class Command(BaseCommand):
+    help = 'خلاصه کوئری‌های آخرین درخواست‌های هر endpoint (QueryInstrumentationMiddleware)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sort', default='max_queries', help='ستون مرتب‌سازی (نزولی)')
+        parser.add_argument('--reset', action='store_true', help='پاک کردن خلاصه پس از نمایش')
+
+    def handle(self, *args, **options):
+        summary = endpoint_summary()
+        columns = ['samples', 'avg_queries', 'max_queries', 'p95_sql_ms', 'p95_ms', 'n_plus_one_requests']
+        self.stdout.write(f"{'endpoint':<45}" + ''.join(f'{column:>20}' for column in columns))
+        for endpoint, row in sorted(summary.items(), key=lambda item: -item[1].get(options['sort'], 0)):
+            self.stdout.write(f'{endpoint:<45}' + ''.join(f'{row[column]:>20}' for column in columns))
+        if options['reset']:
+            reset_endpoint_summary()
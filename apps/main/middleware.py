@@ -0,0 +1,172 @@
+# middleware.py
+import json
+import logging
+import random
+import re
+import time
+from contextlib import ExitStack
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger('apps.main.sql')
+
+# نسبت درخواست‌هایی که اندازه‌گیری می‌شوند (در حالت DEBUG همه درخواست‌ها)
+SAMPLE_RATE = getattr(settings, 'SQL_INSTRUMENTATION_SAMPLE_RATE', 1.0 if settings.DEBUG else 0.05)
+# تعداد تکرار یک شکل کوئری در یک درخواست که N+1 حساب می‌شود
+N_PLUS_ONE_THRESHOLD = getattr(settings, 'SQL_N_PLUS_ONE_THRESHOLD', 5)
+# تعداد آخرین درخواست‌های هر endpoint در خلاصه
+SUMMARY_WINDOW = getattr(settings, 'SQL_SUMMARY_WINDOW', 200)
+SUMMARY_ENDPOINTS_KEY = 'sql:summary:endpoints'
+
+_IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+\b')
+
+
+@lru_cache(maxsize=1024)
+def sql_shape(sql):
+    """شکل نرمال‌شده کوئری: پارامترها، اعداد، رشته‌ها و طول لیست IN حذف می‌شوند"""
+    shape = _IN_LIST_RE.sub('IN (...)', sql)
+    shape = _STRING_RE.sub('?', shape)
+    return _NUMBER_RE.sub('?', shape)
+
+
+class QueryRecorder:
+    """execute_wrapper که تعداد، زمان و تکرار کوئری‌های یک درخواست را جمع می‌کند"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = {}
+        self.exact = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+            self.shapes[sql] = self.shapes.get(sql, 0) + 1
+            if not many:
+                try:
+                    key = (sql, tuple(params) if params is not None else None)
+                    self.exact[key] = self.exact.get(key, 0) + 1
+                except TypeError:
+                    pass
+
+    def report(self):
+        """خلاصه درخواست: تکرارهای دقیق (همان SQL و پارامتر) و شکل‌های N+1"""
+        shapes = {}
+        for sql, count in self.shapes.items():
+            shape = sql_shape(sql)
+            shapes[shape] = shapes.get(shape, 0) + count
+        return {
+            'queries': self.count,
+            'sql_ms': round(self.duration * 1000, 2),
+            'duplicates': sum(count - 1 for count in self.exact.values() if count > 1),
+            'n_plus_one': [
+                {'count': count, 'sql': shape[:300]}
+                for shape, count in sorted(shapes.items(), key=lambda item: -item[1])
+                if count >= N_PLUS_ONE_THRESHOLD
+            ],
+        }
+
+
+def _summary_key(endpoint):
+    return f'sql:summary:{endpoint}'
+
+
+def record_endpoint_sample(endpoint, report, duration_ms):
+    """افزودن درخواست به پنجره آخرین SUMMARY_WINDOW درخواست endpoint (مشترک بین worker ها)"""
+    key = _summary_key(endpoint)
+    samples = cache.get(key) or []
+    samples.append((report['queries'], report['sql_ms'], round(duration_ms, 2), len(report['n_plus_one'])))
+    cache.set(key, samples[-SUMMARY_WINDOW:], None)
+
+    endpoints = cache.get(SUMMARY_ENDPOINTS_KEY) or set()
+    if endpoint not in endpoints:
+        endpoints.add(endpoint)
+        cache.set(SUMMARY_ENDPOINTS_KEY, endpoints, None)
+
+
+def endpoint_summary():
+    """خلاصه پنجره هر endpoint: تعداد نمونه، میانگین و بیشینه کوئری، p95 زمان‌ها و تعداد N+1"""
+    endpoints = sorted(cache.get(SUMMARY_ENDPOINTS_KEY) or ())
+    stored = cache.get_many([_summary_key(endpoint) for endpoint in endpoints])
+    summary = {}
+    for endpoint in endpoints:
+        samples = stored.get(_summary_key(endpoint))
+        if not samples:
+            continue
+        queries = [sample[0] for sample in samples]
+        sql_ms = sorted(sample[1] for sample in samples)
+        total_ms = sorted(sample[2] for sample in samples)
+        p95 = max(0, int(len(samples) * 0.95) - 1)
+        summary[endpoint] = {
+            'samples': len(samples),
+            'avg_queries': round(sum(queries) / len(queries), 1),
+            'max_queries': max(queries),
+            'p95_sql_ms': sql_ms[p95],
+            'p95_ms': total_ms[p95],
+            'n_plus_one_requests': sum(1 for sample in samples if sample[3]),
+        }
+    return summary
+
+
+def reset_endpoint_summary():
+    endpoints = cache.get(SUMMARY_ENDPOINTS_KEY) or ()
+    cache.delete_many([_summary_key(endpoint) for endpoint in endpoints] + [SUMMARY_ENDPOINTS_KEY])
+
+
+class QueryInstrumentationMiddleware:
+    """
+    اندازه‌گیری کوئری‌های SQL هر درخواست (نمونه‌برداری با SAMPLE_RATE).
+
+    برای هر درخواست نمونه: یک خط لاگ JSON روی logger «apps.main.sql» (در صورت
+    وجود N+1 با سطح warning)، افزودن به خلاصه endpoint در کش و در حالت DEBUG
+    هدرهای X-SQL-*. درخواست‌های نمونه‌برداری‌نشده هیچ هزینه‌ای ندارند.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if SAMPLE_RATE <= 0 or (SAMPLE_RATE < 1 and random.random() >= SAMPLE_RATE):
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        endpoint = match.view_name if match else 'unresolved'
+        report = recorder.report()
+
+        record = {
+            'endpoint': endpoint,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'ms': round(duration_ms, 2),
+            **report,
+        }
+        if report['n_plus_one']:
+            logger.warning('sql %s', json.dumps(record, ensure_ascii=False))
+        else:
+            logger.info('sql %s', json.dumps(record, ensure_ascii=False))
+        record_endpoint_sample(endpoint, report, duration_ms)
+
+        if settings.DEBUG:
+            response['X-SQL-Queries'] = str(report['queries'])
+            response['X-SQL-Time-Ms'] = str(report['sql_ms'])
+            response['X-SQL-Duplicates'] = str(report['duplicates'])
+            response['X-SQL-N-Plus-One'] = str(len(report['n_plus_one']))
+        return response
@@ -21,9 +21,9 @@ class SliderSite(models.Model):
         return self.textSlider
 
     def deactivateIfExpired(self):
-        if self.endData and self.endData < timezone.now():
+        if self.isActive and self.endData and self.endData < timezone.now():
             self.isActive = False
-            self.save()
+            self.save(update_fields=['isActive'])
 
     class Meta:
         verbose_name = 'اسلایدر'
@@ -44,9 +44,9 @@ class SliderMain(models.Model):
         return self.textSlider
 
     def deactivateIfExpired(self):
-        if self.endData and self.endData < timezone.now():
+        if self.isActive and self.endData and self.endData < timezone.now():
             self.isActive = False
-            self.save()
+            self.save(update_fields=['isActive'])
 
     class Meta:
         verbose_name = 'اسلایدر مرکز'
@@ -64,9 +64,9 @@ class Banner(models.Model):
     endData = models.DateTimeField(verbose_name='تاریخ پایان', default=timezone.now)
 
     def deactivateIfExpired(self):
-        if self.endData and self.endData < timezone.now():
+        if self.isActive and self.endData and self.endData < timezone.now():
             self.isActive = False
-            self.save()
+            self.save(update_fields=['isActive'])
 
     def __str__(self) -> str:
         return self.nameBanner
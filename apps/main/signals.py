@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Banner, SliderMain, SliderSite
+from .slides import invalidate_slides
+
+
+@receiver(post_save, sender=SliderSite)
+@receiver(post_save, sender=SliderMain)
+@receiver(post_save, sender=Banner)
+@receiver(post_delete, sender=SliderSite)
+@receiver(post_delete, sender=SliderMain)
+@receiver(post_delete, sender=Banner)
+def invalidate_slide_cache(sender, instance, **kwargs):
+    invalidate_slides()
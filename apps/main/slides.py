@@ -0,0 +1,71 @@
+# slides.py
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .cache_versions import bump_namespace, namespace_version
+from .fragment_cache import invalidate_model_fragments
+from .models import Banner, SliderMain, SliderSite
+
+SLIDE_MODELS = (SliderSite, SliderMain, Banner)
+NAMESPACE = 'main:slides'
+# حداکثر اعتبار کش وقتی هیچ شروع یا پایانی در پیش نیست
+MAX_TIMEOUT = 3600
+
+
+def is_visible(slide, now):
+    return slide.isActive and slide.registerData <= now < slide.endData
+
+
+def _load(model, now):
+    """
+    اسلایدهای قابل نمایش و زمان تغییر بعدی با یک کوئری.
+
+    زمان تغییر نزدیک‌ترین registerData آینده یا endData یکی از اسلایدهای
+    فعال است؛ تا آن لحظه مجموعه اسلایدهای قابل نمایش ثابت می‌ماند.
+    """
+    slides = list(model.objects.filter(isActive=True, endData__gt=now).order_by('id'))
+    boundaries = [now + timedelta(seconds=MAX_TIMEOUT)]
+    boundaries += [slide.registerData for slide in slides if slide.registerData > now]
+    boundaries += [slide.endData for slide in slides]
+    return [slide for slide in slides if is_visible(slide, now)], min(boundaries)
+
+
+def get_active_slides(model, limit=None):
+    """
+    اسلایدهای فعال یک مدل (SliderSite / SliderMain / Banner) از کش.
+
+    انقضا هنگام خواندن با registerData و endData بررسی می‌شود و چیزی در
+    دیتابیس نوشته نمی‌شود. خروجی (لیست اسلایدها، ثانیه تا تغییر بعدی) است.
+    """
+    now = timezone.now()
+    key = f'{NAMESPACE}:{namespace_version(NAMESPACE)}:{model._meta.label_lower}'
+    entry = cache.get(key)
+    if entry is None or entry[1] <= now:
+        slides, valid_until = _load(model, now)
+        entry = (slides, valid_until)
+        cache.set(key, entry, max(1, int((valid_until - now).total_seconds())))
+
+    slides, valid_until = entry
+    return slides[:limit], max(0.0, (valid_until - now).total_seconds())
+
+
+def invalidate_slides():
+    """باطل کردن کش اسلایدها و بخش‌های صفحه اصلی که آن‌ها را نمایش می‌دهند"""
+    bump_namespace(NAMESPACE)
+    invalidate_model_fragments(*SLIDE_MODELS)
+
+
+def deactivate_expired(now=None):
+    """
+    غیرفعال کردن اسلایدهای منقضی‌شده با یک UPDATE برای هر مدل (برای اجرای زمان‌بندی‌شده).
+
+    نمایش به این کار وابسته نیست و کش تغییر نمی‌کند؛ فقط وضعیت isActive
+    در پنل مدیریت با واقعیت یکی می‌شود. خروجی {نام مدل: تعداد}.
+    """
+    now = now or timezone.now()
+    return {
+        model.__name__: model.objects.filter(isActive=True, endData__lte=now).update(isActive=False)
+        for model in SLIDE_MODELS
+    }
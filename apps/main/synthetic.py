@@ -0,0 +1,490 @@
+# synthetic.py
+import random
+import uuid
+from array import array
+from bisect import bisect
+from dataclasses import dataclass, fields
+from datetime import timedelta
+from itertools import accumulate
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.blog.models import Author, BlogPost, Category as BlogCategory, Tag
+from apps.discount.discount_index import refresh_discount_index
+from apps.discount.models import DiscountBasket, DiscountDetail
+from apps.order.models import Order, OrderDetail
+from apps.product.models import (
+    Brand, Category, Comment, Feature, FeatureValue, LikeOrUnlike, Product, ProductFeature,
+)
+from apps.product.product_cards import COLOR_FEATURE_TITLE
+from apps.search import autocomplete
+from apps.user.models import CustomUser
+from .cache_versions import bump_namespace
+from .fragment_cache import invalidate_fragments
+from .slides import invalidate_slides
+
+PRODUCT_NOUNS = ['پرینتر', 'اسکنر', 'کارتریج', 'تونر', 'درام', 'فتوکپی', 'لپ‌تاپ', 'مانیتور', 'گوشی', 'تبلت']
+PRODUCT_ADJECTIVES = ['لیزری', 'جوهرافشان', 'رنگی', 'سیاه‌وسفید', 'چندکاره', 'بی‌سیم', 'صنعتی', 'خانگی', 'اداری']
+BRAND_NAMES = ['سامسونگ', 'اچ‌پی', 'کانن', 'اپسون', 'برادر', 'زیراکس', 'ریکو', 'شارپ', 'کیوسرا', 'لکسمارک']
+CATEGORY_WORDS = ['لوازم', 'تجهیزات', 'قطعات', 'ملزومات', 'دستگاه', 'محصولات']
+BLOG_WORDS = ['راهنمای خرید', 'مقایسه', 'آموزش', 'نکات نگهداری', 'بررسی', 'معرفی']
+TEXT_WORDS = (
+    'کیفیت چاپ عالی است و سرعت مناسبی دارد نصب آن ساده بود قیمت نسبت به بازار منصفانه است '
+    'بسته‌بندی سالم رسید پشتیبانی پاسخگو بود مصرف جوهر کم است صدای دستگاه کم است پیشنهاد می‌کنم'
+).split()
+COLOR_VALUES = ['مشکی', 'سفید', 'نقره‌ای', 'خاکستری', 'آبی']
+# قالب‌ها برای برند، دسته‌بندی و محصول تصویر لازم دارند؛ فایل واقعی لازم نیست
+IMAGE_PLACEHOLDER = 'images/synthetic/placeholder.jpg'
+ORDER_STATUSES = [status for status, _ in Order.STATUS_CHOICES]
+# تعداد جمله‌های از پیش ساخته‌شده؛ ساختن متن جدا برای هر ردیف کند است
+SENTENCE_POOL_SIZE = 997
+
+
+def persian_digits(number):
+    return str(number).translate(str.maketrans('0123456789', '۰۱۲۳۴۵۶۷۸۹'))
+
+
+@dataclass
+class CatalogSize:
+    """
+    اندازه کاتالوگ مصنوعی.
+
+    category_depth عمق درخت دسته‌بندی است (۱ یعنی بدون والد) و skew توان
+    توزیع Zipf برای محبوبیت محصولات در نظرها و سفارش‌ها (۰ یعنی یکنواخت).
+    """
+    products: int = 1000
+    categories: int = 20
+    category_depth: int = 1
+    brands: int = 10
+    features: int = 6
+    values_per_feature: int = 8
+    users: int = 50
+    comments: int = 2000
+    likes: int = 4000
+    orders: int = 500
+    items_per_order: int = 3
+    discounts: int = 0
+    products_per_discount: int = 50
+    blog_posts: int = 0
+    skew: float = 1.0
+
+
+def add_size_arguments(parser):
+    """گزینه‌های خط فرمان برای همه فیلدهای CatalogSize (مثل --products و --category-depth)"""
+    for field in fields(CatalogSize):
+        parser.add_argument(f'--{field.name.replace("_", "-")}', type=type(field.default), default=field.default)
+
+
+def size_from_options(options):
+    return CatalogSize(**{field.name: options[field.name] for field in fields(CatalogSize)})
+
+
+def invalidate_caches():
+    """
+    باطل کردن کش‌هایی که از داده کاتالوگ ساخته می‌شوند.
+
+    bulk_create سیگنال post_save نمی‌فرستد، پس بعد از ساخت یا rollback داده
+    مصنوعی باید صریحاً صدا زده شود.
+    """
+    bump_namespace(autocomplete.VERSION_NAMESPACE)
+    invalidate_fragments(getattr(settings, 'FRAGMENT_CACHE', {}))
+    invalidate_slides()
+
+
+class SyntheticCatalog:
+    """
+    ساخت کاتالوگ مصنوعی قابل تکرار (seed ثابت) با bulk_create دسته‌ای.
+
+    همه slug ها و شماره موبایل‌ها با prefix ساخته می‌شوند تا با داده واقعی
+    تداخل نداشته باشند. ردیف‌ها دسته به دسته ساخته و شناسه‌هایشان با
+    «id بزرگ‌تر از آخرین id قبلی» دوباره خوانده می‌شود (MySQL شناسه‌ها را
+    برنمی‌گرداند)؛ برای میلیون‌ها ردیف فقط شناسه، قیمت و برند محصولات در
+    حافظه می‌ماند.
+    """
+
+    def __init__(self, size, seed=1, prefix=None, mobile_prefix=None, batch_size=2000, log=None):
+        self.size = size
+        self.seed = seed
+        self.rnd = random.Random(seed)
+        self.prefix = prefix or f'syn{seed}'
+        # چهار رقم اول شماره موبایل کاربران؛ هفت رقم بعدی شماره کاربر است
+        self.mobile_prefix = mobile_prefix or f'09{seed % 100:02d}'
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+        self.sentences = [
+            ' '.join(self.rnd.choice(TEXT_WORDS) for _ in range(self.rnd.randint(8, 30)))
+            for _ in range(SENTENCE_POOL_SIZE)
+        ]
+        self.counts = {}
+
+    def exists(self):
+        """آیا ردیف‌هایی با همین prefix یا شماره موبایل‌ها از قبل ساخته شده‌اند"""
+        return (
+            Product.objects.filter(slug__startswith=f'{self.prefix}-p-').exists()
+            or CustomUser.objects.filter(mobileNumber=f'{self.mobile_prefix}{0:07d}').exists()
+        )
+
+    def _bulk(self, model, objects):
+        batch = []
+        created = 0
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                model.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        if batch:
+            model.objects.bulk_create(batch)
+            created += len(batch)
+        label = model._meta.label
+        self.counts[label] = self.counts.get(label, 0) + created
+        return created
+
+    def _insert_rows(self, model, field_names, rows):
+        """
+        درج مستقیم با executemany برای جدول‌های پرحجم بدون پیش‌فرض پایتونی
+        (جدول‌های میانی m2m، ویژگی و اقلام سفارش)؛ ساختن نمونه مدل برای هر
+        ردیف بیشتر زمان bulk_create را می‌گیرد.
+        """
+        opts = model._meta
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(opts.get_field(name).column) for name in field_names)
+        sql = (
+            f'INSERT INTO {quote(opts.db_table)} ({columns}) '
+            f'VALUES ({", ".join(["%s"] * len(field_names))})'
+        )
+        batch = []
+        created = 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                created += self._execute_many(sql, batch)
+                batch = []
+        if batch:
+            created += self._execute_many(sql, batch)
+        self.counts[opts.label] = self.counts.get(opts.label, 0) + created
+        return created
+
+    @staticmethod
+    def _execute_many(sql, batch):
+        # بدون تراکنش، executemany در autocommit هر ردیف را جدا commit می‌کند
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, batch)
+        return len(batch)
+
+    def _chunks(self, total):
+        for start in range(0, total, self.batch_size):
+            yield range(start, min(start + self.batch_size, total))
+
+    @staticmethod
+    def _last_id(model):
+        return model.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    def _uuid(self):
+        return uuid.UUID(int=self.rnd.getrandbits(128), version=4)
+
+    def _past(self, days=365):
+        return self.now - timedelta(seconds=self.rnd.randrange(days * 86400))
+
+    def _sentence(self):
+        return self.rnd.choice(self.sentences)
+
+    def _popular_product(self):
+        """اندیس یک محصول با توزیع Zipf؛ محصولات محبوب در ترتیب تصادفی پخش شده‌اند"""
+        return bisect(self.popularity, self.rnd.random() * self.popularity[-1])
+
+    def generate(self):
+        self._create_taxonomy()
+        self._create_products()
+        self._create_users()
+        self._create_comments()
+        self._create_orders()
+        self._create_discounts()
+        self._create_blog()
+        return self
+
+    def _create_taxonomy(self):
+        size, prefix = self.size, self.prefix
+        self._bulk(Brand, (
+            Brand(title=f'{BRAND_NAMES[i % len(BRAND_NAMES)]} {persian_digits(i + 1)}', slug=f'{prefix}-b-{i}',
+                  image=IMAGE_PLACEHOLDER)
+            for i in range(size.brands)
+        ))
+        self.brand_ids = list(
+            Brand.objects.filter(slug__startswith=f'{prefix}-b-').order_by('id').values_list('id', flat=True)
+        )
+        self._create_category_tree()
+
+        titles = [COLOR_FEATURE_TITLE] + [f'ویژگی {persian_digits(i)}' for i in range(1, size.features)]
+        self._bulk(Feature, (Feature(title=title, slug=f'{prefix}-f-{i}') for i, title in enumerate(titles)))
+        features = list(Feature.objects.filter(slug__startswith=f'{prefix}-f-').order_by('id'))
+        self._insert_rows(Feature.categories.through, ('feature', 'category'), (
+            (feature.id, category_id) for feature in features for category_id in self.category_ids
+        ))
+
+        self._bulk(FeatureValue, (
+            FeatureValue(
+                feature=feature,
+                value=COLOR_VALUES[j % len(COLOR_VALUES)] if feature.title == COLOR_FEATURE_TITLE else f'مقدار {persian_digits(j + 1)}',
+            )
+            for feature in features for j in range(size.values_per_feature)
+        ))
+        self.feature_values = {}
+        for value_id, feature_id, value in FeatureValue.objects.filter(feature__in=features).order_by('id').values_list(
+            'id', 'feature_id', 'value',
+        ):
+            self.feature_values.setdefault(feature_id, []).append((value_id, value))
+
+    def _create_category_tree(self):
+        """
+        درخت دسته‌بندی سطح به سطح؛ والد هر دسته‌بندی از سطح قبلی انتخاب می‌شود.
+
+        محصولات به یک برگ (سطح آخر) و همه اجداد آن وصل می‌شوند تا صفحه
+        دسته‌بندی‌های میانی هم محصول داشته باشد.
+        """
+        size, prefix, rnd = self.size, self.prefix, self.rnd
+        depth = max(1, min(size.category_depth, size.categories))
+        per_level = [size.categories // depth] * depth
+        per_level[-1] += size.categories - sum(per_level)
+
+        self.category_parents = {}
+        self.category_ids = []
+        previous = []
+        number = 0
+        for count in per_level:
+            last_id = self._last_id(Category)
+            self._bulk(Category, (
+                Category(
+                    title=f'{rnd.choice(CATEGORY_WORDS)} {rnd.choice(PRODUCT_NOUNS)} {persian_digits(number + i + 1)}',
+                    slug=f'{prefix}-c-{number + i}', image=IMAGE_PLACEHOLDER,
+                    parent_id=rnd.choice(previous) if previous else None,
+                )
+                for i in range(count)
+            ))
+            number += count
+            level = list(Category.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'parent_id'))
+            self.category_parents.update(level)
+            previous = [category_id for category_id, _ in level]
+            self.category_ids += previous
+        self.leaf_category_ids = previous
+
+    def _ancestors(self, category_id):
+        path = [category_id]
+        while self.category_parents.get(path[-1]):
+            path.append(self.category_parents[path[-1]])
+        return path
+
+    def _product(self, number):
+        rnd = self.rnd
+        price = rnd.randrange(500, 90_000) * 1000
+        return Product(
+            title=f'{rnd.choice(PRODUCT_NOUNS)} {rnd.choice(PRODUCT_ADJECTIVES)} مدل {persian_digits(1000 + number)}',
+            slug=f'{self.prefix}-p-{number}',
+            image=IMAGE_PLACEHOLDER,
+            brand_id=rnd.choice(self.brand_ids),
+            description=self._sentence(),
+            price=price,
+            finalPrice=price,
+            createAt=self._past(),
+            isActive=rnd.random() > 0.05,
+        )
+
+    def _create_products(self):
+        rnd = self.rnd
+        self.product_ids = array('q')
+        self.prices = array('q')
+        self.brands = array('q')
+        category_paths = {leaf: self._ancestors(leaf) for leaf in self.leaf_category_ids}
+
+        for chunk in self._chunks(self.size.products):
+            last_id = self._last_id(Product)
+            self._bulk(Product, (self._product(i) for i in chunk))
+            rows = list(Product.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'price', 'brand_id'))
+            for product_id, price, brand_id in rows:
+                self.product_ids.append(product_id)
+                self.prices.append(price)
+                self.brands.append(brand_id)
+
+            self._insert_rows(Product.categories.through, ('product', 'category'), (
+                (product_id, category_id)
+                for product_id, _, _ in rows
+                for category_id in category_paths[rnd.choice(self.leaf_category_ids)]
+            ))
+            self._insert_rows(ProductFeature, ('product', 'feature', 'value', 'filterValue'), (
+                (product_id, feature_id, value, value_id)
+                for product_id, _, _ in rows
+                for feature_id, values in self.feature_values.items()
+                for value_id, value in [rnd.choice(values)]
+            ))
+            self.log(f'products: {len(self.product_ids)}')
+
+        # رتبه محبوبیت هر محصول تصادفی است تا محبوب‌ها فقط جدیدترین‌ها نباشند
+        ranks = list(range(1, len(self.product_ids) + 1))
+        rnd.shuffle(ranks)
+        self.popularity = list(accumulate(rank ** -self.size.skew for rank in ranks))
+
+    def _create_users(self):
+        # شناسه کاربر UUID است و در پایتون ساخته می‌شود
+        self.users = []
+        for chunk in self._chunks(self.size.users):
+            users = [
+                CustomUser(id=self._uuid(), mobileNumber=f'{self.mobile_prefix}{i:07d}', is_active=True)
+                for i in chunk
+            ]
+            for user in users:
+                user.set_unusable_password()
+            self._bulk(CustomUser, users)
+            self.users += users
+        self.user_ids = [user.id for user in self.users]
+
+    def _create_comments(self):
+        rnd = self.rnd
+        if not self.product_ids or not self.user_ids:
+            return
+        last_id = self._last_id(Comment)
+        self._bulk(Comment, (
+            Comment(
+                user_id=rnd.choice(self.user_ids),
+                product_id=self.product_ids[self._popular_product()],
+                text=self._sentence(),
+                rating=rnd.randint(1, 5),
+                isActive=rnd.random() > 0.2,
+            )
+            for _ in range(self.size.comments)
+        ))
+        self.log(f'comments: {self.size.comments}')
+
+        comment_ids, comment_products = array('q'), array('q')
+        for comment_id, product_id in Comment.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'product_id'):
+            comment_ids.append(comment_id)
+            comment_products.append(product_id)
+        if not comment_ids:
+            return
+        # نظرها خودشان به سمت محصولات محبوب کج هستند
+        self._bulk(LikeOrUnlike, (
+            LikeOrUnlike(
+                user_id=rnd.choice(self.user_ids), comment_id=comment_ids[position],
+                product_id=comment_products[position], like=like, unlike=not like,
+            )
+            for position, like in (
+                (rnd.randrange(len(comment_ids)), rnd.random() > 0.3) for _ in range(self.size.likes)
+            )
+        ))
+        self.log(f'likes: {self.size.likes}')
+
+    def _order(self, planned):
+        rnd = self.rnd
+        positions = {self._popular_product() for _ in range(self.size.items_per_order)}
+        items = [(position, rnd.randint(1, 3)) for position in sorted(positions)]
+        subtotal = sum(self.prices[position] * qty for position, qty in items)
+        status = rnd.choice(ORDER_STATUSES)
+        order = Order(
+            orderCode=self._uuid(),
+            customer_id=rnd.choice(self.user_ids),
+            registerDate=self._past(),
+            status=status,
+            isFinally=status in ('processing', 'shipped', 'delivered'),
+            subtotal=subtotal,
+        )
+        # bulk_create متد save را صدا نمی‌زند
+        order.discountAmount, order.taxAmount, order.finalAmount = Order.calculate_amounts(subtotal, 0)
+        planned[order.orderCode] = items
+        return order
+
+    def _create_orders(self):
+        if not self.product_ids or not self.user_ids:
+            return
+        created = 0
+        for chunk in self._chunks(self.size.orders):
+            planned = {}
+            last_id = self._last_id(Order)
+            self._bulk(Order, [self._order(planned) for _ in chunk])
+            order_ids = Order.objects.filter(id__gt=last_id).values_list('id', 'orderCode')
+            self._insert_rows(OrderDetail, ('order', 'product', 'brand', 'qty', 'price'), (
+                (order_id, self.product_ids[position], self.brands[position], qty, self.prices[position])
+                for order_id, order_code in order_ids
+                for position, qty in planned.get(order_code, ())
+            ))
+            created += len(chunk)
+            self.log(f'orders: {created}')
+
+    def _create_discounts(self):
+        """سبدهای تخفیف فعال، آینده و منقضی؛ سپس ستون‌های تخفیف محصولات به‌روز می‌شود"""
+        rnd = self.rnd
+        if not self.size.discounts or not self.product_ids:
+            return
+        baskets = []
+        for i in range(self.size.discounts):
+            start = self.now + timedelta(days=rnd.randint(-30, 10))
+            baskets.append(DiscountBasket(
+                discountTitle=f'تخفیف {persian_digits(i + 1)}',
+                startDate=start,
+                endDate=start + timedelta(days=rnd.randint(1, 40)),
+                discount=rnd.choice((5, 10, 15, 20, 30, 50)),
+                isActive=rnd.random() > 0.1,
+            ))
+        last_id = self._last_id(DiscountBasket)
+        self._bulk(DiscountBasket, baskets)
+        basket_ids = list(DiscountBasket.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True))
+
+        per_basket = min(self.size.products_per_discount, len(self.product_ids))
+        discounted = set()
+        details = []
+        for basket_id in basket_ids:
+            for position in rnd.sample(range(len(self.product_ids)), per_basket):
+                discounted.add(self.product_ids[position])
+                details.append(DiscountDetail(discountBasket_id=basket_id, product_id=self.product_ids[position]))
+        self._bulk(DiscountDetail, details)
+        self.log(f'discounted products: {refresh_discount_index(discounted, now=self.now)}')
+
+    def _create_blog(self):
+        size, prefix, rnd = self.size, self.prefix, self.rnd
+        if not size.blog_posts or not self.users:
+            return
+        authors = self.users[:3]
+        self._bulk(Author, (
+            Author(user_id=user.id, display_name=f'نویسنده {persian_digits(i + 1)}')
+            for i, user in enumerate(authors)
+        ))
+        author_ids = list(
+            Author.objects.filter(user_id__in=[user.id for user in authors]).order_by('id').values_list('id', flat=True)
+        )
+        self._bulk(BlogCategory, (
+            BlogCategory(name=f'{word} {prefix}', slug=f'{prefix}-bc-{i}') for i, word in enumerate(BLOG_WORDS)
+        ))
+        category_ids = list(
+            BlogCategory.objects.filter(slug__startswith=f'{prefix}-bc-').order_by('id').values_list('id', flat=True)
+        )
+        self._bulk(Tag, (
+            Tag(name=f'{noun} {prefix}', slug=f'{prefix}-t-{i}') for i, noun in enumerate(PRODUCT_NOUNS)
+        ))
+        tag_ids = list(Tag.objects.filter(slug__startswith=f'{prefix}-t-').order_by('id').values_list('id', flat=True))
+
+        for chunk in self._chunks(size.blog_posts):
+            last_id = self._last_id(BlogPost)
+            posts = []
+            for i in chunk:
+                published = self._past()
+                posts.append(BlogPost(
+                    title=f'{rnd.choice(BLOG_WORDS)} {rnd.choice(PRODUCT_NOUNS)} {rnd.choice(PRODUCT_ADJECTIVES)}',
+                    slug=f'{prefix}-post-{i}',
+                    author_id=rnd.choice(author_ids),
+                    category_id=rnd.choice(category_ids),
+                    excerpt=self._sentence(),
+                    content=' '.join(self._sentence() for _ in range(8)),
+                    status='published' if rnd.random() > 0.1 else 'draft',
+                    views=int(1000 / (1 + rnd.random() * 100)),
+                    created_at=published,
+                    publish_at=published,
+                ))
+            self._bulk(BlogPost, posts)
+            post_ids = BlogPost.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)
+            self._insert_rows(BlogPost.tags.through, ('blogpost', 'tag'), (
+                (post_id, tag_id)
+                for post_id in post_ids
+                for tag_id in rnd.sample(tag_ids, rnd.randint(0, min(3, len(tag_ids))))
+            ))
+        self.log(f'blog posts: {size.blog_posts}')
@@ -0,0 +1,10 @@
+# tasks.py
+from apps.tasks.queue import task
+
+from .slides import deactivate_expired
+
+
+@task(every=300)
+def expire_slides():
+    """همان کار دستور expire_sliders به‌صورت دوره‌ای در worker"""
+    return deactivate_expired()
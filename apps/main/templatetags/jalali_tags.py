@@ -0,0 +1,11 @@
+from django import template
+
+import utils
+
+register = template.Library()
+
+
+@register.filter
+def jalali(value, fmt=utils.JALALI_DATE_FORMAT):
+    """نمایش شمسی تاریخ: {{ order.registerDate|jalali }} یا {{ value|jalali:"%Y/%m/%d %H:%M" }}"""
+    return utils.to_jalali(value, fmt)
@@ -2,6 +2,8 @@ from django.shortcuts import render
 import web.settings as sett
 from django.utils import timezone
 from .models import *
+from .fragment_cache import cache_fragment
+from .slides import get_active_slides
 
 # Create your views here.
 
@@ -24,64 +26,44 @@ def main(request):
 
 
 
+@cache_fragment('main:slider_list_view')
 def slider_list_view(request):
     """
-    دریافت تمام اسلایدرهای سایت و نمایش اسلایدرهای فعال.
+    نمایش اسلایدرهای فعال سایت (بدون نوشتن در دیتابیس؛ انقضا هنگام خواندن بررسی می‌شود).
     """
-    # دریافت تمام اسلایدرهای سایت
-    sliders = SliderSite.objects.all()
-
-    # بررسی تاریخ انقضا و غیرفعال کردن اسلایدرهای منقضی‌شده
-    for slider in sliders:
-        slider.deactivateIfExpired()
-
-    # فقط اسلایدرهای فعال را نمایش می‌دهیم
-    active_sliders = SliderSite.objects.filter(isActive=True)
-
-    return render(request, 'main_app/slider_file.html', {'sliders': active_sliders})
+    sliders, expires_in = get_active_slides(SliderSite)
+    response = render(request, 'main_app/slider_file.html', {'sliders': sliders})
+    # کش بخش تا شروع یا پایان اسلاید بعدی
+    response.fragment_timeout = expires_in
+    return response
 
 def slider_list_view2(request):
     """
-    دریافت 2 اسلایدر اول سایت و نمایش اسلایدرهای فعال.
+    نمایش 2 اسلایدر فعال اول سایت.
     """
-    # دریافت تمام اسلایدرها و مرتب‌سازی بر اساس تاریخ ثبت
-    sliders = SliderSite.objects.all().order_by('registerData')[:2]
-
-    # بررسی تاریخ انقضا و غیرفعال کردن اسلایدرهای منقضی‌شده
-    for slider in sliders:
-        slider.deactivateIfExpired()
-
-    # فقط اسلایدرهای فعال را نمایش می‌دهیم
-    active_sliders = SliderSite.objects.filter(isActive=True)[:2]
-
-    return render(request, 'main_app/slider_file2.html', {'sliders': active_sliders})
+    sliders, _ = get_active_slides(SliderSite, limit=2)
+    return render(request, 'main_app/slider_file2.html', {'sliders': sliders})
 
 
 
+@cache_fragment('main:slider_main_view')
 def slider_main_view(request):
     """
-    دریافت 2 اسلایدر اصلی (مرکز) و نمایش اسلایدرهای فعال.
+    نمایش 2 اسلایدر اصلی (مرکز) فعال.
     """
-    sliders = SliderMain.objects.all().order_by('registerData')[:2]
-
-    # بررسی تاریخ انقضا و غیرفعال کردن اسلایدرهای منقضی‌شده
-    for slider in sliders:
-        slider.deactivateIfExpired()
-
-    # فقط اسلایدرهای فعال را نمایش می‌دهیم
-    active_sliders = SliderMain.objects.filter(isActive=True)[:2]
-
-    return render(request, 'main_app/slider_main.html', {'sliders': active_sliders})
+    sliders, expires_in = get_active_slides(SliderMain, limit=2)
+    response = render(request, 'main_app/slider_main.html', {'sliders': sliders})
+    response.fragment_timeout = expires_in
+    return response
 
 def active_banners(request):
     """
     نمایش بنرهای فعال با تاریخ انقضای معتبر.
     """
-    banners = Banner.objects.filter(isActive=True, endData__gt=timezone.now())
+    banners, _ = get_active_slides(Banner)
     return render(request, 'main_app/slider_banner.html', {'banners': banners})
 
 
-
 def about(request):
 
     return render(request,'main_app/dsm/about.html')
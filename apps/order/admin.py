@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from .models import Order, OrderDetail
-import jdatetime
+import utils
 
 # ========================
 # اینلاین برای جزئیات سفارش
@@ -58,9 +58,13 @@ class OrderAdmin(admin.ModelAdmin):
         'registerDate',
         'updateDate',
         'get_total_price',
-        'get_final_price'
+        'get_final_price',
+        'taxAmount',
+        'finalAmount',
     ]
 
+    list_select_related = ['customer']
+
     fieldsets = (
         ('اطلاعات اصلی سفارش', {
             'fields': (
@@ -81,6 +85,8 @@ class OrderAdmin(admin.ModelAdmin):
             'fields': (
                 'get_total_price',
                 'get_final_price',
+                'taxAmount',
+                'finalAmount',
             )
         }),
         ('توضیحات', {
@@ -91,7 +97,7 @@ class OrderAdmin(admin.ModelAdmin):
     inlines = [OrderDetailInline]
 
     def get_jalali_register_date(self, obj):
-        return jdatetime.datetime.fromgregorian(datetime=obj.registerDate).strftime('%Y/%m/%d %H:%M')
+        return utils.to_jalali(obj.registerDate, '%Y/%m/%d %H:%M')
     get_jalali_register_date.short_description = "تاریخ ثبت"
     get_jalali_register_date.admin_order_field = 'registerDate'
 
@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.order.models import Order, OrderDetail
+from apps.order.shop_cart import ShopCart
+from apps.order.views import create_order_from_cart
+from apps.product.models import Brand, Product
+from apps.user.models import CustomUser
+
+
+class FakeSession(dict):
+    modified = False
+
+
+class FakeRequest:
+    def __init__(self, session):
+        self.session = session
+
+
+def legacy_create_order(user, shop_cart):
+    """مسیر قدیمی: یک get و یک create برای هر ردیف، بدون تراکنش (فقط برای مقایسه)"""
+    order = Order.objects.create(customer=user, status="pending")
+    for item in shop_cart.get_cart_items():
+        product = Product.objects.get(id=item['id'])
+        OrderDetail.objects.create(
+            order=order,
+            product=product,
+            brand=product.brand,
+            qty=item['quantity'],
+            price=item['price'],
+            selectedOptions=item.get('detail', '')
+        )
+    return order
+
+
+class Command(BaseCommand):
+    help = 'مقایسه تعداد کوئری و زمان ثبت سفارش بر اساس تعداد ردیف‌های سبد خرید'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[1, 10, 30, 100])
+
+    def handle(self, *args, **options):
+        sizes = sorted(options['sizes'])
+
+        # داده‌های آزمایشی داخل تراکنش ساخته و در پایان rollback می‌شوند
+        with transaction.atomic():
+            user = CustomUser.objects.create_user(mobileNumber='09000000001', password=None)
+            brand = Brand.objects.create(title='bench brand', slug='bench-order-brand')
+            Product.objects.bulk_create([
+                Product(title=f'bench product {i}', slug=f'bench-order-{i}', brand=brand, price=1000 + i)
+                for i in range(max(sizes))
+            ])
+            # MySQL شناسه ردیف‌های bulk_create را برنمی‌گرداند
+            products = list(Product.objects.filter(brand=brand).order_by('pk'))
+
+            self.stdout.write(f"{'lines':>6} {'old queries':>12} {'old ms':>9} {'new queries':>12} {'new ms':>9}")
+            for size in sizes:
+                old = self._measure(lambda cart: legacy_create_order(user, cart), products[:size])
+                new = self._measure(lambda cart: create_order_from_cart(user, cart), products[:size])
+                self.stdout.write(f'{size:>6} {old[0]:>12} {old[1]:>9.1f} {new[0]:>12} {new[1]:>9.1f}')
+
+            transaction.set_rollback(True)
+
+    def _measure(self, create, products):
+        cart = ShopCart(FakeRequest(FakeSession()))
+        for product in products:
+            cart.add_to_shop_cart(product, 1)
+
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            create(cart)
+            elapsed = (time.perf_counter() - started) * 1000
+        return len(context.captured_queries), elapsed
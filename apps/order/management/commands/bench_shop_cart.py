@@ -0,0 +1,114 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.order.shop_cart import ShopCart
+from apps.product.models import Brand, Product
+
+
+class FakeSession(dict):
+    modified = False
+
+
+class FakeRequest:
+    def __init__(self, session):
+        self.session = session
+
+
+class LegacyShopCart:
+    """مسیر قدیمی: قیمت‌های رشته‌ای و ساخت دوباره لیست آیتم‌ها برای جمع کل (فقط برای مقایسه)"""
+
+    def __init__(self, request):
+        self.session = request.session
+        temp = self.session.get('shop_cart')
+        if not temp:
+            temp = self.session['shop_cart'] = {}
+        self.shop_cart = temp
+        self.count = len(self.shop_cart.keys())
+
+    def add_to_shop_cart(self, product, qty, list_detail=''):
+        key = f"{product.id}:{list_detail}" if list_detail else str(product.id)
+        if key not in self.shop_cart:
+            self.shop_cart[key] = {
+                'qty': 0,
+                'price': str(product.get_price_by_discount()),
+                'brand': product.brand.id if product.brand else None,
+                'detail': list_detail,
+                'final_price': str(product.get_price_by_discount()),
+                'product_id': product.id,
+                'product_name': product.title,
+                'product_image': product.image.url if product.image else '',
+            }
+        self.shop_cart[key]['qty'] += int(qty)
+        self.session.modified = True
+        self.count = len(self.shop_cart.keys())
+
+    def get_cart_items(self):
+        items = []
+        for key, item in self.shop_cart.items():
+            items.append({
+                'id': item.get('product_id', key.split(':')[0]),
+                'name': item.get('product_name', ''),
+                'image': item.get('product_image', ''),
+                'price': float(item.get('price', 0)),
+                'final_price': float(item.get('final_price', 0)),
+                'quantity': item['qty'],
+                'total_price': float(item.get('final_price', 0)) * item['qty'],
+                'detail': item.get('detail', ''),
+                'key': key,
+            })
+        return items
+
+    def calc_total_price(self):
+        total = 0
+        for item in self.get_cart_items():
+            total += item['total_price']
+        return total
+
+    def as_dict(self):
+        return {
+            'cart_count': self.count,
+            'total_price': self.calc_total_price(),
+            'items': self.get_cart_items(),
+        }
+
+
+class Command(BaseCommand):
+    help = 'مقایسه هزینه پاسخ endpoint های سبد خرید و حجم session در پیاده‌سازی قدیمی و جدید'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[1, 10, 50, 200])
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        brand = Brand(id=1, title='bench brand')
+        self.stdout.write(
+            f"{'lines':>6} {'old us':>9} {'new us':>9} {'old bytes':>10} {'new bytes':>10}"
+        )
+        for size in options['sizes']:
+            products = [
+                Product(id=index, title=f'محصول آزمایشی {index}', brand=brand, price=1_000_000 + index,
+                        finalPrice=900_000 + index, image=f'images/product/{index}.jpg')
+                for index in range(1, size + 1)
+            ]
+            old_us, old_bytes = self._measure(LegacyShopCart, products, options['repeat'])
+            new_us, new_bytes = self._measure(ShopCart, products, options['repeat'])
+            self.stdout.write(f'{size:>6} {old_us:>9.1f} {new_us:>9.1f} {old_bytes:>10} {new_bytes:>10}')
+
+    def _measure(self, cart_class, products, repeat):
+        """زمان یک درخواست افزودن به سبد پر (بازسازی از session، تغییر و ساخت پاسخ JSON)"""
+        session = FakeSession()
+        cart = cart_class(FakeRequest(session))
+        for product in products:
+            cart.add_to_shop_cart(product, 2, 'رنگ: مشکی')
+        # session در هر درخواست از JSON بازخوانی می‌شود
+        payload = json.dumps(session)
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            cart = cart_class(FakeRequest(FakeSession(json.loads(payload))))
+            cart.add_to_shop_cart(products[0], 1, 'رنگ: مشکی')
+            json.dumps(cart.as_dict(), default=str)
+        elapsed = (time.perf_counter() - started) / repeat * 1_000_000
+        return elapsed, len(payload.encode())
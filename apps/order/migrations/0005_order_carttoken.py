@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0004_remove_orderdetail_addressdetail_order_addressdetail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='cartToken',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True, unique=True, verbose_name='شناسه سبد خرید'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+from django.db import migrations, models
+from django.db.models import F, Sum
+
+TAX_PERCENT = 9
+
+
+def populate_order_totals(apps, schema_editor):
+    Order = apps.get_model('order', 'Order')
+    OrderDetail = apps.get_model('order', 'OrderDetail')
+
+    subtotals = dict(
+        OrderDetail.objects.values('order_id')
+        .annotate(total=Sum(F('price') * F('qty')))
+        .values_list('order_id', 'total')
+    )
+    orders = list(Order.objects.only('id', 'discount'))
+    for order in orders:
+        order.subtotal = subtotals.get(order.id) or 0
+        order.discountAmount = (order.subtotal * order.discount) // 100
+        order.taxAmount = ((order.subtotal - order.discountAmount) * TAX_PERCENT) // 100
+        order.finalAmount = order.subtotal - order.discountAmount + order.taxAmount
+    Order.objects.bulk_update(
+        orders, ['subtotal', 'discountAmount', 'taxAmount', 'finalAmount'], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0005_order_carttoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='subtotal',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='جمع کل'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='discountAmount',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='مبلغ تخفیف'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='taxAmount',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='مالیات'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='finalAmount',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='مبلغ قابل پرداخت'),
+        ),
+        migrations.RunPython(populate_order_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0006_order_totals'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', 'status', 'registerDate'], name='order_customer_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', 'registerDate', 'id'], name='order_customer_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['isFinally', 'id'], name='order_finally_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderdetail',
+            index=models.Index(fields=['order', 'product'], name='orderdetail_order_product_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderdetail',
+            index=models.Index(fields=['product', 'order', 'qty'], name='orderdetail_product_order_idx'),
+        ),
+    ]
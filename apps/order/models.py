@@ -3,7 +3,10 @@ from django.utils import timezone
 import uuid
 from apps.product.models import Product, Brand
 from apps.user.models import CustomUser
-import utils
+
+# درصد مالیات بر ارزش افزوده فاکتور
+TAX_PERCENT = 9
+
 # ========================
 # مدل سفارش (Order)
 # ========================
@@ -35,32 +38,66 @@ class Order(models.Model):
 
     discount = models.PositiveIntegerField(default=0, verbose_name="تخفیف روی فاکتور")
     isFinally = models.BooleanField(default=False, verbose_name="نهایی شده")
+    # شناسه سبد خریدی که سفارش از آن ساخته شده؛ جلوی ثبت دوباره با کلیک تکراری را می‌گیرد
+    cartToken = models.CharField(
+        max_length=32, unique=True, null=True, blank=True,
+        editable=False, verbose_name="شناسه سبد خرید"
+    )
+
+    # مبالغ فاکتور (تومان)؛ با تغییر جزئیات سفارش یا درصد تخفیف دوباره محاسبه می‌شوند
+    subtotal = models.PositiveIntegerField(default=0, editable=False, verbose_name="جمع کل")
+    discountAmount = models.PositiveIntegerField(default=0, editable=False, verbose_name="مبلغ تخفیف")
+    taxAmount = models.PositiveIntegerField(default=0, editable=False, verbose_name="مالیات")
+    finalAmount = models.PositiveIntegerField(default=0, editable=False, verbose_name="مبلغ قابل پرداخت")
 
     def __str__(self):
         return f"سفارش {self.customer} - {self.orderCode}"
 
+    @staticmethod
+    def calculate_amounts(subtotal, discount):
+        """مبلغ تخفیف، مالیات و مبلغ نهایی از روی جمع کل و درصد تخفیف"""
+        discount_amount = (subtotal * discount) // 100
+        tax_amount = ((subtotal - discount_amount) * TAX_PERCENT) // 100
+        return discount_amount, tax_amount, subtotal - discount_amount + tax_amount
+
+    def save(self, *args, **kwargs):
+        self.discountAmount, self.taxAmount, self.finalAmount = self.calculate_amounts(self.subtotal, self.discount)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'subtotal', 'discount'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'discountAmount', 'taxAmount', 'finalAmount'}
+        super().save(*args, **kwargs)
+
+    def recalculate_totals(self):
+        """محاسبه دوباره جمع کل با یک کوئری aggregate روی جزئیات سفارش"""
+        subtotal = self.details.aggregate(
+            total=models.Sum(models.F('price') * models.F('qty'))
+        )['total'] or 0
+        if subtotal != self.subtotal:
+            self.subtotal = subtotal
+            self.save(update_fields=['subtotal', 'updateDate'])
 
     def get_order_total_price(self):
-        sum = 0
-        for item in self.details.all():
-            sum+=item.product.get_price_by_discount()*item.qty
-        finaly_total_price,tax = utils.price_by_delivery_tax(sum,self.discount)
-        return int(finaly_total_price*10)
+        """مبلغ قابل پرداخت به ریال (برای درگاه پرداخت)"""
+        return self.finalAmount * 10
 
     def getTotalPrice(self):
-        """محاسبه جمع کل سفارش قبل از تخفیف"""
-        return sum(item.price * item.qty for item in self.details.all())
+        """جمع کل سفارش قبل از تخفیف"""
+        return self.subtotal
 
     def getFinalPrice(self):
-        """محاسبه مبلغ نهایی با تخفیف"""
-        total = self.getTotalPrice()
-        if self.discount:
-            total -= (total * self.discount) // 100
-        return total
+        """مبلغ سفارش با تخفیف (بدون مالیات)"""
+        return self.subtotal - self.discountAmount
 
     class Meta:
         verbose_name = "سفارش"
         verbose_name_plural = "سفارش‌ها"
+        indexes = [
+            # شمارش وضعیت‌ها و لیست سفارش‌های پنل کاربر (keyset روی registerDate, id)
+            models.Index(fields=['customer', 'status', 'registerDate'], name='order_customer_status_idx'),
+            models.Index(fields=['customer', 'registerDate', 'id'], name='order_customer_date_idx'),
+            # پرفروش‌ها فقط سفارش‌های نهایی‌شده را می‌شمارند
+            models.Index(fields=['isFinally', 'id'], name='order_finally_idx'),
+        ]
 
 
 # ========================
@@ -101,6 +138,11 @@ class OrderDetail(models.Model):
     class Meta:
         verbose_name = "جزئیات سفارش"
         verbose_name_plural = "جزئیات سفارش‌ها"
+        indexes = [
+            models.Index(fields=['order', 'product'], name='orderdetail_order_product_idx'),
+            # جمع فروش هر محصول بدون خواندن ردیف‌های جدول
+            models.Index(fields=['product', 'order', 'qty'], name='orderdetail_product_order_idx'),
+        ]
 
 
 from django.db import models
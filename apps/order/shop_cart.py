@@ -1,86 +1,230 @@
 # shop_cart.py
+import time
+import uuid
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.discount.discount_index import compute_discount_index
 from apps.product.models import Product
 
+CART_SESSION_KEY = 'shop_cart'
+CART_FORMAT_VERSION = 2
+# فاصله بررسی مجدد قیمت‌ها برای درخواست‌های پشت‌سرهم (ثانیه)
+CART_PRICE_CHECK_TTL = getattr(settings, 'CART_PRICE_CHECK_TTL', 60)
+
+
 class ShopCart:
+    """
+    سبد خرید مبتنی بر session.
+
+    ساختار ذخیره‌شده در session:
+        {'v': 2, 'total': جمع کل, 'checked': زمان آخرین بررسی قیمت, 'token': شناسه سبد,
+         'items': {key: {'p': شناسه محصول, 'q': تعداد, 'u': قیمت واحد (int),
+         'd': جزئیات, 'n': نام, 'i': تصویر, 'b': برند}}}
+
+    جمع کل و تعداد ردیف‌ها همراه هر تغییر به‌روز می‌شوند و برای خواندن آن‌ها
+    نیازی به پیمایش آیتم‌ها نیست.
+    """
+
     def __init__(self, request):
         self.session = request.session
-        temp = self.session.get('shop_cart')
-        if not temp:
-            temp = self.session['shop_cart'] = {}
-        self.shop_cart = temp
-        self.count = len(self.shop_cart.keys())
+        data = self.session.get(CART_SESSION_KEY)
+        if not isinstance(data, dict) or data.get('v') != CART_FORMAT_VERSION:
+            data = self.session[CART_SESSION_KEY] = self._migrate_legacy(data or {})
+        self.data = data
+        self.shop_cart = data['items']
+        self.count = len(self.shop_cart)
+
+    @staticmethod
+    def _migrate_legacy(legacy_items):
+        """تبدیل سبد ذخیره‌شده با ساختار قدیمی (قیمت‌های رشته‌ای) به ساختار فشرده"""
+        items = {}
+        missing = {}
+        for key, item in legacy_items.items():
+            product_id = int(item.get('product_id', str(key).split(':')[0]))
+            items[key] = {
+                'p': product_id,
+                'q': int(item.get('qty', 0)),
+                'u': int(float(item.get('final_price') or item.get('price') or 0)),
+                'd': item.get('detail', ''),
+                'n': item.get('product_name', ''),
+                'i': item.get('product_image', ''),
+                'b': item.get('brand'),
+            }
+            if 'product_name' not in item:
+                missing.setdefault(product_id, []).append(key)
+
+        if missing:
+            products = Product.objects.select_related('brand').in_bulk(list(missing))
+            for product_id, keys in missing.items():
+                product = products.get(product_id)
+                for key in keys:
+                    if product is None:
+                        del items[key]
+                    else:
+                        items[key].update(ShopCart._product_fields(product))
+
+        return {
+            'v': CART_FORMAT_VERSION,
+            'total': sum(item['q'] * item['u'] for item in items.values()),
+            'checked': 0,
+            'token': uuid.uuid4().hex,
+            'items': items,
+        }
+
+    @staticmethod
+    def _product_fields(product):
+        return {
+            'p': product.id,
+            'u': int(product.get_price_by_discount()),
+            'n': product.title,
+            'i': product.image.url if product.image else '',
+            'b': product.brand_id,
+        }
 
     def _get_key(self, product_id, detail):
         return f"{product_id}:{detail}" if detail else str(product_id)
 
+    def _changed(self):
+        self.count = len(self.shop_cart)
+        self.session.modified = True
+
+    def has_item(self, product_id, list_detail=''):
+        return self._get_key(product_id, list_detail) in self.shop_cart
+
     def add_to_shop_cart(self, product, qty, list_detail=''):
         key = self._get_key(product.id, list_detail)
+        item = self.shop_cart.get(key)
+        if item is None:
+            item = self.shop_cart[key] = {'q': 0, 'd': list_detail, **self._product_fields(product)}
 
-        if key not in self.shop_cart:
-            self.shop_cart[key] = {
-                'qty': 0,
-                'price': str(product.get_price_by_discount()),  # تبدیل به string برای اطمینان
-                'brand': product.brand.id if product.brand else None,
-                'detail': list_detail,
-                'final_price': str(product.get_price_by_discount()),  # فعلاً قیمت عادی
-                'product_id': product.id,
-                'product_name': product.title,  # استفاده از title به جای name
-                'product_image': product.image.url if product.image else ''
-            }
+        qty = int(qty)
+        item['q'] += qty
+        self.data['total'] += qty * item['u']
+        # شناسه باید پیش از درخواست ثبت سفارش در session ذخیره شده باشد
+        self.data.setdefault('token', uuid.uuid4().hex)
+        self._changed()
 
-        self.shop_cart[key]['qty'] += int(qty)
-        self.session.modified = True
-        self.count = len(self.shop_cart.keys())
+    def update_quantity(self, product_id, qty, list_detail=''):
+        """تنظیم تعداد یک ردیف (تعداد صفر یا کمتر ردیف را حذف می‌کند)؛ False اگر ردیف نباشد"""
+        key = self._get_key(product_id, list_detail)
+        item = self.shop_cart.get(key)
+        if item is None:
+            return False
+        qty = int(qty)
+        if qty <= 0:
+            self._remove_key(key)
+        else:
+            self.data['total'] += (qty - item['q']) * item['u']
+            item['q'] = qty
+        self._changed()
+        return True
+
+    def _remove_key(self, key):
+        item = self.shop_cart.pop(key, None)
+        if item is not None:
+            self.data['total'] -= item['q'] * item['u']
 
     def delete_from_shop_cart(self, product, list_detail=''):
-        key = self._get_key(product.id, list_detail)
-        if key in self.shop_cart:
-            del self.shop_cart[key]
-        self.count = len(self.shop_cart.keys())
-        self.session.modified = True
+        self._remove_key(self._get_key(product.id, list_detail))
+        self._changed()
 
     def delete_all_list(self):
         self.shop_cart.clear()
-        self.count = 0
-        self.session.modified = True
+        self.data['total'] = 0
+        # سبد بعدی شناسه جدیدی می‌گیرد
+        self.data.pop('token', None)
+        self._changed()
+
+    @property
+    def token(self):
+        """شناسه یکتای این سبد تا زمان خالی شدن آن (کلید idempotency ثبت سفارش)"""
+        if 'token' not in self.data:
+            self.data['token'] = uuid.uuid4().hex
+            self.session.modified = True
+        return self.data['token']
+
+    def revalidate_prices(self, force=False):
+        """
+        بررسی قیمت همه ردیف‌ها با قیمت فعلی محصولات در یک کوئری.
+
+        ردیف محصولات حذف‌شده یا غیرفعال از سبد خارج می‌شود. خروجی لیست
+        تغییرات است: {'key', 'name', 'old_price', 'new_price'} که new_price
+        برای ردیف‌های حذف‌شده None است. بدون force، اگر کمتر از
+        CART_PRICE_CHECK_TTL ثانیه از بررسی قبلی گذشته باشد کاری انجام نمی‌شود.
+        """
+        now = time.time()
+        if not self.shop_cart or (not force and now - self.data.get('checked', 0) < CART_PRICE_CHECK_TTL):
+            return []
+
+        products = Product.objects.filter(
+            pk__in={item['p'] for item in self.shop_cart.values()}, isActive=True,
+        ).only('id', 'price', 'finalPrice', 'discountRefreshAt').in_bulk()
+        prices = self._current_prices(products.values())
+
+        changes = []
+        for key, item in list(self.shop_cart.items()):
+            new_price = prices.get(item['p'])
+            if new_price == item['u']:
+                continue
+            changes.append({'key': key, 'name': item['n'], 'old_price': item['u'], 'new_price': new_price})
+            if new_price is None:
+                del self.shop_cart[key]
+            else:
+                item['u'] = new_price
+
+        self.data['checked'] = now
+        if changes:
+            self.data['total'] = sum(item['q'] * item['u'] for item in self.shop_cart.values())
+        self._changed()
+        return changes
+
+    @staticmethod
+    def _current_prices(products):
+        """قیمت نهایی از ستون‌های شاخص تخفیف؛ ردیف‌های stale با یک کوئری بازمحاسبه می‌شوند"""
+        prices = {}
+        stale = []
+        for product in products:
+            if product.is_discount_index_fresh():
+                prices[product.id] = product.finalPrice
+            else:
+                stale.append(product)
+        if stale:
+            discounts = compute_discount_index([product.id for product in stale], now=timezone.now())
+            for product in stale:
+                percent, _ = discounts.get(product.id, (0, None))
+                prices[product.id] = Product.calculate_final_price(product.price, percent)
+        return prices
 
     def get_cart_items(self):
         """دریافت آیتم‌های سبد خرید به صورت قابل سریالایز"""
-        items = []
-        for key, item in self.shop_cart.items():
-            # اگر اطلاعات محصول کامل نیست، از دیتابیس بگیر
-            if 'product_name' not in item:
-                try:
-                    product = Product.objects.get(id=item.get('product_id', key.split(':')[0]))
-                    item.update({
-                        'product_name': product.title,
-                        'product_image': product.image.url if product.image else '',
-                        'price': str(product.get_price_by_discount()),
-                        'final_price': str(product.get_price_by_discount())
-                    })
-                except Product.DoesNotExist:
-                    continue
-
-            items.append({
-                'id': item.get('product_id', key.split(':')[0]),
-                'name': item.get('product_name', ''),
-                'image': item.get('product_image', ''),
-                'price': float(item.get('price', 0)),
-                'final_price': float(item.get('final_price', 0)),
-                'quantity': item['qty'],
-                'total_price': float(item.get('final_price', 0)) * item['qty'],
-                'detail': item.get('detail', ''),
-                'key': key  # کلید یکتا برای مدیریت
-            })
-        return items
+        return [
+            {
+                'id': item['p'],
+                'name': item['n'],
+                'image': item['i'],
+                'price': item['u'],
+                'final_price': item['u'],
+                'quantity': item['q'],
+                'total_price': item['u'] * item['q'],
+                'detail': item['d'],
+                'key': key,  # کلید یکتا برای مدیریت
+            }
+            for key, item in self.shop_cart.items()
+        ]
 
     def calc_total_price(self):
-        total = 0
-        for item in self.get_cart_items():
-            total += item['total_price']
-        return total
+        return self.data['total']
+
+    def as_dict(self):
+        """پاسخ JSON endpoint های سبد خرید در یک گذر"""
+        return {
+            'cart_count': self.count,
+            'total_price': self.data['total'],
+            'items': self.get_cart_items(),
+        }
 
     def __iter__(self):
         """برای backward compatibility"""
-        for item in self.get_cart_items():
-            yield item
\ No newline at end of file
+        yield from self.get_cart_items()
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Order, OrderDetail
+
+
+@receiver(post_save, sender=OrderDetail)
+@receiver(post_delete, sender=OrderDetail)
+def recalculate_order_totals(sender, instance, **kwargs):
+    order = Order.objects.filter(pk=instance.order_id).first()
+    if order is not None:
+        order.recalculate_totals()
@@ -3,26 +3,36 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_POST, require_GET
 from django.views.decorators.csrf import csrf_exempt
 import json
+import time
+from django.db import IntegrityError, transaction
 from .models import Product
 from django.shortcuts import get_object_or_404,redirect,render
 from .shop_cart import ShopCart
-from .models import Order,OrderDetail
+from .models import Order,OrderDetail,TAX_PERCENT
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views import View
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from .models import UserAddress
 
+def price_change_message(change):
+    if change['new_price'] is None:
+        return f"محصول «{change['name']}» دیگر موجود نیست و از سبد خرید حذف شد."
+    return (
+        f"قیمت «{change['name']}» از {change['old_price']:,} به {change['new_price']:,} تومان تغییر کرد."
+    )
+
+
 @require_GET
 def cart_summary(request):
     """نمایش خلاصه سبد خرید"""
     cart = ShopCart(request)
+    price_changes = cart.revalidate_prices()
 
     return JsonResponse({
         'success': True,
-        'cart_count': cart.count,
-        'total_price': cart.calc_total_price(),
-        'items': cart.get_cart_items()  # استفاده از متد جدید
+        **cart.as_dict(),
+        'price_changes': price_changes,
     })
 
 
@@ -30,13 +40,14 @@ def cart_summary(request):
 def cart_page(request):
     """صفحه نمایش سبد خرید"""
     shop_cart = ShopCart(request)
-    cart_items = shop_cart.get_cart_items()
-    total_price = shop_cart.calc_total_price()
+    for change in shop_cart.revalidate_prices():
+        messages.warning(request, price_change_message(change))
+    cart = shop_cart.as_dict()
 
     context = {
-        'cart_items': cart_items,
-        'total_price': total_price,
-        'cart_count': shop_cart.count
+        'cart_items': cart['items'],
+        'total_price': cart['total_price'],
+        'cart_count': cart['cart_count'],
     }
 
     return render(request, 'order_app/cart_page.html', context)
@@ -58,9 +69,7 @@ def add_to_cart(request):
 
         return JsonResponse({
             'success': True,
-            'cart_count': cart.count,
-            'total_price': cart.calc_total_price(),
-            'items': cart.get_cart_items(),  # استفاده از متد جدید
+            **cart.as_dict(),
             'message': 'محصول به سبد خرید اضافه شد'
         })
 
@@ -90,9 +99,7 @@ def remove_from_cart(request):
 
         return JsonResponse({
             'success': True,
-            'cart_count': cart.count,
-            'total_price': cart.calc_total_price(),
-            'items': cart.get_cart_items(),  # استفاده از متد جدید
+            **cart.as_dict(),
             'message': 'محصول از سبد خرید حذف شد'
         })
 
@@ -115,21 +122,10 @@ def update_cart_quantity(request):
         product = get_object_or_404(Product, id=product_id)
         cart = ShopCart(request)
 
-        # پیدا کردن کلید محصول در سبد خرید
-        key = f"{product_id}:{detail}" if detail else str(product_id)
-
-        if key in cart.shop_cart:
-            if quantity <= 0:
-                cart.delete_from_shop_cart(product, detail)
-            else:
-                cart.shop_cart[key]['qty'] = quantity
-                cart.session.modified = True
-
+        if cart.update_quantity(product.id, quantity, detail):
             return JsonResponse({
                 'success': True,
-                'cart_count': cart.count,
-                'total_price': cart.calc_total_price(),
-                'items': cart.get_cart_items(),  # استفاده از متد جدید
+                **cart.as_dict(),
                 'message': 'تعداد محصول به‌روزرسانی شد'
             })
         else:
@@ -185,54 +181,97 @@ def get_cart_count(request):
 
 
 
+LAST_ORDER_SESSION_KEY = 'last_order'
+# مدتی که پس از ثبت سفارش، درخواست تکراری با سبد خالی به همان سفارش هدایت می‌شود (ثانیه)
+LAST_ORDER_TTL = 60
+
+
+def create_order_from_cart(user, shop_cart):
+    """
+    ثبت سفارش از سبد خرید در یک تراکنش: یک کوئری برای محصولات و یک bulk_create
+    برای جزئیات. خروجی (order, created, missing_ids) است؛ اگر سفارشی با همین
+    شناسه سبد قبلاً ثبت شده باشد همان سفارش با created=False برمی‌گردد.
+    """
+    token = shop_cart.token
+    existing = Order.objects.filter(cartToken=token, customer=user).first()
+    if existing is not None:
+        return existing, False, []
+
+    items = shop_cart.get_cart_items()
+    products = Product.objects.in_bulk({item['id'] for item in items})
+    missing_ids = sorted({item['id'] for item in items if item['id'] not in products})
+
+    items = [item for item in items if item['id'] in products]
+    # bulk_create سیگنال ندارد؛ جمع کل همین‌جا روی سفارش ثبت می‌شود
+    subtotal = sum(item['price'] * item['quantity'] for item in items)
+
+    try:
+        with transaction.atomic():
+            order = Order.objects.create(customer=user, status="pending", cartToken=token, subtotal=subtotal)
+            OrderDetail.objects.bulk_create([
+                OrderDetail(
+                    order=order,
+                    product=products[item['id']],
+                    brand_id=products[item['id']].brand_id,
+                    qty=item['quantity'],
+                    price=item['price'],
+                    selectedOptions=item.get('detail', ''),
+                )
+                for item in items
+            ])
+    except IntegrityError:
+        # درخواست همزمان دیگری (کلیک دوباره) همین سبد را ثبت کرده است
+        existing = Order.objects.filter(cartToken=token, customer=user).first()
+        if existing is None:
+            raise
+        return existing, False, []
+
+    return order, True, missing_ids
+
+
 class CreateOrderView(LoginRequiredMixin, View):
     def get(self, request, *args, **kwargs):
         shop_cart = ShopCart(request)
 
         # بررسی اینکه سبد خرید خالی نباشد
         if shop_cart.count == 0:
+            # درخواست تکراری پس از ثبت موفق (سبد خالی شده) به همان سفارش برمی‌گردد
+            last_order = request.session.get(LAST_ORDER_SESSION_KEY)
+            if last_order and time.time() - last_order['at'] < LAST_ORDER_TTL:
+                return redirect('order:checkout', last_order['id'])
             messages.error(request, "سبد خرید شما خالی است.", "danger")
             return redirect("main:index")
 
+        # سفارش فقط با قیمت‌های فعلی ثبت می‌شود؛ در صورت تغییر، کاربر سبد را دوباره می‌بیند
+        price_changes = shop_cart.revalidate_prices(force=True)
+        if price_changes:
+            for change in price_changes:
+                messages.warning(request, price_change_message(change))
+            return redirect('order:cart_page')
+
         try:
-            order = Order.objects.create(
-                customer=request.user,
-                status="pending",
+            order, created, missing_ids = create_order_from_cart(request.user, shop_cart)
+        except Exception as e:
+            messages.error(
+                request,
+                f"خطا در ایجاد سفارش: {str(e)}",
+                "danger"
             )
+            return redirect("main:index")
 
-            for item in shop_cart.get_cart_items():
-                try:
-                    product = Product.objects.get(id=item['id'])
-
-                    OrderDetail.objects.create(
-                        order=order,
-                        product=product,
-                        brand=product.brand,
-                        qty=item['quantity'],
-                        price=item['price'],
-                        selectedOptions=item.get('detail', '')
-                    )
-
-                except Product.DoesNotExist:
-                    messages.warning(request, f"محصول با شناسه {item['id']} یافت نشد و از سفارش حذف شد.")
-                    continue
+        for product_id in missing_ids:
+            messages.warning(request, f"محصول با شناسه {product_id} یافت نشد و از سفارش حذف شد.")
 
-            # پاک کردن سبد خرید پس از ایجاد سفارش موفق
-            shop_cart.delete_all_list()
+        # پاک کردن سبد خرید پس از ایجاد سفارش موفق
+        shop_cart.delete_all_list()
+        request.session[LAST_ORDER_SESSION_KEY] = {'id': order.id, 'at': time.time()}
 
+        if created:
             messages.success(
                 request,
                 f"سفارش شما با کد {order.orderCode} با موفقیت ایجاد شد و در انتظار پرداخت است."
             )
-            return redirect('order:checkout',order.id)
-
-        except Exception as e:
-            messages.error(
-                request,
-                f"خطا در ایجاد سفارش: {str(e)}",
-                "danger"
-            )
-            return redirect("main:index")
+        return redirect('order:checkout',order.id)
 
 
 
@@ -326,9 +365,9 @@ def checkout(request, order_id):
 
 def render_checkout_page(request, order, checkout_data):
     """تابع کمکی برای رندر کردن صفحه چک‌اوت"""
-    tax_rate = 9
-    tax_amount = (order.getFinalPrice() * tax_rate) // 100
-    final_price_with_tax = order.getFinalPrice() + tax_amount
+    tax_rate = TAX_PERCENT
+    tax_amount = order.taxAmount
+    final_price_with_tax = order.finalAmount
 
     context = {
         'order': order,
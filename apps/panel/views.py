@@ -3,7 +3,9 @@ from django.contrib.auth.decorators import login_required
 from django.db.models import Count
 from apps.product.models import Product,Category,LikeOrUnlike,Comment
 from apps.order.models import Order,OrderDetail
+from apps.product.product_cards import load_product_cards
 import jdatetime
+import utils
 from django.db.models import Count, Q, Prefetch
 
 
@@ -18,12 +20,13 @@ def dashboard(request):
     returned_orders = user.orders.filter(status='returned').count()
 
     # آخرین سفارش‌ها
-    latest_orders = user.orders.all().order_by('-registerDate')[:5]
+    latest_orders = user.orders.annotate(final_price=F('finalAmount')).order_by('-registerDate')[:5]
 
     # فرمت کردن تاریخ به شمسی برای آخرین سفارش‌ها
-    for order in latest_orders:
-        order.jalali_date = jdatetime.datetime.fromgregorian(datetime=order.registerDate).strftime("%Y/%m/%d")
-        order.final_price = order.get_order_total_price()
+    latest_orders = list(latest_orders)
+    jalali_dates = utils.to_jalali_many(order.registerDate for order in latest_orders)
+    for order, jalali_date in zip(latest_orders, jalali_dates):
+        order.jalali_date = jalali_date
 
     # محصولات پیشنهادی بر اساس خریدهای قبلی
     recommended_products = get_recommended_products_with_ratings(user)
@@ -84,58 +87,34 @@ def get_recommended_products_with_ratings(user, limit=10):
             # اگر کاربر هیچ خریدی نداشته، محصولات پرفروش را نشان بده
             recommended = get_popular_products()[:limit]
 
-        # محاسبه رتبه‌بندی و ویژگی‌ها برای هر محصول
-        product_list = []
-        for product in recommended:
-            product_data = calculate_product_ratings_and_features(product)
-            product_list.append(product_data)
-
-        return product_list
+        # محاسبه رتبه‌بندی و ویژگی‌ها برای همه محصولات با تعداد ثابت کوئری
+        return calculate_product_ratings_and_features(recommended)
 
     except Exception as e:
         # در صورت بروز خطا، محصولات پرفروش را برگردان
-        popular_products = get_popular_products()[:limit]
-        return [calculate_product_ratings_and_features(product) for product in popular_products]
+        return calculate_product_ratings_and_features(get_popular_products(), limit=limit)
 
-def calculate_product_ratings_and_features(product):
+def calculate_product_ratings_and_features(products, limit=None):
     """
-    محاسبه رتبه‌بندی و ویژگی‌های محصول
+    محاسبه رتبه‌بندی و ویژگی‌های محصولات
     """
-    # محاسبه لایک و دیسلایک
-    likes_count = LikeOrUnlike.objects.filter(product=product, like=True).count()
-    unlikes_count = LikeOrUnlike.objects.filter(product=product, unlike=True).count()
-    total_votes = likes_count + unlikes_count
-
-    # محاسبه تعداد نظرات
-    comments_count = Comment.objects.filter(product=product, isActive=True).count()
-
-    # محاسبه رتبه‌بندی
-    if total_votes > 0:
-        rating = 4 + (likes_count - unlikes_count) / (total_votes * 10)
-        rating = max(3.5, min(rating, 5.0))  # محدود کردن بین 3.5 و 5.0
-    else:
-        rating = 4.0
-
-    # دریافت رنگ‌های محصول
-    colors = product.features_value.filter(feature__title='رنگ').values_list('value', flat=True)
-
-    # اگر رنگ پیدا نشد، از رنگ‌های پیش‌فرض استفاده کن
-    if not colors:
-        colors = ['مشکی', 'سفید', 'نقره‌ای']
-
-    return {
-        'product': product,
-        'image_url': product.image.url if product.image else '',
-        'short_title': product.title[:50] + '...' if len(product.title) > 50 else product.title,
-        'brand': product.brand.title if product.brand else 'بدون برند',
-        'price': product.price,
-        'final_price': product.get_price_by_discount(),
-        'discount_percentage': product.get_discount_percentage(),
-        'colors': list(colors)[:3],  # حداکثر 3 رنگ نشان بده
-        'rating': round(rating, 1),
-        'comments_count': comments_count,
-        'likes_count': likes_count,
-    }
+    product_list = load_product_cards(products, limit=limit)
+
+    for product_data in product_list:
+        product = product_data['product']
+
+        # اگر رنگ پیدا نشد، از رنگ‌های پیش‌فرض استفاده کن
+        colors = product_data['colors'] or ['مشکی', 'سفید', 'نقره‌ای']
+
+        product_data.update({
+            'short_title': product.title[:50] + '...' if len(product.title) > 50 else product.title,
+            'brand': product_data['brand'] or 'بدون برند',
+            'final_price': product.get_price_by_discount(),
+            'discount_percentage': product.get_discount_percentage(),
+            'colors': colors[:3],  # حداکثر 3 رنگ نشان بده
+        })
+
+    return product_list
 
 def get_popular_products():
     """
@@ -151,6 +130,9 @@ def get_popular_products():
 import jdatetime
 from django.utils import timezone
 from datetime import datetime
+from django.db.models import F
+
+ORDERS_PAGE_SIZE = 20
 
 @login_required
 def orders_view(request):
@@ -162,8 +144,11 @@ def orders_view(request):
     date_to = request.GET.get('date_to')
     search_query = request.GET.get('search', '')
 
-    # فیلتر کردن سفارشات
-    orders = user.orders.all().order_by('-registerDate')
+    # فیلتر کردن سفارشات (تعداد اقلام با annotate و مبلغ از ستون ذخیره‌شده سفارش)
+    orders = user.orders.annotate(
+        items_count=Count('details'),
+        final_price=F('finalAmount'),
+    ).order_by('-registerDate', '-id')
 
     # فیلتر بر اساس وضعیت
     if status_filter != 'all':
@@ -202,22 +187,32 @@ def orders_view(request):
     if search_query:
         orders = orders.filter(orderCode__icontains=search_query)
 
+    # صفحه‌بندی keyset روی (registerDate, id): هزینه هر صفحه مستقل از تعداد کل سفارش‌ها
+    cursor = utils.decode_keyset_cursor(request.GET.get('after'))
+    if cursor:
+        cursor_date, cursor_id = cursor
+        orders = orders.filter(
+            Q(registerDate__lt=cursor_date) | Q(registerDate=cursor_date, id__lt=cursor_id)
+        )
+    orders = list(orders[:ORDERS_PAGE_SIZE + 1])
+    next_query = None
+    if len(orders) > ORDERS_PAGE_SIZE:
+        orders = orders[:ORDERS_PAGE_SIZE]
+        query = request.GET.copy()
+        query['after'] = utils.encode_keyset_cursor(orders[-1].registerDate, orders[-1].id)
+        next_query = query.urlencode()
+
     # فرمت کردن تاریخ به شمسی برای نمایش
-    for order in orders:
-        order.jalali_date = jdatetime.datetime.fromgregorian(
-            datetime=order.registerDate
-        ).strftime("%Y/%m/%d")
-        order.final_price = order.get_order_total_price()
-        order.items_count = order.details.count()
-
-    # آمار سفارشات برای فیلترها
+    for order, jalali_date in zip(orders, utils.to_jalali_many(order.registerDate for order in orders)):
+        order.jalali_date = jalali_date
+
+    # آمار سفارشات برای فیلترها با یک کوئری گروه‌بندی‌شده
+    status_counts = dict(
+        user.orders.order_by().values_list('status').annotate(total=Count('id'))
+    )
     orders_stats = {
-        'all': user.orders.count(),
-        'pending': user.orders.filter(status='pending').count(),
-        'processing': user.orders.filter(status='processing').count(),
-        'shipped': user.orders.filter(status='shipped').count(),
-        'delivered': user.orders.filter(status='delivered').count(),
-        'canceled': user.orders.filter(status='canceled').count(),
+        'all': sum(status_counts.values()),
+        **{status: status_counts.get(status, 0) for status, _ in Order.STATUS_CHOICES},
     }
 
     context = {
@@ -227,6 +222,8 @@ def orders_view(request):
         'search_query': search_query,
         'date_from': date_from,
         'date_to': date_to,
+        'next_query': next_query,
+        'is_first_page': cursor is None,
     }
 
     return render(request, 'panel_app/partials/orders.html', context)
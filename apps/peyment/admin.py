@@ -6,10 +6,10 @@ from .models import Peyment
 
 class Peyment_admin(admin.ModelAdmin):
     
-    list_display = ('customer','get_jalali_register_date','amount','isFinaly','statusCode','refId',)
+    list_display = ('customer','get_jalali_register_date','amount','isFinaly','statusCode','refId','authority',)
 
     ordering = ('isFinaly',)
-    search_fields = ('refId','customer','get_jalali_register_date',)
+    search_fields = ('refId','authority','customer','get_jalali_register_date',)
 
 
 
@@ -0,0 +1,139 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from apps.order.models import Order
+from apps.peyment import verification
+from apps.peyment.models import Peyment
+from apps.peyment.stub import start_stub_server
+from apps.peyment.zarinpal import ZarinPal
+from apps.user.models import CustomUser
+from apps.user.sms import LocMemBackend
+
+BENCH_MOBILE = '09000000025'
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, int(round(len(ordered) * fraction)) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'callback های هم‌زمان verify پرداخت روی درگاه آزمایشی: تعداد verify واقعی درگاه، '
+        'نهایی شدن یک‌باره سفارش و زمان callback های تکراری از کش'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--payments', type=int, default=5)
+        parser.add_argument('--callbacks', type=int, default=20, help='callback هم‌زمان برای هر پرداخت')
+        parser.add_argument('--latency-ms', type=float, default=50, help='تأخیر درگاه آزمایشی')
+        parser.add_argument('--repeats', type=int, default=200, help='callback تکراری بعد از پردازش')
+        parser.add_argument('--sqlite-timeout', type=float, default=30, help='انتظار SQLite برای قفل نوشتن (ثانیه)')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            # SQLite قفل ردیفی ندارد: _lock_payment قفل نوشتن کل دیتابیس را تا پایان
+            # رفت‌وبرگشت به درگاه نگه می‌دارد و callback های پرداخت‌های دیگر پشت آن
+            # صف می‌کشند؛ timeout پیش‌فرض 5 ثانیه برای این صف کافی نیست و به
+            # database is locked می‌رسد. روی MySQL فقط ردیف همان پرداخت قفل می‌شود.
+            self._set_sqlite_timeout(options['sqlite_timeout'])
+        server, stub, url = start_stub_server(latency=options['latency_ms'] / 1000)
+        previous_gateway = verification.gateway
+        verification.gateway = ZarinPal(
+            merchant='bench', call_back_url='http://testserver' + reverse('peyment:verify'), api_url=url,
+        )
+        CustomUser.objects.filter(mobileNumber=BENCH_MOBILE).delete()
+        user = CustomUser.objects.create(mobileNumber=BENCH_MOBILE, is_active=True)
+        del LocMemBackend.outbox[:]
+        setup_test_environment()
+        try:
+            with override_settings(TASKS_EAGER=True, SMS_BACKEND='apps.user.sms.LocMemBackend'):
+                authorities = [self._create_payment(user) for _ in range(options['payments'])]
+                timings, statuses = self._fire(user, authorities, options['callbacks'])
+                repeat_ms, repeat_queries = self._repeat(user, authorities[0], options['repeats'])
+            self._report(options, authorities, stub, timings, statuses, repeat_ms, repeat_queries)
+        finally:
+            teardown_test_environment()
+            verification.gateway = previous_gateway
+            server.shutdown()
+            for authority in Peyment.objects.filter(customer=user).values_list('authority', flat=True):
+                cache.delete(verification._result_key(authority))
+            user.delete()
+
+    @staticmethod
+    def _set_sqlite_timeout(seconds):
+        # اتصال thread ها با همین settings_dict ساخته می‌شوند
+        connection.settings_dict.setdefault('OPTIONS', {})['timeout'] = seconds
+        connection.close()
+
+    @staticmethod
+    def _create_payment(user):
+        order = Order.objects.create(customer=user)
+        peyment = Peyment.objects.create(order=order, customer=user, amount=1000, description='bench')
+        peyment.authority = verification.gateway.request_payment(amount=peyment.amount, description='bench')
+        peyment.save(update_fields=['authority'])
+        return peyment.authority
+
+    @staticmethod
+    def _fire(user, authorities, callbacks):
+        """callbacks درخواست هم‌زمان برای هر authority که با barrier یکجا شروع می‌شوند"""
+        jobs = [authority for authority in authorities for _ in range(callbacks)]
+        barrier = threading.Barrier(len(jobs))
+        local = threading.local()
+
+        def callback(authority):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+                local.client.force_login(user)
+            barrier.wait()
+            started = time.perf_counter()
+            try:
+                response = local.client.get(reverse('peyment:verify'), {'Authority': authority, 'Status': 'OK'})
+                return (time.perf_counter() - started) * 1000, response.status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(len(jobs)) as executor:
+            results = list(executor.map(callback, jobs))
+        return [ms for ms, _ in results], [status for _, status in results]
+
+    @staticmethod
+    def _repeat(user, authority, count):
+        client = Client()
+        client.force_login(user)
+        timings, queries = [], []
+        for _ in range(count):
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as captured:
+                client.get(reverse('peyment:verify'), {'Authority': authority, 'Status': 'OK'})
+            timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured.captured_queries))
+        return timings, queries
+
+    def _report(self, options, authorities, stub, timings, statuses, repeat_ms, repeat_queries):
+        verified = [stub.payments[authority]['verified'] for authority in authorities]
+        paid = Peyment.objects.filter(authority__in=authorities, isFinaly=True)
+        finalized = Order.objects.filter(peyment_order__in=paid, isFinally=True).count()
+        self.stdout.write(f"{len(authorities)} payments x {options['callbacks']} concurrent callbacks "
+                          f"({connection.vendor}, gateway latency {options['latency_ms']:.0f}ms)")
+        self.stdout.write(f'gateway verify calls per payment  {verified}')
+        self.stdout.write(f'payments paid / orders finalized  {paid.count()} / {finalized}')
+        self.stdout.write(f'payment notifications sent        {len(LocMemBackend.outbox)}')
+        self.stdout.write(f'callback statuses                 {sorted(set(statuses))}')
+        self.stdout.write(f'concurrent callback p50/p95 ms    {percentile(timings, 0.5):.1f} / {percentile(timings, 0.95):.1f}')
+        self.stdout.write(f'repeated callback p50 ms, queries {percentile(repeat_ms, 0.5):.2f}, {max(repeat_queries)}')
+        exactly_once = (
+            verified == [1] * len(authorities)
+            and paid.count() == finalized == len(LocMemBackend.outbox) == len(authorities)
+        )
+        if not exactly_once:
+            raise CommandError('payment verified or applied more than once')
+        self.stdout.write(self.style.SUCCESS('each payment verified and applied exactly once'))
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.peyment.stub import STARTPAY_PREFIX, start_stub_server
+
+
+class Command(BaseCommand):
+    help = 'درگاه آزمایشی زرین‌پال برای تست بار مسیر پرداخت بدون اینترنت'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency-ms', type=float, default=0, help='تأخیر مصنوعی هر پاسخ')
+        parser.add_argument('--fail-rate', type=float, default=0, help='نسبت پاسخ‌های 503')
+
+    def handle(self, *args, **options):
+        server, gateway, url = start_stub_server(
+            options['host'], options['port'],
+            latency=options['latency_ms'] / 1000, fail_rate=options['fail_rate'],
+        )
+        self.stdout.write(f'ZARINPAL_API_URL={url}')
+        self.stdout.write(f'ZARINPAL_STARTPAY_URL={url}{STARTPAY_PREFIX}{{authority}}')
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.shutdown()
+            self.stdout.write(f'{gateway.counter} payments created')
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.3 on 2026-10-17 21:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('peyment', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='peyment',
+            name='authority',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True, verbose_name='شناسه تراکنش درگاه'),
+        ),
+    ]
@@ -3,7 +3,6 @@ from apps.user.models import CustomUser
 from django.utils import timezone
 from apps.order.models import Order
 import utils
-import jdatetime
 # Create your models here.
 
 class Peyment(models.Model):
@@ -17,10 +16,12 @@ class Peyment(models.Model):
     isFinaly = models.BooleanField(default=False,verbose_name='وضعیت پرداخت')
     statusCode = models.IntegerField(verbose_name='کد وضعیت پرداخت',null=True,blank=True)
     refId = models.CharField(max_length=50,verbose_name='کد پیگیری پرداخت',null=True,blank=True)
+    # شناسه تراکنش در درگاه؛ کلید یکتای پردازش callback (apps.peyment.verification)
+    authority = models.CharField(max_length=64,unique=True,verbose_name='شناسه تراکنش درگاه',null=True,blank=True)
 
 
     def get_jalali_register_date(self):
-        return jdatetime.datetime.fromgregorian(datetime=self.createAt).strftime('%Y/%m/%d')
+        return utils.to_jalali(self.createAt)
 
 
     def __str__(self) -> str:
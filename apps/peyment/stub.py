@@ -0,0 +1,117 @@
+# stub.py
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode
+
+from .zarinpal import REQUEST_PATH, VERIFY_PATH
+
+STARTPAY_PREFIX = '/pg/StartPay/'
+
+
+class StubGateway:
+    """
+    وضعیت درگاه آزمایشی: authority ها، مبلغ و تعداد verify هر کدام.
+
+    رفتار مثل زرین‌پال v4 است: اولین verify موفق کد 100 و بعدی‌ها 101
+    برمی‌گردانند؛ مبلغ متفاوت خطای -50 دارد.
+    """
+
+    def __init__(self, latency=0.0, fail_rate=0.0, seed=1):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.payments = {}
+        self.counter = 0
+
+    def create(self, payload):
+        with self.lock:
+            self.counter += 1
+            authority = f'A{self.counter:035d}'
+            self.payments[authority] = {
+                'amount': payload.get('amount'),
+                'callback_url': payload.get('callback_url'),
+                'verified': 0,
+            }
+        return {'data': {'code': 100, 'message': 'Success', 'authority': authority, 'fee_type': 'Merchant', 'fee': 0},
+                'errors': []}
+
+    def verify(self, payload):
+        with self.lock:
+            payment = self.payments.get(payload.get('authority'))
+            if payment is None:
+                return {'data': [], 'errors': {'code': -51, 'message': 'Session is not valid.'}}
+            if payment['amount'] != payload.get('amount'):
+                return {'data': [], 'errors': {'code': -50, 'message': 'Amounts are not equal.'}}
+            payment['verified'] += 1
+            first = payment['verified'] == 1
+            ref_id = 100000 + list(self.payments).index(payload['authority'])
+        code = 100 if first else 101
+        return {'data': {'code': code, 'message': 'Paid' if first else 'Verified', 'ref_id': ref_id,
+                         'card_pan': '502229******5995', 'fee_type': 'Merchant', 'fee': 0},
+                'errors': []}
+
+    def callback_url(self, authority, status='OK'):
+        payment = self.payments.get(authority)
+        if payment is None:
+            return None
+        return f"{payment['callback_url']}?{urlencode({'Authority': authority, 'Status': status})}"
+
+
+def make_handler(gateway):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # بدون آن سرآیند و بدنه جدا ارسال می‌شوند و delayed ACK حدود 40ms تأخیر می‌دهد
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body=None, headers=()):
+            data = json.dumps(body).encode() if body is not None else b''
+            self.send_response(status)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            try:
+                payload = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                return self._send(400, {'data': [], 'errors': {'code': -9, 'message': 'Invalid JSON'}})
+            if gateway.latency:
+                time.sleep(gateway.latency)
+            if gateway.fail_rate and gateway.random.random() < gateway.fail_rate:
+                return self._send(503, {'message': 'stub failure'})
+            if self.path == REQUEST_PATH:
+                return self._send(200, gateway.create(payload))
+            if self.path == VERIFY_PATH:
+                return self._send(200, gateway.verify(payload))
+            return self._send(404, {'message': 'not found'})
+
+        def do_GET(self):
+            # صفحه پرداخت: بلافاصله با Status=OK به callback فروشگاه برمی‌گردد
+            if self.path.startswith(STARTPAY_PREFIX):
+                location = gateway.callback_url(self.path[len(STARTPAY_PREFIX):])
+                if location:
+                    return self._send(302, headers=[('Location', location)])
+            return self._send(404, {'message': 'not found'})
+
+    return Handler
+
+
+def start_stub_server(host='127.0.0.1', port=0, **options):
+    """اجرای درگاه آزمایشی در thread جدا؛ خروجی (server، gateway، آدرس پایه)"""
+    gateway = StubGateway(**options)
+    server = ThreadingHTTPServer((host, port), make_handler(gateway))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name='zarinpal-stub', daemon=True)
+    thread.start()
+    return server, gateway, f'http://{host}:{server.server_address[1]}'
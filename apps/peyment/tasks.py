@@ -0,0 +1,12 @@
+# tasks.py
+from apps.tasks.queue import task
+from apps.user.tasks import send_sms
+
+from .models import Peyment
+
+
+@task
+def notify_payment(peyment_id):
+    """پیامک تأیید پرداخت با کد رهگیری برای مشتری"""
+    peyment = Peyment.objects.select_related('customer').get(pk=peyment_id)
+    send_sms.delay(peyment.customer.mobileNumber, f'پرداخت شما با موفقیت انجام شد. کد رهگیری: {peyment.refId}')
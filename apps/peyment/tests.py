@@ -1,3 +1,80 @@
-from django.test import TestCase
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from apps.order.models import Order
+from apps.user.models import CustomUser
+from apps.user.sms import LocMemBackend
+
+from . import verification
+from .models import Peyment
+from .stub import start_stub_server
+from .zarinpal import ZarinPal
+
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'peyment-tests'}}
+
+
+@override_settings(TASKS_EAGER=True, SMS_BACKEND='apps.user.sms.LocMemBackend', CACHES=TEST_CACHES)
+class ConcurrentVerifyTests(TransactionTestCase):
+    """callback های هم‌زمان یک authority روی درگاه آزمایشی"""
+
+    payments = 3
+    callbacks = 8
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            # حافظه مشترک SQLite بین thread ها به جای انتظار خطای قفل جدول می‌دهد
+            self.skipTest('needs a file or server test database (DATABASES TEST NAME)')
+        server, self.stub, url = start_stub_server(latency=0.02)
+        self.addCleanup(server.shutdown)
+        gateway = ZarinPal(merchant='test', call_back_url='http://testserver' + reverse('peyment:verify'), api_url=url)
+        patcher = mock.patch.object(verification, 'gateway', gateway)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        del LocMemBackend.outbox[:]
+        self.user = CustomUser.objects.create(mobileNumber='09000000025', is_active=True)
+
+    def _create_payment(self):
+        order = Order.objects.create(customer=self.user)
+        peyment = Peyment.objects.create(order=order, customer=self.user, amount=1000, description='test')
+        peyment.authority = verification.gateway.request_payment(amount=peyment.amount, description='test')
+        peyment.save(update_fields=['authority'])
+        return peyment.authority
+
+    def _fire(self, authorities):
+        jobs = []
+        for authority in authorities:
+            for _ in range(self.callbacks):
+                client = Client()
+                client.force_login(self.user)
+                jobs.append((client, authority))
+        barrier = threading.Barrier(len(jobs))
+
+        def callback(job):
+            client, authority = job
+            barrier.wait(timeout=30)
+            try:
+                return client.get(reverse('peyment:verify'), {'Authority': authority, 'Status': 'OK'})
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(len(jobs)) as executor:
+            return list(executor.map(callback, jobs))
+
+    def test_each_payment_is_applied_once(self):
+        authorities = [self._create_payment() for _ in range(self.payments)]
+        responses = self._fire(authorities)
+
+        self.assertEqual(
+            [response.url.startswith('/peyment/show_sucess/') for response in responses],
+            [True] * len(responses),
+        )
+        self.assertEqual([self.stub.payments[authority]['verified'] for authority in authorities], [1] * self.payments)
+        paid = Peyment.objects.filter(authority__in=authorities, isFinaly=True)
+        self.assertEqual(paid.count(), self.payments)
+        self.assertEqual(Order.objects.filter(peyment_order__in=paid, isFinally=True).count(), self.payments)
+        self.assertEqual(len(LocMemBackend.outbox), self.payments)
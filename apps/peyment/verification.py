@@ -0,0 +1,94 @@
+# verification.py
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+
+from apps.order.models import Order
+
+from .models import Peyment
+from .tasks import notify_payment
+from .zarinpal import GatewayError, ZarinPal
+
+# کلاینت مشترک پروسه تا اتصال‌های درگاه بین درخواست‌ها دوباره استفاده شوند
+gateway = ZarinPal(merchant=settings.ZARINPAL_MERCHANT_ID, call_back_url=settings.ZARINPAL_CALLBACK_URL)
+
+# مدت نگهداری نتیجه پردازش‌شده هر authority در کش (ثانیه)
+RESULT_TIMEOUT = getattr(settings, 'PEYMENT_RESULT_TIMEOUT', 86400)
+# کدهای موفق درگاه: 100 پرداخت تازه، 101 قبلاً تأیید شده
+PAID_CODES = (100, 101)
+
+
+def _result_key(authority):
+    return f'peyment:result:{authority}'
+
+
+def _result(peyment):
+    if peyment.isFinaly:
+        return {'paid': True, 'message': f'کد رهگیری شما : {peyment.refId}', 'customer_id': peyment.customer_id}
+    return {'paid': False, 'message': 'پرداخت تأیید نشد', 'customer_id': peyment.customer_id}
+
+
+def _lock_payment(authority, user):
+    """ردیف پرداخت authority با قفل نوشتن تا پایان تراکنش جاری"""
+    payments = Peyment.objects.filter(authority=authority, customer=user)
+    if connection.vendor == 'sqlite':
+        # SQLite قفل ردیفی ندارد و select_for_update را نادیده می‌گیرد؛ UPDATE
+        # بی‌اثر قفل نوشتن را از ابتدای تراکنش می‌گیرد تا ارتقای هم‌زمان قفل‌ها
+        # به database is locked نرسد. این قفل کل دیتابیس است و تا پایان verify
+        # درگاه نگه داشته می‌شود، پس callback های هم‌زمان بقیه پرداخت‌ها صف
+        # می‌کشند و OPTIONS['timeout'] باید از چند رفت‌وبرگشت درگاه بیشتر باشد
+        payments.update(authority=F('authority'))
+    return payments.select_for_update().first()
+
+
+def verify_callback(authority, status, user):
+    """
+    پردازش callback درگاه برای authority؛ خروجی {'paid'، 'message'}.
+
+    authority کلید یکتای پردازش است: نتیجه نهایی در کش نگه داشته می‌شود و
+    callback تکراری بدون کوئری و بدون رفت‌وبرگشت به درگاه برمی‌گردد. ردیف
+    پرداخت با select_for_update قفل می‌شود تا callback های هم‌زمان پشت سر هم
+    اجرا شوند و فقط اولی درگاه را verify کند؛ به‌روزرسانی شرطی روی
+    isFinaly هم تضمین می‌کند سفارش و اطلاع‌رسانی فقط یک بار اعمال شوند.
+    """
+    cached = cache.get(_result_key(authority))
+    if cached is not None and cached['customer_id'] == user.pk:
+        return cached
+
+    with transaction.atomic():
+        peyment = _lock_payment(authority, user)
+        if peyment is None:
+            return {'paid': False, 'message': 'تراکنش یافت نشد'}
+        if peyment.isFinaly or peyment.statusCode is not None:
+            result = _result(peyment)
+            cache.set(_result_key(authority), result, RESULT_TIMEOUT)
+            return result
+
+        if status != 'OK':
+            Order.objects.filter(pk=peyment.order_id, isFinally=False).update(status='canceled')
+            return {'paid': False, 'message': 'پرداخت توسط کاربر لغو شد'}
+
+        try:
+            data = gateway.verify_payment(amount=peyment.amount, authority=authority)
+        except GatewayError as error:
+            if error.code == -1:
+                # درگاه در دسترس نیست؛ نتیجه ثبت نمی‌شود تا callback بعدی دوباره تلاش کند
+                return {'paid': False, 'message': 'ارتباط با درگاه پرداخت برقرار نشد، صفحه را دوباره بارگذاری کنید'}
+            data = {'code': error.code}
+
+        code = data.get('code')
+        paid = code in PAID_CODES
+        updated = Peyment.objects.filter(pk=peyment.pk, isFinaly=False, statusCode__isnull=True).update(
+            isFinaly=paid, statusCode=code, refId=str(data['ref_id']) if paid else None,
+        )
+        if updated and paid:
+            Order.objects.filter(pk=peyment.order_id).update(isFinally=True, status='processing')
+            if code == 100:
+                # اطلاع‌رسانی به مشتری خارج از مسیر درخواست
+                notify_payment.delay(peyment.pk)
+        peyment.refresh_from_db(fields=['isFinaly', 'statusCode', 'refId'])
+        result = _result(peyment)
+
+    cache.set(_result_key(authority), result, RESULT_TIMEOUT)
+    return result
@@ -1,7 +1,4 @@
 from django.shortcuts import render,redirect
-import requests
-import json
-import requests
 from django.views import View
 from django.contrib import messages
 from apps.order.models import Order
@@ -11,53 +8,36 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.conf import settings
 from apps.peyment.models import Peyment
 from apps.user.models import CustomUser
-import utils
 
-from .zarinpal import ZarinPal
-from django.http import JsonResponse
-
-ZP_API_REQUEST = "https://api.zarinpal.com/pg/v4/payment/request.json"
-ZP_API_VERIFY = "https://api.zarinpal.com/pg/v4/payment/verify.json"
-ZP_API_STARTPAY = "https://www.zarinpal.com/pg/StartPay/{authority}"
-
-pay = ZarinPal(merchant='41cb2cdd-3a44-4fb4-a0b3-db471b673078', call_back_url="https://rank0.ir/peyment/verify/")
-merchant='41cb2cdd-3a44-4fb4-a0b3-db471b673078'
+from .verification import gateway as pay, verify_callback
+from .zarinpal import GatewayError
 
 def send_request(request,order_id):
     # email and mobile is optimal
-
-    if utils.has_internet_connection():
-
-        user =  request.user
-        order = Order.objects.get(id = order_id)
-
-        peyment = Peyment.objects.create(
-            order = order,
-            customer = request.user,
-            amount = order.get_order_total_price(),
-            description = 'پرداخت شما با زرین پال انجام شد'
-        )
-
-        peyment.save()
-
-        request.session['peyment_session'] = {
-            'order_id':order.id,
-            'peyment_id':peyment.id,
-
-        }
-
-        response = pay.send_request(amount=order.get_order_total_price(), description='توضیحات مربوط به پرداخت', email="Example@test.com",
-                                mobile=user.mobileNumber)
-        if response.get('error_code') is None:
-            # redirect object
-            return response
-        else:
-            return HttpResponse(f'Error code: {response.get("error_code")}, Error Message: {response.get("message")}')
-
-    else:
-
-        messages.error(request,'اتصال اینرنت شما قابل تایید نیست','danger')
-        return redirect('main:index')
+    user =  request.user
+    order = Order.objects.get(id = order_id)
+
+    peyment = Peyment.objects.create(
+        order = order,
+        customer = request.user,
+        amount = order.get_order_total_price(),
+        description = 'پرداخت شما با زرین پال انجام شد'
+    )
+
+    # در دسترس نبودن درگاه با timeout کلاینت مشخص می‌شود، نه با بررسی جداگانه اینترنت
+    try:
+        authority = pay.request_payment(amount=peyment.amount, description='توضیحات مربوط به پرداخت',
+                                        mobile=user.mobileNumber)
+    except GatewayError as error:
+        if error.code == -1:
+            messages.error(request,'ارتباط با درگاه پرداخت برقرار نشد، دوباره تلاش کنید','danger')
+            return redirect('main:index')
+        return HttpResponse(f'Error code: {error.code}, Error Message: {error.message}')
+
+    # authority کلید پردازش callback است
+    peyment.authority = authority
+    peyment.save(update_fields=['authority'])
+    return redirect(pay.payment_url(authority))
 
 
 def verify(request):
@@ -77,91 +57,15 @@ def verify(request):
 
 class Zarin_pal_view_verfiy(LoginRequiredMixin, View):
     def get(self, request):
-        t_status = request.GET.get('Status')
-        t_authority = request.GET['Authority']
-        order_id = request.session['peyment_session']['order_id']
-        peyment_id = request.session['peyment_session']['peyment_id']
-        order = Order.objects.get(id=order_id)
-        peyment = Peyment.objects.get(id=peyment_id)
-
-
-        if t_status == 'OK':
-            req_header = {
-                "accept": "application/json",
-                "content-type": "application/json"
-            }
-            req_data = {
-                "merchant_id": merchant,
-                "amount": order.get_order_total_price(),
-                "authority": t_authority
-            }
-            req = requests.post(url=ZP_API_VERIFY, data=json.dumps(req_data), headers=req_header)
-            if len(req.json()['errors']) == 0:
-                t_status = req.json()['data']['code']
-                if t_status == 100:
-                    # پرداخت موفق - بروزرسانی وضعیت سفارش و enrollment
-                    order.isFinally = True
-                    order.status = OrderStatus.CONFIRMED
-                    order.save()
-
-                    # بروزرسانی وضعیت enrollment مربوط به این سفارش
-                    self.update_enrollment_status(order)
-
-                    peyment.isFinaly = True
-                    peyment.statusCode = t_status
-                    peyment.refId = str(req.json()['data']['refId'])
-                    peyment.save()
-
-                    return redirect('peyment:show_sucess', 'کد رهگیری شما : {}'.format(str(req.json()['data']['refId'])))
-
-
-                elif t_status == 101:
-                    # پرداخت تکراری - بروزرسانی وضعیت
-                    order.isFinally = True
-                    order.save()
-
-                    # بروزرسانی وضعیت enrollment مربوط به این سفارش
-                    self.update_enrollment_status(order)
-
-                    peyment.isFinaly = True
-                    peyment.statusCode = t_status
-                    peyment.refId = str(req.json()['data']['refId'])
-                    peyment.save()
-                    return redirect('peyment:show_sucess', 'کد رهگیری شما : {}'.format(str(req.json()['data']['refId'])))
-                else:
-                    peyment.statusCode = t_status
-                    peyment.save()
-                    return redirect('peyment:show_verfiy_unmessage', 'کد رهگیری شما : {}'.format(str(req.json()['data']['refId'])))
-            else:
-                e_code = req.json()['errors']['code']
-                e_message = req.json()['errors']['message']
-                return JsonResponse({
-                    "status": 'ok',
-                    "message": e_message,
-                    "error_code": e_code
-                })
-        else:
-            order.status = OrderStatus.CANCELLED
-            order.save()
-            return redirect('peyment:show_verfiy_unmessage','پرداخت توسط کاربر لغو شد')
-
-    def update_enrollment_status(self, order):
-        """
-        بروزرسانی وضعیت isPay در Enrollment مربوط به این سفارش
-        """
-        try:
-            # پیدا کردن OrderDetail مربوط به این سفارش که enrollment دارد
-            order_details = order.orders_details.filter(enrollment__isnull=False)
-
-            for order_detail in order_details:
-                if order_detail.enrollment:
-                    # بروزرسانی وضعیت پرداخت در Enrollment
-                    order_detail.enrollment.isPay = True
-                    order_detail.enrollment.save()
-                    print(f"Enrollment {order_detail.enrollment.id} updated to isPay=True")
-
-        except Exception as e:
-            print(f"Error updating enrollment status: {e}")
+        t_authority = request.GET.get('Authority')
+        if not t_authority:
+            return redirect('peyment:show_verfiy_unmessage', 'تراکنش یافت نشد')
+
+        # پردازش یک‌باره و قفل‌دار؛ callback تکراری نتیجه قبلی را می‌گیرد
+        result = verify_callback(t_authority, request.GET.get('Status'), request.user)
+        if result['paid']:
+            return redirect('peyment:show_sucess', result['message'])
+        return redirect('peyment:show_verfiy_unmessage', result['message'])
 
 def show_verfiy_message(request,message):
     order = Order.objects.all()
@@ -1,71 +1,145 @@
+# zarinpal.py
+import asyncio
+import logging
+import time
+
 import requests
-import json
+from django.conf import settings
 from django.shortcuts import redirect
-from django.contrib.auth.mixins import LoginRequiredMixin
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+REQUEST_PATH = '/pg/v4/payment/request.json'
+VERIFY_PATH = '/pg/v4/payment/verify.json'
+
+
+class GatewayError(Exception):
+    """خطای درگاه (کد خطای زرین‌پال) یا عدم دسترسی به آن (کد -1)"""
 
-CallbackURL = 'https://rank0.ir/peyment/verify/'
+    def __init__(self, code, message):
+        super().__init__(f'{code}: {message}')
+        self.code = code
+        self.message = message
 
 
-class ZarinPal(LoginRequiredMixin):
-    ZP_API_REQUEST = "https://api.zarinpal.com/pg/v4/payment/request.json"
-    ZP_API_VERIFY = "https://api.zarinpal.com/pg/v4/payment/verify.json"
-    ZP_API_STARTPAY = "https://www.zarinpal.com/pg/StartPay/{authority}"
+class ZarinPal:
+    """
+    کلاینت درگاه زرین‌پال با session مشترک.
 
-    def __init__(self, merchant, call_back_url):
+    اتصال‌های HTTP در pool نگه داشته می‌شوند و هر درخواست timeout اتصال و
+    خواندن دارد؛ پاسخ فقط یک بار parse می‌شود. ساخت تراکنش تکرار نمی‌شود
+    (ممکن است دو authority ساخته شود) ولی verify برای یک authority تکرارپذیر
+    است و روی خطای شبکه یا 5xx با backoff کوتاه دوباره فرستاده می‌شود.
+    """
+
+    def __init__(self, merchant, call_back_url, api_url=None, startpay_url=None,
+                 timeout=None, pool_size=None, verify_retries=None):
         self.MERCHANT = merchant
         self.callbackURL = call_back_url
+        self.api_url = (api_url or getattr(settings, 'ZARINPAL_API_URL', 'https://api.zarinpal.com')).rstrip('/')
+        self.startpay_url = startpay_url or getattr(
+            settings, 'ZARINPAL_STARTPAY_URL', 'https://www.zarinpal.com/pg/StartPay/{authority}'
+        )
+        # (ثانیه اتصال، ثانیه خواندن)
+        self.timeout = timeout or getattr(settings, 'ZARINPAL_TIMEOUT', (3.05, 10))
+        self.verify_retries = getattr(settings, 'ZARINPAL_VERIFY_RETRIES', 2) if verify_retries is None else verify_retries
+        self.pool_size = pool_size or getattr(settings, 'ZARINPAL_POOL_SIZE', 10)
+
+        self.session = requests.Session()
+        self.session.headers.update({'accept': 'application/json'})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _post(self, path, payload):
+        """ارسال payload و برگرداندن data پاسخ؛ در صورت خطا GatewayError"""
+        try:
+            response = self.session.post(self.api_url + path, json=payload, timeout=self.timeout)
+            if response.status_code >= 500:
+                raise GatewayError(-1, f'gateway error (HTTP {response.status_code})')
+            body = response.json()
+        except ValueError:
+            raise GatewayError(-1, f'invalid response from gateway (HTTP {response.status_code})')
+        except requests.RequestException as error:
+            raise GatewayError(-1, f'gateway unreachable: {error}')
+        errors = body.get('errors')
+        if errors:
+            raise GatewayError(errors.get('code'), errors.get('message'))
+        return body.get('data') or {}
+
+    def request_payment(self, amount, description, mobile=None, email=None):
+        """ساخت تراکنش و برگرداندن authority"""
+        data = self._post(REQUEST_PATH, {
+            'merchant_id': self.MERCHANT,
+            'amount': amount,
+            'callback_url': self.callbackURL,
+            'description': description,
+            'metadata': {'mobile': mobile, 'email': email},
+        })
+        return data['authority']
+
+    def payment_url(self, authority):
+        return self.startpay_url.format(authority=authority)
+
+    def verify_payment(self, amount, authority):
+        """
+        تأیید تراکنش؛ خروجی data پاسخ (code برابر 100 موفق، 101 قبلاً تأیید شده).
+
+        فقط خطاهای شبکه و 5xx دوباره تلاش می‌شوند؛ خطای منطقی درگاه نه.
+        """
+        payload = {'merchant_id': self.MERCHANT, 'amount': amount, 'authority': authority}
+        for attempt in range(self.verify_retries + 1):
+            try:
+                return self._post(VERIFY_PATH, payload)
+            except GatewayError as error:
+                if error.code != -1 or attempt == self.verify_retries:
+                    raise
+                logger.warning('zarinpal verify failed (attempt %s): %s', attempt + 1, error.message)
+                time.sleep(0.2 * 2 ** attempt)
 
     def send_request(self, amount, description, email=None, mobile=None):
-        req_data = {
-            "merchant_id": self.MERCHANT,
-            "amount": amount,
-            "callback_url": self.callbackURL,
-            "description": description,
-            "metadata": {"mobile": mobile, "email": 's@gmail.com'}
-        }
-        req_header = {"accept": "application/json",
-                      "content-type": "application/json'"}
-        req = requests.post(url=self.ZP_API_REQUEST, data=json.dumps(
-            req_data), headers=req_header)
-
-        if len(req.json()['errors']) == 0:
-            authority = req.json()['data']['authority']
-            return redirect(self.ZP_API_STARTPAY.format(authority=authority))
-
-        else:
-            e_code = req.json()['errors']['code']
-            e_message = req.json()['errors']['message']
-            return {"message": e_message, "error_code": e_code}
+        """redirect به صفحه پرداخت یا dict خطا (سازگار با نسخه قبلی)"""
+        try:
+            authority = self.request_payment(amount, description, mobile=mobile, email=email)
+        except GatewayError as error:
+            return {"message": error.message, "error_code": error.code}
+        return redirect(self.payment_url(authority))
 
     def verify(self, request, amount):
-        t_status = request.GET.get('Status')
-        t_authority = request.GET['Authority']
-        if request.GET.get('Status') == 'OK':
-            req_header = {"accept": "application/json",
-                          "content-type": "application/json'"}
-            req_data = {
-                "merchant_id": self.MERCHANT,
-                "amount": amount,
-                "authority": t_authority
-            }
-            req = requests.post(url=self.ZP_API_VERIFY, data=json.dumps(req_data), headers=req_header)
-            if len(req.json()['errors']) == 0:
-                t_status = req.json()['data']['code']
-                if t_status == 100:
-
-                    return {"transaction": True, "pay": True, "RefID": req.json()['data']['ref_id'], "message": None}
-
-                elif t_status == 101:
-
-                    return {"transaction": True, "pay": False, "RefID": None, "message": req.json()['data']['message']}
-
-                else:
-                    return {"transaction": False, "pay": False, "RefID": None, "message": req.json()['data']['message']}
-
-            else:
-                e_code = req.json()['errors']['code']
-                e_message = req.json()['errors']['message']
-
-                return {"status": 'ok', "message": e_message, "error_code": e_code}
-        else:
+        """بررسی callback درگاه (سازگار با نسخه قبلی)"""
+        if request.GET.get('Status') != 'OK':
             return {"status": 'cancel', "message": 'transaction failed or canceled by user'}
+        try:
+            data = self.verify_payment(amount, request.GET['Authority'])
+        except GatewayError as error:
+            return {"status": 'ok', "message": error.message, "error_code": error.code}
+        if data.get('code') == 100:
+            return {"transaction": True, "pay": True, "RefID": data.get('ref_id'), "message": None}
+        if data.get('code') == 101:
+            return {"transaction": True, "pay": False, "RefID": None, "message": data.get('message')}
+        return {"transaction": False, "pay": False, "RefID": None, "message": data.get('message')}
+
+
+class AsyncZarinPal:
+    """
+    نسخه asyncio کلاینت برای view های async و اسکریپت‌های بار.
+
+    requests کتابخانه sync است؛ هر فراخوانی در thread pool اجرا می‌شود و
+    همان session و pool اتصال ZarinPal را به اشتراک می‌گذارد. تعداد
+    درخواست‌های هم‌زمان به اندازه pool محدود است.
+    """
+
+    def __init__(self, client, concurrency=None):
+        self.client = client
+        self.semaphore = asyncio.Semaphore(concurrency or client.pool_size)
+
+    async def _call(self, func, *args, **kwargs):
+        async with self.semaphore:
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def request_payment(self, amount, description, mobile=None, email=None):
+        return await self._call(self.client.request_payment, amount, description, mobile=mobile, email=email)
+
+    async def verify_payment(self, amount, authority):
+        return await self._call(self.client.verify_payment, amount, authority)
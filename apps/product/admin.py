@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.db.models import Count, Q, Prefetch
-import jdatetime
+import utils
 
 from .models import (
     Brand, Category, Product, ProductGallery, Feature, FeatureValue,
@@ -149,7 +149,7 @@ class ProductAdmin(admin.ModelAdmin):
     )
     prepopulated_fields = {"slug": ("title",)}
     filter_horizontal = ("categories",)
-    readonly_fields = ("thumb_large", "createAt", "updateAt")
+    readonly_fields = ("thumb_large", "discountPercent", "finalPrice", "createAt", "updateAt")
     inlines = (ProductGalleryInline, ProductFeatureInline)
     ordering = ("-createAt",)
 
@@ -240,7 +240,7 @@ class CommentAdmin(admin.ModelAdmin):
     parent_short.short_description = "والد"
 
     def get_jalali_date(self, obj):
-        return jdatetime.datetime.fromgregorian(datetime=obj.created_at).strftime("%Y/%m/%d")
+        return utils.to_jalali(obj.created_at)
     get_jalali_date.short_description = "تاریخ ثبت"
 
 
@@ -259,7 +259,7 @@ class LikeOrUnlikeAdmin(admin.ModelAdmin):
     comment_short.short_description = "کامنت"
 
     def jalali_date(self, obj):
-        return jdatetime.datetime.fromgregorian(datetime=obj.created_at).strftime("%Y/%m/%d")
+        return utils.to_jalali(obj.created_at)
     jalali_date.short_description = "تاریخ ثبت"
 
 
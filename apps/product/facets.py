@@ -0,0 +1,206 @@
+# facets.py
+import threading
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+
+from apps.main.cache_versions import bump_namespaces, namespace_version
+from .models import Product, ProductFeature
+
+# int.bit_count از پایتون 3.10 موجود است
+_popcount = getattr(int, 'bit_count', None) or (lambda bitmap: bin(bitmap).count('1'))
+
+_local_indexes = {}
+_local_lock = threading.Lock()
+
+
+@dataclass
+class FacetResult:
+    product_ids: list
+    value_counts: dict
+    brand_counts: dict
+    price_range: dict = field(default_factory=dict)
+
+    @property
+    def count(self):
+        return len(self.product_ids)
+
+
+def _bitmap_from_positions(positions, size):
+    """ساخت bitmap (int پایتون) از لیست موقعیت‌ها در O(n)"""
+    buffer = bytearray((size + 7) // 8)
+    for position in positions:
+        buffer[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+class FacetIndex:
+    """
+    شاخص معکوس محصولات فعال یک دسته‌بندی یا برند.
+
+    هر محصول یک موقعیت ثابت دارد (مرتب بر اساس جدیدترین) و هر مقدار ویژگی،
+    هر برند و کل محصولات یک bitmap روی این موقعیت‌ها هستند؛ فیلتر و شمارش
+    هر مقدار فقط چند AND و bit_count روی عدد صحیح است.
+    """
+
+    def __init__(self, products, product_values):
+        # products: [(id, brand_id, price)] مرتب بر اساس ترتیب پیش‌فرض نمایش
+        # product_values: [(product_id, filterValue_id)]
+        self.product_ids = [row[0] for row in products]
+        self.size = len(self.product_ids)
+        position_of = {product_id: position for position, product_id in enumerate(self.product_ids)}
+
+        brand_positions = {}
+        for position, (_, brand_id, _) in enumerate(products):
+            brand_positions.setdefault(brand_id, []).append(position)
+
+        value_positions = {}
+        for product_id, value_id in product_values:
+            position = position_of.get(product_id)
+            if position is not None and value_id is not None:
+                value_positions.setdefault(value_id, set()).add(position)
+
+        self.all_bitmap = (1 << self.size) - 1
+        self.brand_bitmaps = {
+            brand_id: _bitmap_from_positions(positions, self.size)
+            for brand_id, positions in brand_positions.items()
+        }
+        self.value_bitmaps = {
+            value_id: _bitmap_from_positions(positions, self.size)
+            for value_id, positions in value_positions.items()
+        }
+
+        price_order = sorted(range(self.size), key=lambda position: products[position][2])
+        self.price_positions = price_order
+        self.sorted_prices = [products[position][2] for position in price_order]
+
+    @classmethod
+    def build(cls, queryset):
+        products = list(
+            queryset.filter(isActive=True)
+            .order_by('-createAt', '-id')
+            .values_list('id', 'brand_id', 'price')
+        )
+        product_values = ProductFeature.objects.filter(
+            product_id__in=queryset.filter(isActive=True).values('id'),
+            filterValue__isnull=False,
+        ).values_list('product_id', 'filterValue_id')
+        return cls(products, list(product_values))
+
+    def _union(self, bitmaps, ids):
+        if not ids:
+            return self.all_bitmap
+        result = 0
+        for item_id in ids:
+            result |= bitmaps.get(item_id, 0)
+        return result
+
+    def price_bitmap(self, price_min=None, price_max=None):
+        if price_min is None and price_max is None:
+            return self.all_bitmap
+        start = 0 if price_min is None else bisect_left(self.sorted_prices, price_min)
+        end = self.size if price_max is None else bisect_right(self.sorted_prices, price_max)
+        return _bitmap_from_positions(self.price_positions[start:end], self.size)
+
+    def positions(self, bitmap):
+        bits = bin(bitmap)[:1:-1]
+        return [position for position, bit in enumerate(bits) if bit == '1']
+
+    def compute(self, value_ids=(), brand_ids=(), price_min=None, price_max=None):
+        """
+        محاسبه محصولات منطبق و شمارش هر مقدار ویژگی و برند در یک گذر.
+
+        انتخاب‌های ویژگی مثل نسخه قبلی show_by_filter با OR ترکیب می‌شوند؛
+        شمارش هر مقدار/برند بدون در نظر گرفتن انتخاب‌های همان گروه است.
+        """
+        feature_mask = self._union(self.value_bitmaps, value_ids)
+        brand_mask = self._union(self.brand_bitmaps, brand_ids)
+        price_mask = self.price_bitmap(price_min, price_max)
+
+        match = feature_mask & brand_mask & price_mask
+        value_base = brand_mask & price_mask
+        brand_base = feature_mask & price_mask
+
+        return FacetResult(
+            product_ids=[self.product_ids[position] for position in self.positions(match)],
+            value_counts={
+                value_id: _popcount(bitmap & value_base)
+                for value_id, bitmap in self.value_bitmaps.items()
+            },
+            brand_counts={
+                brand_id: _popcount(bitmap & brand_base)
+                for brand_id, bitmap in self.brand_bitmaps.items()
+            },
+            price_range={
+                'min_price': self.sorted_prices[0] if self.size else None,
+                'max_price': self.sorted_prices[-1] if self.size else None,
+            },
+        )
+
+
+def _namespace(scope, scope_id):
+    return f'facets:{scope}:{scope_id}'
+
+
+def get_facet_index(scope, scope_id):
+    """شاخص دسته‌بندی ('category') یا برند ('brand')؛ در حافظه پروسه نگه داشته می‌شود"""
+    version = namespace_version(_namespace(scope, scope_id))
+    local_key = (scope, scope_id)
+    cached = _local_indexes.get(local_key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    if scope == 'category':
+        queryset = Product.objects.filter(categories=scope_id)
+    elif scope == 'brand':
+        queryset = Product.objects.filter(brand=scope_id)
+    else:
+        raise ValueError(f'unknown facet scope: {scope}')
+
+    index = FacetIndex.build(queryset)
+    with _local_lock:
+        _local_indexes[local_key] = (version, index)
+    return index
+
+
+def invalidate_facets(category_ids=(), brand_ids=()):
+    namespaces = [_namespace('category', category_id) for category_id in category_ids]
+    namespaces += [_namespace('brand', brand_id) for brand_id in brand_ids if brand_id is not None]
+    bump_namespaces(namespaces)
+
+
+def _parse_ids(values):
+    ids = []
+    for value in values:
+        try:
+            ids.append(int(value))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+def _parse_price(value):
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def facet_selection_from_request(request):
+    """خواندن فیلترهای feature / brand / قیمت از querystring صفحه فروشگاه"""
+    price_max = _parse_price(request.GET.get('price_max'))
+    if price_max is None:
+        # فیلتر قدیمی ProductFilter (price__lte)
+        price_max = _parse_price(request.GET.get('price'))
+    return {
+        'value_ids': _parse_ids(request.GET.getlist('feature')),
+        'brand_ids': _parse_ids(request.GET.getlist('brand')),
+        'price_min': _parse_price(request.GET.get('price_min')),
+        'price_max': price_max,
+    }
+
+
+def has_facet_selection(selection):
+    return any([
+        selection['value_ids'], selection['brand_ids'],
+        selection['price_min'] is not None, selection['price_max'] is not None,
+    ])
@@ -0,0 +1,53 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.product.facets import FacetIndex
+
+
+class Command(BaseCommand):
+    help = 'زمان ساخت شاخص facet و محاسبه فیلتر/شمارش برای یک دسته‌بندی مصنوعی (بدون دیتابیس)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=10000)
+        parser.add_argument('--features', type=int, default=8)
+        parser.add_argument('--values-per-feature', type=int, default=12)
+        parser.add_argument('--brands', type=int, default=30)
+        parser.add_argument('--runs', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        count = options['products']
+        value_groups = [
+            [feature * 1000 + value for value in range(options['values_per_feature'])]
+            for feature in range(options['features'])
+        ]
+
+        products = [(product_id, rnd.randrange(options['brands']), rnd.randrange(100_000, 90_000_000))
+                    for product_id in range(1, count + 1)]
+        product_values = [(product_id, rnd.choice(group)) for product_id, _, _ in products for group in value_groups]
+
+        started = time.perf_counter()
+        index = FacetIndex(products, product_values)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        timings = []
+        for _ in range(options['runs']):
+            selection = {
+                'value_ids': [rnd.choice(group) for group in rnd.sample(value_groups, 2)],
+                'brand_ids': rnd.sample(range(options['brands']), 3),
+                'price_min': 1_000_000,
+                'price_max': rnd.randrange(5_000_000, 90_000_000),
+            }
+            started = time.perf_counter()
+            index.compute(**selection)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        timings.sort()
+        self.stdout.write(f'products={count} build={build_ms:.1f}ms')
+        self.stdout.write(
+            f'compute p50={timings[len(timings) // 2]:.2f}ms '
+            f'p95={timings[int(len(timings) * 0.95) - 1]:.2f}ms max={timings[-1]:.2f}ms'
+        )
@@ -0,0 +1,103 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.product.models import (
+    Brand, Category, Comment, Feature, LikeOrUnlike, Product, ProductFeature,
+)
+from apps.product.product_cards import COLOR_FEATURE_TITLE, load_product_cards
+from apps.user.models import CustomUser
+
+
+def legacy_product_cards(products):
+    """مسیر قدیمی: چند کوئری جداگانه برای هر محصول (فقط برای مقایسه)"""
+    product_list = []
+    for product in products:
+        likes_count = LikeOrUnlike.objects.filter(product=product, like=True).count()
+        unlikes_count = LikeOrUnlike.objects.filter(product=product, unlike=True).count()
+        total_votes = likes_count + unlikes_count
+        comments_count = Comment.objects.filter(product=product, isActive=True).count()
+
+        if total_votes > 0:
+            rating = 4 + (likes_count - unlikes_count) / (total_votes * 10)
+            rating = max(3.5, min(rating, 5.0))
+        else:
+            rating = 4.0
+        colors = product.features_value.filter(feature__title=COLOR_FEATURE_TITLE).values_list('value', flat=True)
+
+        product_list.append({
+            'product': product,
+            'image_url': product.image.url if product.image else '',
+            'short_title': product.title,
+            'brand': product.brand.title,
+            'price': product.price,
+            'colors': list(colors),
+            'rating': round(rating, 1),
+            'comments_count': comments_count,
+        })
+    return product_list
+
+
+class Command(BaseCommand):
+    help = 'مقایسه تعداد کوئری و زمان بارگذاری کارت محصولات در مسیر قدیمی و جدید'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[20, 100, 500])
+
+    def handle(self, *args, **options):
+        sizes = sorted(options['sizes'])
+
+        # داده‌های آزمایشی داخل تراکنش ساخته و در پایان rollback می‌شوند
+        with transaction.atomic():
+            self._seed(max(sizes))
+
+            self.stdout.write(f"{'products':>9} {'old queries':>12} {'old ms':>9} {'new queries':>12} {'new ms':>9}")
+            for size in sizes:
+                queryset = Product.objects.filter(slug__startswith='bench-card-').order_by('-createAt')
+
+                old_queries, old_ms = self._measure(lambda: legacy_product_cards(queryset[:size]))
+                new_queries, new_ms = self._measure(lambda: load_product_cards(queryset, limit=size))
+
+                self.stdout.write(f'{size:>9} {old_queries:>12} {old_ms:>9.1f} {new_queries:>12} {new_ms:>9.1f}')
+
+            transaction.set_rollback(True)
+
+    def _measure(self, loader):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            cards = loader()
+            # دسترسی‌های قالب به قیمت با تخفیف هم جزو هزینه رندر کارت است
+            for card in cards:
+                card['product'].get_price_by_discount()
+            elapsed = (time.perf_counter() - started) * 1000
+        return len(context.captured_queries), elapsed
+
+    def _seed(self, count):
+        user = CustomUser.objects.create_user(mobileNumber='09000000000', password=None)
+        brand = Brand.objects.create(title='bench brand', slug='bench-card-brand')
+        category = Category.objects.create(title='bench category', slug='bench-card-category')
+        color = Feature.objects.create(title=COLOR_FEATURE_TITLE, slug='bench-card-color')
+        color.categories.add(category)
+
+        Product.objects.bulk_create([
+            Product(title=f'bench product {i}', slug=f'bench-card-{i}', brand=brand, price=1000 + i)
+            for i in range(count)
+        ])
+        # MySQL شناسه ردیف‌های bulk_create را برنمی‌گرداند
+        products = list(Product.objects.filter(brand=brand))
+        ProductFeature.objects.bulk_create([
+            ProductFeature(product=product, feature=color, value=value)
+            for product in products
+            for value in ('#000000', '#ffffff')
+        ])
+        Comment.objects.bulk_create([
+            Comment(user=user, product=product, text='bench', isActive=True)
+            for product in products
+        ])
+        comments = list(Comment.objects.filter(user=user).select_related('product'))
+        LikeOrUnlike.objects.bulk_create([
+            LikeOrUnlike(user=user, comment=comment, product=comment.product, like=i % 3 != 0, unlike=i % 3 == 0)
+            for i, comment in enumerate(comments)
+        ])
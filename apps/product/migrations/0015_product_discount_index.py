@@ -0,0 +1,59 @@
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def populate_discount_index(apps, schema_editor):
+    Product = apps.get_model('product', 'Product')
+    DiscountDetail = apps.get_model('discount', 'DiscountDetail')
+    now = timezone.now()
+
+    Product.objects.update(finalPrice=F('price'))
+
+    index = {}
+    rows = DiscountDetail.objects.filter(
+        discountBasket__isActive=True, discountBasket__endDate__gte=now,
+    ).values_list('product_id', 'discountBasket__discount', 'discountBasket__startDate', 'discountBasket__endDate')
+    for product_id, discount, start_date, end_date in rows:
+        percent, refresh_at = index.get(product_id, (0, None))
+        if start_date <= now:
+            percent = max(percent, discount)
+            boundary = end_date
+        else:
+            boundary = start_date
+        if refresh_at is None or boundary < refresh_at:
+            refresh_at = boundary
+        index[product_id] = (percent, refresh_at)
+
+    products = list(Product.objects.filter(pk__in=index))
+    for product in products:
+        product.discountPercent, product.discountRefreshAt = index[product.pk]
+        product.finalPrice = int(product.price - (product.price * product.discountPercent / 100))
+    Product.objects.bulk_update(products, ['discountPercent', 'finalPrice', 'discountRefreshAt'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0014_alter_brand_image_alter_category_image_and_more'),
+        ('discount', '0014_alter_copon_enddate_alter_copon_startdate_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='discountPercent',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='درصد تخفیف فعال'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='finalPrice',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='قیمت با تخفیف'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='discountRefreshAt',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='زمان بازمحاسبه تخفیف'),
+        ),
+        migrations.RunPython(populate_discount_index, migrations.RunPython.noop),
+    ]
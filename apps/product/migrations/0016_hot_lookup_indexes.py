@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0015_product_discount_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['isActive', 'createAt'], name='product_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['brand', 'isActive', 'price'], name='product_brand_active_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['product', 'isActive', 'parent'], name='comment_product_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='likeorunlike',
+            index=models.Index(fields=['product', 'like'], name='like_product_like_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='likeorunlike',
+            index=models.Index(fields=['product', 'unlike'], name='like_product_unlike_idx'),
+        ),
+    ]
@@ -3,7 +3,6 @@ from django.utils import timezone
 from ckeditor_uploader.fields import RichTextUploadingField
 from django.utils.html import strip_tags
 from django.urls import reverse
-import jdatetime
 from apps.user.models import CustomUser
 import utils
 
@@ -97,9 +96,29 @@ class Product(Base):
     image = models.ImageField(upload_to=fileupload.upload_to, verbose_name="تصویر اصلی", blank=True, null=True)
     downloadLink = models.URLField(blank=True, null=True, verbose_name="لینک دانلود خارجی (اختیاری)")
 
+    # شاخص تخفیف: مقادیر محاسبه‌شده از سبدهای تخفیف (apps.discount.discount_index)
+    discountPercent = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name="درصد تخفیف فعال")
+    finalPrice = models.PositiveIntegerField(default=0, editable=False, verbose_name="قیمت با تخفیف")
+    discountRefreshAt = models.DateTimeField(
+        null=True, blank=True, editable=False, verbose_name="زمان بازمحاسبه تخفیف"
+    )
+
     class Meta:
         verbose_name = "محصول"
         verbose_name_plural = "محصولات"
+        indexes = [
+            # جدیدترین محصولات فعال (صفحه اصلی، فروشگاه، جستجو)
+            models.Index(fields=['isActive', 'createAt'], name='product_active_created_idx'),
+            # محصولات فعال یک برند با فیلتر/مرتب‌سازی قیمت
+            models.Index(fields=['brand', 'isActive', 'price'], name='product_brand_active_price_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.finalPrice = self.calculate_final_price(self.price, self.discountPercent)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'price' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'finalPrice'}
+        super().save(*args, **kwargs)
 
     def short_description(self):
         if self.description:
@@ -111,7 +130,12 @@ class Product(Base):
     def get_absolute_url(self):
         return reverse("product:product_detail", kwargs={"slug": self.slug})
 
-    def get_discount_percentage(self):
+    @staticmethod
+    def calculate_final_price(price, discount):
+        return int(price - (price * discount / 100))
+
+    def calculate_discount_percentage(self):
+        """محاسبه مستقیم تخفیف از روی سبدهای تخفیف (مرجع شاخص تخفیف)"""
         discounts = [
             dbd.discountBasket.discount
             for dbd in self.productOfDiscount.all()
@@ -121,9 +145,19 @@ class Product(Base):
         ]
         return max(discounts) if discounts else 0
 
+    def is_discount_index_fresh(self):
+        """آیا از زمان آخرین محاسبه، شروع یا پایان هیچ سبد تخفیفی نگذشته است؟"""
+        return self.discountRefreshAt is None or timezone.now() < self.discountRefreshAt
+
+    def get_discount_percentage(self):
+        if self.is_discount_index_fresh():
+            return self.discountPercent
+        return self.calculate_discount_percentage()
+
     def get_price_by_discount(self):
-        discount = self.get_discount_percentage()
-        return int(self.price - (self.price * discount / 100))
+        if self.is_discount_index_fresh():
+            return self.finalPrice
+        return self.calculate_final_price(self.price, self.calculate_discount_percentage())
 
 
 
@@ -215,7 +249,7 @@ class Comment(models.Model):
     isActive = models.BooleanField(default=False, verbose_name="فعال")
 
     def get_jalali_date(self):
-        return jdatetime.datetime.fromgregorian(datetime=self.created_at).strftime("%Y/%m/%d")
+        return utils.to_jalali(self.created_at)
 
     def __str__(self):
         return f"نظر {self.user} روی {self.product}"
@@ -223,6 +257,9 @@ class Comment(models.Model):
     class Meta:
         verbose_name = "نظر"
         verbose_name_plural = "نظرات"
+        indexes = [
+            models.Index(fields=['product', 'isActive', 'parent'], name='comment_product_active_idx'),
+        ]
 
 
 # ========================
@@ -242,6 +279,11 @@ class LikeOrUnlike(models.Model):
     class Meta:
         verbose_name = "لایک"
         verbose_name_plural = "لایک‌ها"
+        indexes = [
+            # شمارش لایک/دیسلایک کارت محصولات (زیرکوئری‌های product_cards)
+            models.Index(fields=['product', 'like'], name='like_product_like_idx'),
+            models.Index(fields=['product', 'unlike'], name='like_product_unlike_idx'),
+        ]
 
 
 
@@ -0,0 +1,93 @@
+# pagination.py
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
+
+from django.db.models import IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+import utils
+from apps.order.models import OrderDetail
+
+PAGE_SIZE = 8
+# پارامتر sort صفحه فروشگاه و برند: (فیلد مرتب‌سازی، نزولی)
+SORTS = {
+    '1': ('createAt', True),
+    '2': ('price', True),
+    '3': ('price', False),
+    '4': ('total_sold', True),
+}
+DEFAULT_SORT = '1'
+
+
+def _total_sold():
+    """تعداد فروش هر محصول در سفارش‌های نهایی؛ Coalesce تا مقایسه keyset با NULL خراب نشود"""
+    sold = (
+        OrderDetail.objects.filter(product=OuterRef('pk'), order__isFinally=True)
+        .order_by()
+        .values('product')
+        .annotate(total=Sum('qty'))
+        .values('total')
+    )
+    return Coalesce(Subquery(sold, output_field=IntegerField()), 0)
+
+
+def sort_products(queryset, sort):
+    """مرتب‌سازی محصولات بر اساس sort به‌همراه id برای ترتیب یکتا؛ خروجی (queryset، کلید sort معتبر)"""
+    sort = sort if sort in SORTS else DEFAULT_SORT
+    field, descending = SORTS[sort]
+    if field == 'total_sold':
+        queryset = queryset.annotate(total_sold=_total_sold())
+    direction = '-' if descending else ''
+    return queryset.order_by(f'{direction}{field}', f'{direction}id'), sort
+
+
+def encode_cursor(sort, product):
+    """cursor مات (base64) از مقدار مرتب‌سازی و id آخرین محصول صفحه"""
+    field, _ = SORTS[sort]
+    value = getattr(product, field)
+    if field == 'createAt':
+        position = utils.encode_keyset_cursor(value, product.pk)
+    else:
+        position = f'{value}_{product.pk}'
+    return urlsafe_b64encode(f'{sort}:{position}'.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort):
+    """(مقدار، id) از cursor؛ برای cursor نامعتبر یا ساخته‌شده با sort دیگر None"""
+    if not cursor:
+        return None
+    try:
+        decoded = urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+    except (Base64Error, UnicodeDecodeError, ValueError):
+        return None
+    cursor_sort, _, position = decoded.partition(':')
+    if cursor_sort != sort:
+        return None
+    if SORTS[sort][0] == 'createAt':
+        return utils.decode_keyset_cursor(position)
+    try:
+        value, pk = (int(part) for part in position.split('_', 1))
+    except ValueError:
+        return None
+    return value, pk
+
+
+def keyset_page(queryset, sort, cursor=None, size=PAGE_SIZE):
+    """
+    یک صفحه از محصولات مرتب‌شده با sort_products بعد از cursor.
+
+    به‌جای OFFSET شرط (مقدار، id) بعد از آخرین ردیف صفحه قبل اضافه می‌شود
+    و یک ردیف اضافه برای تشخیص صفحه بعد خوانده می‌شود؛ COUNT اجرا نمی‌شود
+    و هزینه صفحه‌های عمیق با صفحه اول یکی است. خروجی (محصولات، cursor بعدی).
+    """
+    field, descending = SORTS[sort]
+    position = decode_cursor(cursor, sort)
+    if position is not None:
+        value, pk = position
+        lookup = 'lt' if descending else 'gt'
+        queryset = queryset.filter(
+            Q(**{f'{field}__{lookup}': value}) | Q(**{field: value, f'id__{lookup}': pk})
+        )
+    products = list(queryset[:size + 1])
+    next_cursor = encode_cursor(sort, products[size - 1]) if len(products) > size else None
+    return products[:size], next_cursor
@@ -0,0 +1,98 @@
+# product_cards.py
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.query import QuerySet
+
+from .models import Product, ProductFeature, Comment, LikeOrUnlike
+
+COLOR_FEATURE_TITLE = 'رنگ'
+
+
+def _count_subquery(model, **filters):
+    """شمارش شرطی ردیف‌های مرتبط با هر محصول در قالب یک زیرکوئری"""
+    counts = (
+        model.objects.filter(product=OuterRef('pk'), **filters)
+        .order_by()
+        .values('product')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def annotate_product_cards(queryset):
+    """
+    افزودن تعداد لایک، دیسلایک و نظرات فعال به‌همراه رنگ‌ها به کوئری محصولات.
+
+    شمارش‌ها به صورت زیرکوئری اضافه می‌شوند تا با annotate های قبلی
+    (مثل Sum روی orderItems در پرفروش‌ها) تداخل و ضرب ردیف نداشته باشند.
+    """
+    return queryset.select_related('brand').annotate(
+        card_likes_count=_count_subquery(LikeOrUnlike, like=True),
+        card_unlikes_count=_count_subquery(LikeOrUnlike, unlike=True),
+        card_comments_count=_count_subquery(Comment, isActive=True),
+    ).prefetch_related(
+        Prefetch(
+            'features_value',
+            queryset=ProductFeature.objects.filter(feature__title=COLOR_FEATURE_TITLE).select_related('filterValue'),
+            to_attr='card_colors',
+        ),
+    )
+
+
+def calculate_card_rating(likes_count, unlikes_count):
+    """امتیاز کارت محصول بر اساس لایک و دیسلایک، محدود بین 3.5 و 5.0"""
+    total_votes = likes_count + unlikes_count
+    if total_votes > 0:
+        rating = 4 + (likes_count - unlikes_count) / (total_votes * 10)
+        rating = max(3.5, min(rating, 5.0))
+    else:
+        rating = 4.0
+    return round(rating, 1)
+
+
+def build_product_card(product):
+    """ساخت دیکشنری کارت از محصولی که با annotate_product_cards بارگذاری شده"""
+    likes_count = product.card_likes_count
+    unlikes_count = product.card_unlikes_count
+    return {
+        'product': product,
+        'image_url': product.image.url if product.image else '',
+        'short_title': product.title,
+        'brand': product.brand.title if product.brand else '',
+        'price': product.price,
+        'colors': [feature.value for feature in product.card_colors],
+        'rating': calculate_card_rating(likes_count, unlikes_count),
+        'comments_count': product.card_comments_count,
+        'likes_count': likes_count,
+        'unlikes_count': unlikes_count,
+    }
+
+
+def load_product_cards(products, limit=None):
+    """
+    بارگذاری کارت‌های محصول با تعداد ثابت کوئری، مستقل از تعداد کارت‌ها.
+
+    ورودی می‌تواند یک QuerySet (ترتیب و annotate های آن حفظ می‌شود) یا
+    هر iterable از محصولات باشد؛ در حالت دوم محصولات با یک کوئری دوباره
+    خوانده می‌شوند و ترتیب ورودی حفظ می‌شود.
+    """
+    ordered_ids = None
+    if isinstance(products, QuerySet) and not products.query.is_sliced:
+        queryset = products
+    else:
+        ordered_ids = [product.pk for product in products]
+        if not ordered_ids:
+            return []
+        queryset = Product.objects.filter(pk__in=ordered_ids)
+
+    queryset = annotate_product_cards(queryset)
+    if limit is not None:
+        queryset = queryset[:limit]
+
+    loaded = list(queryset)
+    if ordered_ids is not None:
+        by_id = {product.pk: product for product in loaded}
+        loaded = [by_id[pk] for pk in ordered_ids if pk in by_id]
+
+    return [build_product_card(product) for product in loaded]
@@ -0,0 +1,48 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .facets import invalidate_facets
+from .models import Product, ProductFeature
+
+
+def _invalidate_product_facets(product_id, brand_ids):
+    category_ids = Product.categories.through.objects.filter(
+        product_id=product_id
+    ).values_list('category_id', flat=True)
+    invalidate_facets(category_ids=list(category_ids), brand_ids=brand_ids)
+
+
+@receiver(pre_save, sender=Product)
+def remember_previous_brand(sender, instance, **kwargs):
+    instance._facet_previous_brand_id = None
+    if instance.pk:
+        instance._facet_previous_brand_id = (
+            Product.objects.filter(pk=instance.pk).values_list('brand_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Product)
+@receiver(pre_delete, sender=Product)
+def invalidate_product_facets(sender, instance, **kwargs):
+    brand_ids = {instance.brand_id, getattr(instance, '_facet_previous_brand_id', None)}
+    _invalidate_product_facets(instance.pk, brand_ids)
+
+
+@receiver(m2m_changed, sender=Product.categories.through)
+def invalidate_category_facets(sender, instance, action, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if isinstance(instance, Product):
+        if action == 'pre_clear':
+            pk_set = instance.categories.values_list('pk', flat=True)
+        invalidate_facets(category_ids=list(pk_set or ()), brand_ids=[instance.brand_id])
+    else:
+        # تغییر از سمت دسته‌بندی (category.products.add/remove)
+        invalidate_facets(category_ids=[instance.pk])
+
+
+@receiver(post_save, sender=ProductFeature)
+@receiver(post_delete, sender=ProductFeature)
+def invalidate_feature_facets(sender, instance, **kwargs):
+    brand_id = Product.objects.filter(pk=instance.product_id).values_list('brand_id', flat=True).first()
+    _invalidate_product_facets(instance.product_id, [brand_id])
@@ -5,8 +5,10 @@ from django.db.models import Q,Count,Min,Max
 from django.core.paginator import Paginator
 from .filters import ProductFilter
 from django.db.models import Sum
+from apps.main.fragment_cache import cache_fragment
 
 
+@cache_fragment('product:category_group')
 def category_group_view(request):
     # همه دسته‌بندی‌ها همراه با شمارش محصولات
     categories = (
@@ -20,46 +22,17 @@ def category_group_view(request):
 
 from django.db.models import Count, Case, When, F, Avg, FloatField
 from .models import Product, Comment, LikeOrUnlike
+from .product_cards import load_product_cards
 
+@cache_fragment('product:recently')
 def latest_products_view(request):
     """
     Fetches the 20 latest products with their calculated ratings and available colors.
     """
-    # Use Prefetch to optimize database queries for related data
-    products = Product.objects.filter(isActive=True).order_by('-createAt')[:20]
-
-    product_list = []
-    for product in products:
-
-        likes_count = LikeOrUnlike.objects.filter(product=product, like=True).count()
-        unlikes_count = LikeOrUnlike.objects.filter(product=product, unlike=True).count()
-        total_votes = likes_count + unlikes_count
-
-        comments = Comment.objects.filter(product=product, isActive=True)
-        comments_count = comments.count()
-
-
-        if total_votes > 0:
-            rating = 4 + (likes_count - unlikes_count) / (total_votes * 10)
-            rating = max(3.5, min(rating, 5.0)) # Clamp between 3.5 and 5.0
-        else:
-            rating = 4.0
-        colors = product.features_value.filter(feature__title='رنگ').values_list('value', flat=True)
-
-        product_data = {
-            'product': product,
-            'image_url': product.image.url if product.image else '',
-            'short_title': product.title,
-            'brand': product.brand.title,
-            'price': product.price,
-            'colors': colors,
-            'rating': round(rating, 1),
-            'comments_count': comments_count,
-        }
-        product_list.append(product_data)
+    products = Product.objects.filter(isActive=True).order_by('-createAt')
 
     context = {
-        'products': product_list,
+        'products': load_product_cards(products, limit=20),
     }
     return render(request, 'product_app/recently_product.html', context)
 
@@ -68,6 +41,7 @@ def latest_products_view(request):
 
 
 
+@cache_fragment('product:brands')
 def top_brands_view(request):
     """
     Fetches top brands sorted by the number of active products.
@@ -308,6 +282,7 @@ def get_comments_ajax(request, product_slug):
 # -------------------------- shop ------------------------------
 
 
+@cache_fragment('product:best_selling_products_view')
 def best_selling_products_view(request):
     """
     نمایش پرفروش‌ترین محصولات بر اساس تعداد فروش
@@ -319,37 +294,11 @@ def best_selling_products_view(request):
         total_sold=Sum('orderItems__qty')
     ).filter(
         total_sold__gt=0
-    ).order_by('-total_sold')[:20]
-
-    product_list = []
-    for product in best_selling_products:
-        likes_count = LikeOrUnlike.objects.filter(product=product, like=True).count()
-        unlikes_count = LikeOrUnlike.objects.filter(product=product, unlike=True).count()
-        total_votes = likes_count + unlikes_count
-
-        comments = Comment.objects.filter(product=product, isActive=True)
-        comments_count = comments.count()
+    ).order_by('-total_sold')
 
-        if total_votes > 0:
-            rating = 4 + (likes_count - unlikes_count) / (total_votes * 10)
-            rating = max(3.5, min(rating, 5.0))  # Clamp between 3.5 and 5.0
-        else:
-            rating = 4.0
-
-        colors = product.features_value.filter(feature__title='رنگ').values_list('value', flat=True)
-
-        product_data = {
-            'product': product,
-            'image_url': product.image.url if product.image else '',
-            'short_title': product.title,
-            'brand': product.brand.title,
-            'price': product.price,
-            'colors': colors,
-            'rating': round(rating, 1),
-            'comments_count': comments_count,
-            'total_sold': product.total_sold,  # تعداد فروش
-        }
-        product_list.append(product_data)
+    product_list = load_product_cards(best_selling_products, limit=20)
+    for product_data in product_list:
+        product_data['total_sold'] = product_data['product'].total_sold  # تعداد فروش
 
     context = {
         'products': product_list,
@@ -371,86 +320,86 @@ def get_products_filter(request, *args, **kwargs):
         'groups': products_group
     })
 
-def show_brand_products(request, *args, **kwargs):
-    """نمایش محصولات مربوط به یک برند خاص با فیلتر، مرتب‌سازی و پیجینیشن"""
-    slug = kwargs['slug']
-    brand = get_object_or_404(Brand, slug=slug, isActive=True)
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from .pagination import keyset_page, sort_products
+from .product_cards import annotate_product_cards
 
-    # دریافت شماره صفحه از درخواست
-    page_number = request.GET.get('page', 1)
 
-    # کوئری پایه
-    products = Product.objects.filter(
-        isActive=True,
-        brand=brand
-    ).select_related('brand').prefetch_related(
-        'features_value',
-        'features_value__filterValue'
-    )
+def annotate_shop_cards(products):
+    """
+    کارت‌های صفحه فروشگاه و برند: تعداد نظرات، میانگین امتیاز و رنگ‌ها در
+    همان کوئری صفحه تا تعداد کوئری به تعداد کارت‌ها وابسته نباشد.
 
-    # محدوده قیمت
-    result_price = products.aggregate(
-        max_price=Max('price'),
-        min_price=Min('price')
+    صفحه اول HTML و پاسخ Load More هر دو از همین کوئری استفاده می‌کنند.
+    """
+    ratings = (
+        Comment.objects.filter(product=OuterRef('pk'), isActive=True)
+        .order_by()
+        .values('product')
+        .annotate(average=Avg('rating'))
+        .values('average')
+    )
+    return annotate_product_cards(products).annotate(
+        card_avg_rating=Coalesce(Subquery(ratings, output_field=FloatField()), 0.0),
     )
 
-    # اعمال فیلترها
-    filter_obj = ProductFilter(request.GET, queryset=products)
-    products = filter_obj.qs
-
-    # فیلتر ویژگی‌ها
-    feature_filter = request.GET.getlist('feature')
-    if feature_filter:
-        products = products.filter(
-            features_value__filterValue__id__in=feature_filter
-        ).distinct()
-
-    # مرتب‌سازی
-    sort = request.GET.get('sort')
-    if sort == '1':
-        products = products.order_by('-createAt')
-    elif sort == '2':
-        products = products.order_by('-price')
-    elif sort == '3':
-        products = products.order_by('price')
-    elif sort == '4':
-        products = products.annotate(
-            total_sold=Sum('orders_details_product__qty')
-        ).order_by('-total_sold')
-    else:
-        products = products.order_by('-createAt')
-
-    # پیجینیشن
-    paginator = Paginator(products, 8)
-    page_obj = paginator.get_page(page_number)
 
-    # پاسخ AJAX برای Load More
-    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
-        products_data = []
-        for product in page_obj:
-            product_data = {
+def load_more_response(products, sort, cursor):
+    """پاسخ JSON دکمه Load More صفحه فروشگاه و برند؛ صفحه با cursor (پارامتر after) خوانده می‌شود"""
+    products = annotate_shop_cards(products)
+    page, next_cursor = keyset_page(products, sort, cursor)
+    return JsonResponse({
+        'products': [
+            {
                 'id': product.id,
                 'title': product.title,
                 'brand': product.brand.title,
                 'image_url': product.image.url if product.image else '',
                 'price': product.price,
-                'avg_rating': product.avg_rating,
-                'comments_count': product.comments.count(),
+                'avg_rating': round(product.card_avg_rating, 1),
+                'comments_count': product.card_comments_count,
                 'url': product.get_absolute_url(),
-                'colors': []
+                'colors': [
+                    {'value': feature.filterValue.value} for feature in product.card_colors if feature.filterValue
+                ],
             }
+            for product in page
+        ],
+        'has_next': next_cursor is not None,
+        'next_cursor': next_cursor,
+    })
 
-            for feature in product.features_value.all():
-                if feature.feature.title == "رنگ" and feature.filterValue:
-                    product_data['colors'].append({'value': feature.filterValue.value})
 
-            products_data.append(product_data)
+def show_brand_products(request, *args, **kwargs):
+    """نمایش محصولات مربوط به یک برند خاص با فیلتر، مرتب‌سازی و پیجینیشن"""
+    slug = kwargs['slug']
+    brand = get_object_or_404(Brand, slug=slug, isActive=True)
 
-        return JsonResponse({
-            'products': products_data,
-            'has_next': page_obj.has_next(),
-            'next_page_number': page_obj.next_page_number() if page_obj.has_next() else None
-        })
+    # کوئری پایه
+    products = Product.objects.filter(
+        isActive=True,
+        brand=brand
+    ).select_related('brand')
+
+    # فیلتر ویژگی‌ها و قیمت از روی شاخص facet برند
+    selection = facet_selection_from_request(request)
+    selection['brand_ids'] = []
+    facets = get_facet_index('brand', brand.id).compute(**selection)
+    result_price = facets.price_range
+
+    filter_obj = ProductFilter(request.GET, queryset=products)
+    if has_facet_selection(selection):
+        products = products.filter(pk__in=facets.product_ids)
+
+    # مرتب‌سازی و صفحه‌بندی keyset (بدون COUNT و OFFSET)
+    products, sort = sort_products(products, request.GET.get('sort'))
+
+    # پاسخ AJAX برای Load More
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return load_more_response(products, sort, request.GET.get('after'))
+
+    page, next_cursor = keyset_page(annotate_shop_cards(products), sort)
 
     # متاتگ برند
     meta_context = {}
@@ -459,10 +408,12 @@ def show_brand_products(request, *args, **kwargs):
 
     # پاسخ HTML
     context = {
-        'products': page_obj,
+        'products': page,
+        'next_cursor': next_cursor,
         'result_price': result_price,
         'brand': brand,
         'filter': filter_obj,
+        'facets': facets,
         **meta_context,  # اضافه شدن متاتگ‌ها به context
     }
 
@@ -494,8 +445,16 @@ def get_feature_filter(request, *args, **kwargs):
     feature_list = group_product.features.prefetch_related('feature_values')
     feature_dict = {}
 
+    # تعداد محصولات هر مقدار با توجه به فیلترهای انتخاب‌شده فعلی
+    facets = get_facet_index('category', group_product.id).compute(
+        **facet_selection_from_request(request)
+    )
+
     for feature in feature_list:
-        feature_dict[feature] = feature.feature_values.all()
+        values = list(feature.feature_values.all())
+        for value in values:
+            value.product_count = facets.value_counts.get(value.id, 0)
+        feature_dict[feature] = values
 
     return render(request, 'product_app/partials/feature_list_filer.html', {
         'feature_dict': feature_dict
@@ -509,6 +468,7 @@ from django.http import JsonResponse
 from django.db.models import Max, Min, Sum
 from .models import Product, Category, MetaTag
 from .filters import ProductFilter
+from .facets import facet_selection_from_request, get_facet_index, has_facet_selection
 
 
 def show_by_filter(request, *args, **kwargs):
@@ -516,89 +476,29 @@ def show_by_filter(request, *args, **kwargs):
     slug = kwargs['slug']
     group = get_object_or_404(Category, slug=slug)
 
-    # دریافت شماره صفحه از درخواست
-    page_number = request.GET.get('page', 1)
-
     # کوئری پایه
     products = Product.objects.filter(
         isActive=True,
         categories=group
-    ).select_related('brand').prefetch_related(
-        'features_value',
-        'features_value__filterValue'
-    )
+    ).select_related('brand')
 
-    # محدوده قیمت
-    result_price = products.aggregate(
-        max_price=Max('price'),
-        min_price=Min('price')
-    )
+    # فیلتر ویژگی‌ها، برند و قیمت از روی شاخص facet دسته‌بندی
+    selection = facet_selection_from_request(request)
+    facets = get_facet_index('category', group.id).compute(**selection)
+    result_price = facets.price_range
 
-    # اعمال فیلترها
     filter_obj = ProductFilter(request.GET, queryset=products)
-    products = filter_obj.qs
-
-    # فیلتر ویژگی‌ها
-    feature_filter = request.GET.getlist('feature')
-    if feature_filter:
-        products = products.filter(
-            features_value__filterValue__id__in=feature_filter
-        ).distinct()
-
-    # فیلتر برند
-    brand_filter = request.GET.getlist('brand')
-    if brand_filter:
-        products = products.filter(brand__id__in=brand_filter)
-
-    # مرتب‌سازی
-    sort = request.GET.get('sort')
-    if sort == '1':
-        products = products.order_by('-createAt')
-    elif sort == '2':
-        products = products.order_by('-price')
-    elif sort == '3':
-        products = products.order_by('price')
-    elif sort == '4':
-        products = products.annotate(
-            total_sold=Sum('orders_details_product__qty')
-        ).order_by('-total_sold')
-    else:
-        products = products.order_by('-createAt')  # حالت پیش‌فرض
-
-    # پیجینیشن برای Load More
-    paginator = Paginator(products, 1)  # 8 محصول در هر صفحه
-    page_obj = paginator.get_page(page_number)
+    if has_facet_selection(selection):
+        products = products.filter(pk__in=facets.product_ids)
+
+    # مرتب‌سازی و صفحه‌بندی keyset (بدون COUNT و OFFSET)
+    products, sort = sort_products(products, request.GET.get('sort'))
 
     # اگر درخواست AJAX باشد
     if request.headers.get('x-requested-with') == 'XMLHttpRequest':
-        products_data = []
-        for product in page_obj:
-            product_data = {
-                'id': product.id,
-                'title': product.title,
-                'brand': product.brand.title,
-                'image_url': product.image.url,
-                'price': product.price,
-                'avg_rating': product.avg_rating,
-                'comments_count': product.comments.count(),
-                'url': product.get_absolute_url(),
-                'colors': []
-            }
+        return load_more_response(products, sort, request.GET.get('after'))
 
-            # اضافه کردن رنگ‌ها
-            for feature in product.features_value.all():
-                if feature.feature.title == "رنگ":
-                    product_data['colors'].append({
-                        'value': feature.filterValue.value
-                    })
-
-            products_data.append(product_data)
-
-        return JsonResponse({
-            'products': products_data,
-            'has_next': page_obj.has_next(),
-            'next_page_number': page_obj.next_page_number() if page_obj.has_next() else None
-        })
+    page, next_cursor = keyset_page(annotate_shop_cards(products), sort)
 
     # دریافت متاتگ دسته‌بندی
     try:
@@ -623,11 +523,13 @@ def show_by_filter(request, *args, **kwargs):
         }
 
     context = {
-        'products': page_obj,
+        'products': page,
+        'next_cursor': next_cursor,
         'result_price': result_price,
         'slug': slug,
         'group': group,
         'filter': filter_obj,
+        'facets': facets,
         **meta_context  # اضافه کردن متا به context قالب
     }
 
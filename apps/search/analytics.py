@@ -0,0 +1,122 @@
+# analytics.py
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import PopularSearch, SearchHistory
+
+logger = logging.getLogger(__name__)
+
+FLUSH_SIZE = getattr(settings, 'SEARCH_ANALYTICS_FLUSH_SIZE', 200)
+FLUSH_INTERVAL = getattr(settings, 'SEARCH_ANALYTICS_FLUSH_INTERVAL', 5)
+QUERY_MAX_LENGTH = SearchHistory._meta.get_field('query').max_length
+
+
+class SearchAnalyticsBuffer:
+    """
+    جمع‌آوری رویدادهای جستجو در حافظه پروسه و نوشتن دسته‌ای آن‌ها.
+
+    تاریخچه با bulk_create و شمارش جستجوهای پرتکرار با update مبتنی بر F()
+    نوشته می‌شود؛ تخلیه با رسیدن به FLUSH_SIZE رویداد، هر FLUSH_INTERVAL
+    ثانیه و هنگام خروج پروسه انجام می‌شود.
+    """
+
+    def __init__(self, flush_size=FLUSH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.history = []
+        self.counts = {}
+        self.timer = None
+
+    def __len__(self):
+        return len(self.history)
+
+    def record(self, query, user_id=None, session_key=None):
+        query = query[:QUERY_MAX_LENGTH]
+        now = timezone.now()
+        with self.lock:
+            self.history.append(SearchHistory(
+                user_id=user_id, session_key=session_key, query=query, created_at=now,
+            ))
+            key = query.lower()
+            _, count, _ = self.counts.get(key, (query, 0, now))
+            self.counts[key] = (query, count + 1, now)
+            should_flush = len(self.history) >= self.flush_size
+            if not should_flush:
+                self._start_timer()
+
+        if should_flush:
+            self.flush()
+
+    def _start_timer(self):
+        if self.timer is None and self.flush_interval:
+            self.timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            # اتصال دیتابیس مختص این thread است
+            connection.close()
+
+    def _take(self):
+        with self.lock:
+            history, counts = self.history, self.counts
+            self.history, self.counts = [], {}
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        return history, counts
+
+    def flush(self):
+        """نوشتن رویدادهای بافر در دیتابیس؛ تعداد رویدادهای نوشته‌شده را برمی‌گرداند"""
+        with self.flush_lock:
+            history, counts = self._take()
+            if not history:
+                return 0
+            try:
+                with transaction.atomic():
+                    SearchHistory.objects.bulk_create(history, batch_size=500)
+                    for query, count, last_searched in counts.values():
+                        self._increment_popular(query, count, last_searched)
+            except Exception:
+                logger.exception('search analytics flush failed (%s events dropped)', len(history))
+                return 0
+            return len(history)
+
+    @staticmethod
+    def _increment_popular(query, count, last_searched):
+        updated = PopularSearch.objects.filter(query__iexact=query).update(
+            count=F('count') + count, last_searched=last_searched,
+        )
+        if updated:
+            return
+        try:
+            with transaction.atomic():
+                PopularSearch.objects.create(query=query, count=count, last_searched=last_searched)
+        except IntegrityError:
+            # ردیف همزمان توسط پروسه دیگری ساخته شده است
+            PopularSearch.objects.filter(query__iexact=query).update(
+                count=F('count') + count, last_searched=last_searched,
+            )
+
+
+search_analytics = SearchAnalyticsBuffer()
+atexit.register(search_analytics.flush)
+
+
+def record_search(request, query):
+    """ثبت جستجوی کاربر یا مهمان (مثل قبل، مهمان بدون session ثبت نمی‌شود)"""
+    if request.user.is_authenticated:
+        search_analytics.record(query, user_id=request.user.pk)
+    elif request.session.session_key:
+        search_analytics.record(query, session_key=request.session.session_key)
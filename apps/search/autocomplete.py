@@ -0,0 +1,435 @@
+# autocomplete.py
+import heapq
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, Q
+from django.utils import timezone
+
+from apps.discount.discount_index import compute_discount_index
+from apps.main.cache_versions import bump_namespace, namespace_version
+from apps.product.models import Category, Product
+from .models import PopularSearch
+from .search_index import query_tokens, tokenize
+
+VERSION_NAMESPACE = 'search:autocomplete'
+POPULAR_REFRESH_SECONDS = 60
+# فقط پرتکرارترین عبارت‌ها در حافظه؛ جدول با هر عبارت جدید بزرگ‌تر می‌شود
+POPULAR_LOAD_LIMIT = getattr(settings, 'AUTOCOMPLETE_POPULAR_LIMIT', 5000)
+MAX_POPULAR_MATCHES = 500
+PRODUCT_LIMIT = 8
+CATEGORY_LIMIT = 6
+POPULAR_LIMIT = 5
+# تغییرات ثبت‌شده برای بقیه پروسه‌ها این مدت در کش می‌مانند (ثانیه)
+CHANGE_TIMEOUT = 86400
+# اگر پروسه بیش از این تعداد تغییر عقب باشد شاخص را از نو می‌سازد
+MAX_REPLAY_CHANGES = 1000
+# تغییری که شماره گرفته ولی در کش نیست تا این مدت منتظر نوشته شدن می‌ماند (ثانیه)
+CHANGE_GAP_SECONDS = 5
+
+
+class PrefixIndex:
+    """
+    آرایه مرتب (کلمه، شناسه) برای جستجوی پیشوندی با bisect.
+
+    کلمات و شناسه‌ها در دو لیست موازی نگه داشته می‌شوند تا حافظه کمتری
+    نسبت به لیست tuple مصرف شود؛ درج و حذف با bisect انجام می‌شود.
+    """
+
+    def __init__(self, entries=()):
+        pairs = sorted({(sys.intern(word), item_id) for word, item_id in entries})
+        self.words = [word for word, _ in pairs]
+        self.ids = [item_id for _, item_id in pairs]
+        self.keys = {}
+        for word, item_id in pairs:
+            self.keys.setdefault(item_id, []).append(word)
+
+    def __len__(self):
+        return len(self.words)
+
+    def add(self, item_id, words):
+        self.remove(item_id)
+        words = sorted(set(words))
+        for word in words:
+            position = bisect_left(self.words, word)
+            while position < len(self.words) and self.words[position] == word and self.ids[position] < item_id:
+                position += 1
+            self.words.insert(position, sys.intern(word))
+            self.ids.insert(position, item_id)
+        if words:
+            self.keys[item_id] = words
+
+    def remove(self, item_id):
+        for word in self.keys.pop(item_id, ()):
+            position = bisect_left(self.words, word)
+            while position < len(self.words) and self.words[position] == word:
+                if self.ids[position] == item_id:
+                    del self.words[position]
+                    del self.ids[position]
+                    break
+                position += 1
+
+    def match(self, prefix, exact=False):
+        """شناسه‌هایی که کلمه‌ای با این پیشوند (یا دقیقاً همین کلمه) دارند"""
+        start = bisect_left(self.words, prefix)
+        matched = set()
+        for position in range(start, len(self.words)):
+            word = self.words[position]
+            if word != prefix and (exact or not word.startswith(prefix)):
+                break
+            matched.add(self.ids[position])
+        return matched
+
+    def match_query(self, tokens):
+        """شناسه‌هایی که همه کلمات را دارند؛ کلمه آخر به صورت پیشوندی"""
+        result = None
+        for position, token in enumerate(tokens):
+            matched = self.match(token, exact=position < len(tokens) - 1)
+            result = matched if result is None else result & matched
+            if not result:
+                return set()
+        return result or set()
+
+
+def _product_words(product):
+    return tokenize(product['title']) + tokenize(product['brand'])
+
+
+def product_payload(product):
+    """داده پیشنهاد محصول از ستون‌های ذخیره‌شده (بدون کوئری اضافه)"""
+    return {
+        'id': product.id,
+        'title': product.title,
+        'slug': product.slug,
+        'price': product.price,
+        'final_price': product.finalPrice,
+        'image_url': product.image.url if product.image else '',
+        'brand': product.brand.title if product.brand else '',
+        'url': product.get_absolute_url(),
+        'has_discount': product.discountPercent > 0,
+        'discount_percentage': product.discountPercent,
+        'avg_rating': round(product.rating or 0, 1),
+        'refresh_at': product.discountRefreshAt,
+    }
+
+
+def category_payload(category, product_count):
+    return {
+        'id': category.id,
+        'title': category.title,
+        'slug': category.slug,
+        'image_url': category.image.url if category.image else '',
+        'url': category.get_absolute_url(),
+        'product_count': product_count,
+    }
+
+
+def _load_products(product_ids=None):
+    products = Product.objects.filter(isActive=True).select_related('brand').only(
+        'id', 'title', 'slug', 'price', 'image', 'isActive', 'createAt',
+        'finalPrice', 'discountPercent', 'discountRefreshAt', 'brand__title',
+    ).annotate(rating=Avg('comments__rating', filter=Q(comments__isActive=True)))
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+    payloads = [product_payload(product) for product in products]
+
+    # محصولاتی که سبد تخفیفشان شروع یا تمام شده ولی هنوز بازمحاسبه نشده‌اند
+    now = timezone.now()
+    stale = {
+        payload['id']: payload for payload in payloads
+        if payload['refresh_at'] is not None and payload['refresh_at'] <= now
+    }
+    if stale:
+        discounts = compute_discount_index(list(stale), now=now)
+        for product_id, payload in stale.items():
+            percent, refresh_at = discounts.get(product_id, (0, None))
+            payload.update({
+                'final_price': Product.calculate_final_price(payload['price'], percent),
+                'has_discount': percent > 0,
+                'discount_percentage': percent,
+                'refresh_at': refresh_at,
+            })
+    return payloads
+
+
+def _load_categories(category_ids=None):
+    categories = Category.objects.filter(isActive=True).annotate(
+        active_products=Count('products', filter=Q(products__isActive=True)),
+    )
+    if category_ids is not None:
+        categories = categories.filter(pk__in=category_ids)
+    return [category_payload(category, category.active_products) for category in categories]
+
+
+def _load_popular():
+    return list(PopularSearch.objects.order_by('-count').values_list('query', 'count')[:POPULAR_LOAD_LIMIT])
+
+
+class AutocompleteIndex:
+    """پاسخ پیشنهادهای جستجوی هدر از حافظه پروسه"""
+
+    def __init__(self, products=(), categories=(), popular=()):
+        self.lock = threading.RLock()
+        self.products = {product['id']: product for product in products}
+        self.title_keys = {
+            product_id: ' '.join(tokenize(product['title'])) for product_id, product in self.products.items()
+        }
+        self.product_index = PrefixIndex(
+            (word, product_id)
+            for product_id, product in self.products.items()
+            for word in _product_words(product)
+        )
+        self.categories = {category['id']: category for category in categories}
+        self.category_index = PrefixIndex(
+            (word, category_id)
+            for category_id, category in self.categories.items()
+            for word in tokenize(category['title'])
+        )
+        self.set_popular(popular)
+
+    @classmethod
+    def build(cls):
+        return cls(_load_products(), _load_categories(), _load_popular())
+
+    def set_popular(self, popular):
+        entries = sorted((query.lower(), query, count) for query, count in popular)
+        with self.lock:
+            self.popular_keys = [key for key, _, _ in entries]
+            self.popular = entries
+            self.popular_loaded_at = time.monotonic()
+
+    def update_products(self, payloads, removed_ids=()):
+        with self.lock:
+            for product_id in removed_ids:
+                self.products.pop(product_id, None)
+                self.title_keys.pop(product_id, None)
+                self.product_index.remove(product_id)
+            for product in payloads:
+                self.products[product['id']] = product
+                self.title_keys[product['id']] = ' '.join(tokenize(product['title']))
+                self.product_index.add(product['id'], _product_words(product))
+
+    def update_categories(self, payloads, removed_ids=()):
+        with self.lock:
+            for category_id in removed_ids:
+                self.categories.pop(category_id, None)
+                self.category_index.remove(category_id)
+            for category in payloads:
+                self.categories[category['id']] = category
+                self.category_index.add(category['id'], tokenize(category['title']))
+
+    def _popular_matches(self, query):
+        key = query.lower()
+        start = bisect_left(self.popular_keys, key)
+        matches = []
+        for _, original, count in self.popular[start:start + MAX_POPULAR_MATCHES]:
+            if not original.lower().startswith(key):
+                break
+            if original.lower() != key:
+                matches.append({'query': original, 'count': count})
+        matches.sort(key=lambda item: -item['count'])
+        return matches[:POPULAR_LIMIT]
+
+    def _rank_products(self, product_ids, tokens, limit):
+        """ابتدا عنوان‌هایی که با عبارت شروع می‌شوند، سپس شامل عبارت، سپس جدیدترین"""
+        joined = ' '.join(tokens)
+
+        def rank(product_id):
+            title = self.title_keys[product_id]
+            return (not title.startswith(joined), joined not in title, -product_id)
+
+        return heapq.nsmallest(limit, product_ids, key=rank)
+
+    def suggest(self, query):
+        """
+        پیشنهادهای محصول، دسته‌بندی و جستجوی پرتکرار برای عبارت تایپ‌شده.
+
+        خروجی همان ساختار پاسخ search_suggestions است به‌همراه شناسه محصولاتی
+        که زمان بازمحاسبه تخفیفشان گذشته و باید از دیتابیس تازه شوند.
+        """
+        tokens = query_tokens(query)
+        with self.lock:
+            product_ids = self.product_index.match_query(tokens) if tokens else set()
+            category_ids = self.category_index.match_query(tokens) if tokens else set()
+            ranked_products = self._rank_products(product_ids, tokens, PRODUCT_LIMIT)
+            products = [dict(self.products[product_id]) for product_id in ranked_products]
+            categories = [
+                dict(self.categories[category_id])
+                for category_id in sorted(category_ids)[:CATEGORY_LIMIT]
+            ]
+            popular = self._popular_matches(query)
+
+        now = timezone.now()
+        stale_ids = [
+            product['id'] for product in products
+            if product['refresh_at'] is not None and product['refresh_at'] <= now
+        ]
+        for product in products:
+            product.pop('refresh_at')
+
+        return {
+            'products': products,
+            'categories': categories,
+            'popular_searches': popular,
+            'total_products': len(product_ids),
+            'total_categories': len(category_ids),
+        }, stale_ids
+
+
+def _sequence_key(version):
+    return f'{VERSION_NAMESPACE}:{version}:sequence'
+
+
+def _change_key(version, sequence):
+    return f'{VERSION_NAMESPACE}:{version}:change:{sequence}'
+
+
+def _reload_products(index, product_ids):
+    payloads = _load_products(product_ids)
+    removed = product_ids - {product['id'] for product in payloads}
+    index.update_products(payloads, removed)
+
+
+def _reload_categories(index, category_ids):
+    payloads = _load_categories(category_ids)
+    removed = category_ids - {category['id'] for category in payloads}
+    index.update_categories(payloads, removed)
+
+
+_state = {'index': None, 'version': None, 'sequence': 0, 'gap_since': None}
+_state_lock = threading.Lock()
+
+
+def _replay(index, version, start, end):
+    """
+    اعمال تغییرات شماره start+1 تا end روی شاخص؛ فقط محصولات و دسته‌بندی‌های
+    همان تغییرات از دیتابیس خوانده می‌شوند. خروجی آخرین شماره اعمال‌شده یا
+    None اگر شاخص باید از نو ساخته شود.
+    """
+    if end - start > MAX_REPLAY_CHANGES:
+        return None
+    sequences = range(start + 1, end + 1)
+    stored = cache.get_many([_change_key(version, sequence) for sequence in sequences])
+    product_ids, category_ids = set(), set()
+    applied = start
+    for sequence in sequences:
+        change = stored.get(_change_key(version, sequence))
+        if change is None:
+            break
+        product_ids.update(change['products'])
+        category_ids.update(change['categories'])
+        applied = sequence
+
+    if applied < end:
+        # تغییر شماره گرفته ولی هنوز نوشته نشده، یا از کش بیرون رفته است
+        now = time.monotonic()
+        if _state['gap_since'] is None:
+            _state['gap_since'] = now
+        elif now - _state['gap_since'] > CHANGE_GAP_SECONDS:
+            return None
+    else:
+        _state['gap_since'] = None
+
+    if product_ids:
+        _reload_products(index, product_ids)
+    if category_ids:
+        _reload_categories(index, category_ids)
+    return applied
+
+
+def _sync():
+    version = namespace_version(VERSION_NAMESPACE)
+    sequence = cache.get(_sequence_key(version), 0)
+    index = _state['index']
+    if index is not None and _state['version'] == version and _state['sequence'] <= sequence:
+        applied = _replay(index, version, _state['sequence'], sequence)
+        if applied is not None:
+            _state['sequence'] = applied
+            return
+    # شماره پیش از ساخت خوانده شده تا تغییرات حین ساخت در درخواست بعدی دوباره اعمال شوند
+    _state.update(index=AutocompleteIndex.build(), version=version, sequence=sequence, gap_since=None)
+
+
+def get_autocomplete_index():
+    """
+    شاخص پروسه جاری.
+
+    هر تغییر محصول یا دسته‌بندی با یک شماره ترتیبی در کش ثبت می‌شود؛ پروسه‌ای
+    که عقب است فقط شناسه‌های همان تغییرات را دوباره می‌خواند. شاخص فقط وقتی
+    از نو ساخته می‌شود که نسخه فضای نام عوض شده باشد (مثلاً بعد از
+    bulk_create) یا تغییرات لازم دیگر در کش نباشند.
+    """
+    version = namespace_version(VERSION_NAMESPACE)
+    sequence = cache.get(_sequence_key(version), 0)
+    index = _state['index']
+    if index is None or _state['version'] != version or _state['sequence'] != sequence:
+        with _state_lock:
+            _sync()
+        index = _state['index']
+    elif time.monotonic() - index.popular_loaded_at > POPULAR_REFRESH_SECONDS:
+        # شمارش‌ها با بافر analytics و بدون signal به‌روز می‌شوند
+        index.set_popular(_load_popular())
+    return index
+
+
+def _publish(products=(), categories=()):
+    """ثبت شناسه‌های تغییرکرده برای بقیه پروسه‌ها؛ خروجی (نسخه، شماره تغییر)"""
+    version = namespace_version(VERSION_NAMESPACE)
+    key = _sequence_key(version)
+    cache.add(key, 0, None)
+    try:
+        sequence = cache.incr(key)
+    except ValueError:
+        # شمارنده بین add و incr از کش حذف شد؛ همه پروسه‌ها از نو می‌سازند
+        bump_namespace(VERSION_NAMESPACE)
+        return None
+    cache.set(
+        _change_key(version, sequence),
+        {'products': list(products), 'categories': list(categories)},
+        CHANGE_TIMEOUT,
+    )
+    return version, sequence
+
+
+def _apply_locally(published, reload):
+    """اعمال فوری تغییر روی شاخص همین پروسه اگر تغییر بعدی در ترتیب باشد"""
+    if published is None:
+        return
+    version, sequence = published
+    with _state_lock:
+        index = _state['index']
+        if index is not None and _state['version'] == version and _state['sequence'] == sequence - 1:
+            reload(index)
+            _state['sequence'] = sequence
+    # در غیر این صورت تغییر در درخواست بعدی همراه بقیه تغییرات اعمال می‌شود
+
+
+def refresh_products(product_ids):
+    product_ids = set(product_ids)
+    if not product_ids:
+        return
+    published = _publish(products=product_ids)
+    _apply_locally(published, lambda index: _reload_products(index, product_ids))
+
+
+def refresh_categories(category_ids):
+    category_ids = set(category_ids)
+    if not category_ids:
+        return
+    published = _publish(categories=category_ids)
+    _apply_locally(published, lambda index: _reload_categories(index, category_ids))
+
+
+def suggest(query):
+    index = get_autocomplete_index()
+    response_data, stale_ids = index.suggest(query)
+    if stale_ids:
+        # سبد تخفیف شروع یا تمام شده؛ هر پروسه با همان زمان refresh_at خودش
+        # همین محصولات را تازه می‌کند، پس تغییری برای بقیه ثبت نمی‌شود
+        _reload_products(index, set(stale_ids))
+        response_data, _ = index.suggest(query)
+    return response_data
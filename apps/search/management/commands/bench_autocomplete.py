@@ -0,0 +1,85 @@
+import random
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from apps.search.autocomplete import AutocompleteIndex
+
+WORDS = [
+    'یخچال', 'فریزر', 'ساید', 'بای', 'لباسشویی', 'ظرفشویی', 'تلویزیون', 'گوشی', 'گلکسی', 'مانیتور',
+    'هوشمند', 'اینچ', 'فوت', 'نقره‌ای', 'مشکی', 'سفید', 'مدل', 'سری', 'پلاس', 'الترا', 'کیلویی',
+]
+BRANDS = ['سامسونگ', 'ال جی', 'اسنوا', 'دوو', 'بوش', 'پاناسونیک', 'سونی', 'شیائومی']
+
+
+class Command(BaseCommand):
+    help = 'زمان ساخت، حافظه مصرفی و زمان پاسخ شاخص پیشنهاد جستجو روی داده مصنوعی (بدون دیتابیس)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=50000)
+        parser.add_argument('--categories', type=int, default=200)
+        parser.add_argument('--popular', type=int, default=20000)
+        parser.add_argument('--queries', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        # حافظه کل (داده‌های پیشنهاد + آرایه‌های پیشوندی) همان‌طور که در پروسه وب نگه داشته می‌شود
+        tracemalloc.start()
+        products = [
+            {
+                'id': product_id,
+                'title': ' '.join(rnd.sample(WORDS, 4) + [f'{rnd.choice("ABCDEFGHKMQRSTUW")}{rnd.randrange(10, 9999)}']),
+                'slug': f'product-{product_id}',
+                'price': rnd.randrange(1_000_000, 90_000_000),
+                'final_price': 0,
+                'image_url': f'/media/images/product/{product_id}.jpg',
+                'brand': rnd.choice(BRANDS),
+                'url': f'/product/product-{product_id}/',
+                'has_discount': False,
+                'discount_percentage': 0,
+                'avg_rating': 0,
+                'refresh_at': None,
+            }
+            for product_id in range(1, options['products'] + 1)
+        ]
+        categories = [
+            {'id': category_id, 'title': ' '.join(rnd.sample(WORDS, 2)), 'slug': f'category-{category_id}',
+             'image_url': '', 'url': f'/product/category/category-{category_id}/', 'product_count': 0}
+            for category_id in range(1, options['categories'] + 1)
+        ]
+        popular = [(' '.join(rnd.sample(WORDS, rnd.randint(1, 3))) + f' {index}', rnd.randrange(1, 5000))
+                   for index in range(options['popular'])]
+
+        index = AutocompleteIndex(products, categories, popular)
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # زمان ساخت بدون tracemalloc (که ساخت را کند می‌کند) اندازه‌گیری می‌شود
+        del index
+        started = time.perf_counter()
+        index = AutocompleteIndex(products, categories, popular)
+        build_seconds = time.perf_counter() - started
+
+        queries = []
+        for _ in range(options['queries']):
+            word = rnd.choice(WORDS + BRANDS)
+            prefix = word[:rnd.randint(2, len(word))]
+            queries.append(prefix if rnd.random() < 0.6 else f'{rnd.choice(WORDS)} {prefix}')
+
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            index.suggest(query)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+
+        self.stdout.write(
+            f'products={len(products)} prefix entries={len(index.product_index)} '
+            f'build={build_seconds:.2f}s memory={memory / 1024 / 1024:.1f}MB'
+        )
+        self.stdout.write(
+            f'suggest p50={timings[len(timings) // 2]:.2f}ms '
+            f'p95={timings[int(len(timings) * 0.95) - 1]:.2f}ms max={timings[-1]:.2f}ms'
+        )
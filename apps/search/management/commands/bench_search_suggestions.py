@@ -0,0 +1,91 @@
+import random
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from django.utils import timezone
+
+from apps.search.analytics import SearchAnalyticsBuffer, search_analytics
+from apps.search.models import PopularSearch, SearchHistory
+from apps.search.views import search_suggestions
+
+
+def legacy_record_search(request, query):
+    """مسیر قدیمی: نوشتن همزمان تاریخچه و read-modify-write شمارش (فقط برای مقایسه)"""
+    session_key = request.session.session_key
+    if session_key:
+        SearchHistory.objects.create(session_key=session_key, query=query)
+    popular_search, created = PopularSearch.objects.get_or_create(
+        query__iexact=query,
+        defaults={'query': query, 'count': 1}
+    )
+    if not created:
+        popular_search.count += 1
+        popular_search.last_searched = timezone.now()
+        popular_search.save()
+
+
+class Command(BaseCommand):
+    help = 'مقایسه زمان پاسخ پیشنهادهای جستجو با مسیر نوشتن همزمان و بافر دسته‌ای'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        words = ['یخچال', 'سامسونگ', 'ساید', 'فریزر', 'لباسشویی', 'تلویزیون', 'گلکسی', 'مدل']
+        queries = [' '.join(rnd.sample(words, rnd.randint(1, 2)))[:rnd.randint(2, 14)] for _ in range(options['requests'])]
+
+        factory = RequestFactory()
+        session = SessionStore()
+        session.create()
+
+        def make_request(query):
+            request = factory.get('/search/suggestions/', {'q': query})
+            request.user = AnonymousUser()
+            request.session = session
+            return request
+
+        # داده‌های نوشته‌شده در پایان rollback می‌شوند
+        with transaction.atomic():
+            legacy = self._timings(lambda query: legacy_record_search(make_request(query), query), queries)
+
+            buffer = SearchAnalyticsBuffer(flush_size=len(queries) + 1, flush_interval=0)
+            buffered = self._timings(
+                lambda query: buffer.record(query, session_key=session.session_key), queries,
+            )
+            started = time.perf_counter()
+            flushed = buffer.flush()
+            flush_ms = (time.perf_counter() - started) * 1000
+
+            # بافر سراسری در همین تراکنش تخلیه می‌شود تا با rollback حذف شود
+            search_analytics.flush_interval = 0
+            view = self._timings(lambda query: search_suggestions(make_request(query)), queries)
+            search_analytics.flush()
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'{"path":<24} {"p50 ms":>8} {"p95 ms":>8} {"max ms":>8}')
+        for title, timings in (
+            ('legacy sync write', legacy),
+            ('buffered record', buffered),
+            ('suggestions view', view),
+        ):
+            self.stdout.write(f'{title:<24} {self._percentile(timings, 50):>8.3f} '
+                              f'{self._percentile(timings, 95):>8.3f} {timings[-1]:>8.3f}')
+        self.stdout.write(f'flush of {flushed} buffered events: {flush_ms:.1f}ms')
+
+    def _timings(self, call, queries):
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            call(query)
+            timings.append((time.perf_counter() - started) * 1000)
+        return sorted(timings)
+
+    def _percentile(self, timings, percent):
+        return timings[max(0, int(len(timings) * percent / 100) - 1)]
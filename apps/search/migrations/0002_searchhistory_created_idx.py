@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='searchhistory',
+            index=models.Index(fields=['created_at'], name='searchhistory_created_idx'),
+        ),
+    ]
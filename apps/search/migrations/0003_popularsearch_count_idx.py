@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0002_searchhistory_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='popularsearch',
+            index=models.Index(fields=['-count'], name='popularsearch_count_idx'),
+        ),
+    ]
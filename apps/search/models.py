@@ -15,6 +15,9 @@ class SearchHistory(models.Model):
         verbose_name = "تاریخچه جستجو"
         verbose_name_plural = "تاریخچه جستجوها"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='searchhistory_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.query} - {self.user if self.user else 'مهمان'}"
@@ -31,6 +34,10 @@ class PopularSearch(models.Model):
         verbose_name = "جستجوی پرتکرار"
         verbose_name_plural = "جستجوهای پرتکرار"
         ordering = ['-count', '-last_searched']
+        indexes = [
+            # پرتکرارترین عبارت‌ها برای پیشنهادهای جستجو
+            models.Index(fields=['-count'], name='popularsearch_count_idx'),
+        ]
 
     def __str__(self):
         return f"{self.query} ({self.count})"
\ No newline at end of file
@@ -0,0 +1,409 @@
+# search_index.py
+import fcntl
+import math
+import os
+import pickle
+import re
+import tempfile
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from html import unescape
+
+from django.conf import settings
+from django.utils.html import strip_tags
+
+from apps.product.models import Product, ProductFeature
+
+SEARCH_INDEX_PATH = getattr(
+    settings, 'SEARCH_INDEX_PATH', os.path.join(settings.BASE_DIR, 'var', 'search_index.pickle')
+)
+INDEX_FORMAT_VERSION = 1
+# با بزرگ‌تر شدن journal از این اندازه، تغییرات در snapshot ادغام می‌شوند
+JOURNAL_COMPACT_BYTES = getattr(settings, 'SEARCH_INDEX_JOURNAL_BYTES', 4 * 1024 * 1024)
+
+# وزن هر فیلد در امتیازدهی (BM25 با tf وزن‌دار)
+FIELD_BOOSTS = {
+    'title': 3.0,
+    'brand': 2.0,
+    'features': 1.5,
+    'description': 1.0,
+}
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_PREFIX_EXPANSIONS = 50
+PREFIX_MATCH_FACTOR = 0.8
+
+ZWNJ = '\u200c'
+
+_CHAR_MAP = str.maketrans({
+    'ي': 'ی', 'ى': 'ی', 'ئ': 'ی',
+    'ك': 'ک',
+    'ة': 'ه', 'ۀ': 'ه',
+    'أ': 'ا', 'إ': 'ا', 'ٱ': 'ا',
+    'ؤ': 'و',
+    'ـ': None,  # کشیده
+    '\u200d': None, '\u200e': None, '\u200f': None, '\ufeff': None,
+    **{persian: str(digit) for digit, persian in enumerate('۰۱۲۳۴۵۶۷۸۹')},
+    **{arabic: str(digit) for digit, arabic in enumerate('٠١٢٣٤٥٦٧٨٩')},
+})
+_DIACRITICS_RE = re.compile('[\u064b-\u065f\u0670]')
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def normalize_text(text):
+    """یکسان‌سازی متن فارسی: حذف HTML، ی/ک عربی، اعراب، کشیده و تبدیل ارقام به لاتین"""
+    if not text:
+        return ''
+    text = str(text)
+    if '<' in text:
+        text = strip_tags(text)
+    if '&' in text:
+        text = unescape(text)
+    text = _DIACRITICS_RE.sub('', text.translate(_CHAR_MAP))
+    return text.lower()
+
+
+def tokenize(text):
+    """
+    توکن‌های متن نرمال‌شده.
+
+    کلمات دارای نیم‌فاصله هم به صورت اجزا و هم به صورت چسبیده نمایه می‌شوند
+    تا «می‌خواهم»، «می خواهم» و «میخواهم» همگی پیدا شوند.
+    """
+    tokens = []
+    for chunk in normalize_text(text).split():
+        parts = _TOKEN_RE.findall(chunk.replace(ZWNJ, ' '))
+        tokens.extend(parts)
+        if ZWNJ in chunk and len(parts) > 1:
+            tokens.append(''.join(parts))
+    return tokens
+
+
+def query_tokens(query):
+    """توکن‌های عبارت جستجو؛ نیم‌فاصله مثل فاصله در نظر گرفته می‌شود"""
+    return _TOKEN_RE.findall(normalize_text(query).replace(ZWNJ, ' '))
+
+
+class SearchIndex:
+    """
+    شاخص معکوس درون‌حافظه‌ای محصولات فعال.
+
+    postings: {توکن: {product_id: tf وزن‌دار}} و doc_terms نگاشت معکوس آن
+    برای حذف/به‌روزرسانی یک محصول؛ vocabulary مرتب برای تطبیق پیشوندی.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.doc_terms = {}
+        self.doc_lengths = {}
+        self.total_length = 0.0
+        self._vocabulary = None
+
+    @property
+    def size(self):
+        return len(self.doc_lengths)
+
+    @property
+    def vocabulary(self):
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        return self._vocabulary
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_vocabulary'] = None
+        return state
+
+    def add_document(self, product_id, fields):
+        self.remove_document(product_id)
+
+        terms = {}
+        for field_name, text in fields.items():
+            boost = FIELD_BOOSTS[field_name]
+            for token in tokenize(text):
+                terms[token] = terms.get(token, 0.0) + boost
+        if not terms:
+            return
+
+        for token, weight in terms.items():
+            self.postings.setdefault(token, {})[product_id] = weight
+        length = sum(terms.values())
+        self.doc_terms[product_id] = terms
+        self.doc_lengths[product_id] = length
+        self.total_length += length
+        self._vocabulary = None
+
+    def remove_document(self, product_id):
+        terms = self.doc_terms.pop(product_id, None)
+        if terms is None:
+            return
+        for token in terms:
+            postings = self.postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(product_id, None)
+            if not postings:
+                del self.postings[token]
+        self.total_length -= self.doc_lengths.pop(product_id)
+        self._vocabulary = None
+
+    def _expand_prefix(self, prefix):
+        vocabulary = self.vocabulary
+        start = bisect_left(vocabulary, prefix)
+        expansions = []
+        for token in vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not token.startswith(prefix):
+                break
+            expansions.append(token)
+        return expansions
+
+    def _term_scores(self, token, factor=1.0):
+        postings = self.postings.get(token)
+        if not postings:
+            return {}
+        average_length = self.total_length / self.size
+        idf = math.log(1 + (self.size - len(postings) + 0.5) / (len(postings) + 0.5))
+        scores = {}
+        for product_id, tf in postings.items():
+            norm = 1 - BM25_B + BM25_B * self.doc_lengths[product_id] / average_length
+            scores[product_id] = factor * idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+        return scores
+
+    def search(self, query, limit=None, prefix=True):
+        """
+        جستجوی محصولات؛ خروجی لیست (product_id, امتیاز) مرتب بر اساس ارتباط.
+
+        همه کلمات عبارت باید در محصول باشند؛ کلمه آخر در حالت prefix به صورت
+        پیشوندی هم تطبیق داده می‌شود (برای پیشنهادهای حین تایپ).
+        """
+        tokens = query_tokens(query)
+        if not tokens or not self.size:
+            return []
+
+        totals = None
+        for position, token in enumerate(tokens):
+            token_scores = self._term_scores(token)
+            if prefix and position == len(tokens) - 1:
+                for expansion in self._expand_prefix(token):
+                    if expansion == token:
+                        continue
+                    for product_id, score in self._term_scores(expansion, PREFIX_MATCH_FACTOR).items():
+                        if score > token_scores.get(product_id, 0):
+                            token_scores[product_id] = score
+
+            if totals is None:
+                totals = token_scores
+            else:
+                totals = {
+                    product_id: score + token_scores[product_id]
+                    for product_id, score in totals.items() if product_id in token_scores
+                }
+            if not totals:
+                return []
+
+        ranked = sorted(totals.items(), key=lambda item: (-item[1], -item[0]))
+        return ranked[:limit] if limit is not None else ranked
+
+
+def _product_documents(product_ids=None):
+    """فیلدهای قابل جستجوی محصولات فعال با دو کوئری: {product_id: fields}"""
+    products = Product.objects.filter(isActive=True)
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+
+    documents = {}
+    for product_id, title, brand_title, description in products.values_list(
+        'id', 'title', 'brand__title', 'description'
+    ):
+        documents[product_id] = {
+            'title': title,
+            'brand': brand_title,
+            'features': [],
+            'description': description,
+        }
+
+    features = ProductFeature.objects.filter(product_id__in=products.values('id'))
+    for product_id, value in features.values_list('product_id', 'value'):
+        if product_id in documents:
+            documents[product_id]['features'].append(value)
+
+    for fields in documents.values():
+        fields['features'] = ' '.join(fields['features'])
+    return documents
+
+
+def build_search_index():
+    index = SearchIndex()
+    for product_id, fields in _product_documents().items():
+        index.add_document(product_id, fields)
+    return index
+
+
+class _IndexHolder:
+    """
+    نگه‌داری شاخص در حافظه پروسه، هماهنگ با فایل‌های مشترک بین worker ها.
+
+    روی دیسک یک snapshot کامل و یک journal افزایشی کنار آن است: هر
+    به‌روزرسانی فقط سند محصولات تغییرکرده را به journal اضافه می‌کند و
+    پروسه‌ها تنها رکوردهای جدید journal را روی نسخه حافظه خود اعمال
+    می‌کنند. نوشتن با قفل انحصاری fcntl روی فایل lock بین پروسه‌ها
+    سریالی است و خواندن journal با قفل اشتراکی انجام می‌شود؛ وقتی journal
+    از JOURNAL_COMPACT_BYTES بزرگ‌تر شود در snapshot ادغام و خالی می‌شود.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.journal_path = f'{path}.journal'
+        self.lock_path = f'{path}.lock'
+        self.lock = threading.RLock()
+        self.index = None
+        self.mtime = None
+        self.journal_offset = 0
+
+    @staticmethod
+    def _stat(path, field):
+        try:
+            return getattr(os.stat(path), field)
+        except FileNotFoundError:
+            return None
+
+    def _file_mtime(self):
+        return self._stat(self.path, 'st_mtime_ns')
+
+    def _journal_size(self):
+        return self._stat(self.journal_path, 'st_size') or 0
+
+    @contextmanager
+    def _file_lock(self, exclusive):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self):
+        with open(self.path, 'rb') as index_file:
+            version, index = pickle.load(index_file)
+        if version != INDEX_FORMAT_VERSION:
+            raise ValueError('search index format changed')
+        return index
+
+    def _save_snapshot(self, index):
+        """نوشتن snapshot و خالی کردن journal؛ فقط با قفل انحصاری"""
+        directory = os.path.dirname(self.path)
+        # نوشتن در فایل موقت و جایگزینی اتمیک تا پروسه‌های دیگر فایل نیمه‌کاره نخوانند
+        descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as index_file:
+                pickle.dump((INDEX_FORMAT_VERSION, index), index_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        open(self.journal_path, 'wb').close()
+        self.index = index
+        self.mtime = self._file_mtime()
+        self.journal_offset = 0
+
+    def _apply_journal(self):
+        """اعمال رکوردهای journal بعد از journal_offset روی نسخه حافظه"""
+        try:
+            journal = open(self.journal_path, 'rb')
+        except FileNotFoundError:
+            return
+        with journal:
+            journal.seek(self.journal_offset)
+            while True:
+                try:
+                    documents, removed = pickle.load(journal)
+                except EOFError:
+                    break
+                for product_id, fields in documents.items():
+                    self.index.add_document(product_id, fields)
+                for product_id in removed:
+                    self.index.remove_document(product_id)
+                self.journal_offset = journal.tell()
+
+    def _is_current(self):
+        return (
+            self.index is not None
+            and self._file_mtime() == self.mtime
+            and self._journal_size() == self.journal_offset
+        )
+
+    def _refresh(self):
+        """هم‌زمان کردن نسخه حافظه با snapshot و journal؛ با یکی از دو قفل فایل"""
+        mtime = self._file_mtime()
+        if self.index is None or mtime != self.mtime or self._journal_size() < self.journal_offset:
+            self.index = self._load()
+            self.mtime = mtime
+            self.journal_offset = 0
+        self._apply_journal()
+
+    def get(self):
+        if self._is_current():
+            return self.index
+        with self.lock:
+            if self._is_current():
+                return self.index
+            try:
+                with self._file_lock(exclusive=False):
+                    self._refresh()
+                return self.index
+            except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+                pass
+            with self._file_lock(exclusive=True):
+                try:
+                    self._refresh()
+                except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+                    self._save_snapshot(build_search_index())
+            return self.index
+
+    def rebuild(self):
+        with self.lock, self._file_lock(exclusive=True):
+            self._save_snapshot(build_search_index())
+            return self.index
+
+    def update(self, product_ids):
+        """
+        افزودن سند تازه محصولات به journal.
+
+        اسناد داخل قفل انحصاری خوانده می‌شوند تا از دو به‌روزرسانی هم‌زمان
+        یک محصول، آخرین داده commit شده آخر نوشته شود.
+        """
+        self.get()
+        with self.lock, self._file_lock(exclusive=True):
+            self._refresh()
+            documents = _product_documents(product_ids)
+            removed = product_ids - documents.keys()
+            with open(self.journal_path, 'ab') as journal:
+                pickle.dump((documents, removed), journal, protocol=pickle.HIGHEST_PROTOCOL)
+            self._apply_journal()
+            if self.journal_offset > JOURNAL_COMPACT_BYTES:
+                self._save_snapshot(self.index)
+
+
+_holder = _IndexHolder(SEARCH_INDEX_PATH)
+
+
+def get_search_index():
+    return _holder.get()
+
+
+def rebuild_search_index():
+    return _holder.rebuild()
+
+
+def update_search_index(product_ids):
+    """نمایه مجدد محصولات مشخص (محصولات غیرفعال یا حذف‌شده از شاخص خارج می‌شوند)"""
+    product_ids = set(product_ids)
+    if product_ids:
+        _holder.update(product_ids)
+
+
+def search_product_ids(query, limit=None, prefix=True):
+    return [product_id for product_id, _ in get_search_index().search(query, limit=limit, prefix=prefix)]
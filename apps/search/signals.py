@@ -0,0 +1,71 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from apps.discount.discount_index import discount_index_updated
+from apps.product.models import Brand, Category, Product, ProductFeature
+from . import autocomplete
+from .search_index import update_search_index
+
+
+def _schedule_update(product_ids):
+    product_ids = set(product_ids)
+    if product_ids:
+        transaction.on_commit(lambda: update_search_index(product_ids))
+        transaction.on_commit(lambda: autocomplete.refresh_products(product_ids))
+
+
+def _schedule_category_update(category_ids):
+    category_ids = set(category_ids)
+    if category_ids:
+        transaction.on_commit(lambda: autocomplete.refresh_categories(category_ids))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def reindex_product(sender, instance, **kwargs):
+    _schedule_update([instance.pk])
+
+
+@receiver(post_save, sender=Product)
+@receiver(pre_delete, sender=Product)
+def reindex_product_categories(sender, instance, **kwargs):
+    # تعداد محصولات فعال دسته‌بندی‌ها در پیشنهادها (پیش از حذف ردیف‌های m2m)
+    _schedule_category_update(
+        Product.categories.through.objects.filter(product_id=instance.pk).values_list('category_id', flat=True)
+    )
+
+
+@receiver(post_save, sender=ProductFeature)
+@receiver(post_delete, sender=ProductFeature)
+def reindex_product_features(sender, instance, **kwargs):
+    transaction.on_commit(lambda: update_search_index([instance.product_id]))
+
+
+@receiver(post_save, sender=Brand)
+def reindex_brand_products(sender, instance, created, **kwargs):
+    if not created:
+        _schedule_update(instance.products.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def reindex_category(sender, instance, **kwargs):
+    _schedule_category_update([instance.pk])
+
+
+@receiver(m2m_changed, sender=Product.categories.through)
+def reindex_category_counts(sender, instance, action, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if isinstance(instance, Product):
+        if action == 'pre_clear':
+            pk_set = instance.categories.values_list('pk', flat=True)
+        _schedule_category_update(pk_set or ())
+    else:
+        _schedule_category_update([instance.pk])
+
+
+@receiver(discount_index_updated)
+def refresh_discounted_products(sender, product_ids, **kwargs):
+    autocomplete.refresh_products(product_ids)
@@ -1,11 +1,11 @@
 from django.http import JsonResponse
-from django.db.models import Q
-from django.utils import timezone
 from django.views.decorators.http import require_GET
 from django.views.decorators.csrf import csrf_exempt
 from django.shortcuts import render
 from apps.product.models import Product, Category
-from .models import SearchHistory, PopularSearch
+from .analytics import record_search
+from .autocomplete import suggest
+from .search_index import get_search_index
 
 @require_GET
 @csrf_exempt
@@ -26,93 +26,11 @@ def search_suggestions(request):
         return JsonResponse(response_data)
 
     try:
-        # ذخیره تاریخچه جستجو
-        if request.user.is_authenticated:
-            SearchHistory.objects.create(user=request.user, query=query)
-        else:
-            session_key = request.session.session_key
-            if session_key:
-                SearchHistory.objects.create(session_key=session_key, query=query)
-
-        # به‌روزرسانی جستجوهای پرتکرار
-        popular_search, created = PopularSearch.objects.get_or_create(
-            query__iexact=query,
-            defaults={'query': query, 'count': 1}
-        )
-        if not created:
-            popular_search.count += 1
-            popular_search.last_searched = timezone.now()
-            popular_search.save()
-
-        # جستجوی محصولات - استفاده از icontains برای جستجوی جزئی
-        products = Product.objects.filter(
-            Q(title__icontains=query) |
-            Q(description__icontains=query) |
-            Q(brand__title__icontains=query),
-            isActive=True
-        ).select_related('brand').prefetch_related('categories')[:8]
-
-        # جستجوی دسته‌بندی‌ها
-        categories = Category.objects.filter(
-            Q(title__icontains=query) |
-            Q(description__icontains=query),
-            isActive=True
-        )[:6]
-
-        # جستجوهای پرتکرار مرتبط
-        popular_searches = PopularSearch.objects.filter(
-            query__icontains=query
-        ).exclude(query__iexact=query).order_by('-count')[:5]
-
-        # آماده‌سازی داده محصولات
-        product_suggestions = []
-        for product in products:
-            try:
-                product_data = {
-                    'id': product.id,
-                    'title': product.title,
-                    'slug': product.slug,
-                    'price': product.price,
-                    'final_price': product.get_price_by_discount(),
-                    'image_url': product.image.url if product.image else '',
-                    'brand': product.brand.title if product.brand else '',
-                    'url': product.get_absolute_url(),
-                    'has_discount': product.get_discount_percentage() > 0,
-                    'discount_percentage': product.get_discount_percentage(),
-                    'avg_rating': getattr(product, 'avg_rating', 0)
-                }
-                product_suggestions.append(product_data)
-            except Exception as e:
-                print(f"Error processing product {product.id}: {e}")
-                continue
-
-        # آماده‌سازی داده دسته‌بندی‌ها
-        category_suggestions = []
-        for category in categories:
-            try:
-                category_data = {
-                    'id': category.id,
-                    'title': category.title,
-                    'slug': category.slug,
-                    'image_url': category.image.url if category.image else '',
-                    'url': category.get_absolute_url(),
-                    'product_count': category.products.filter(isActive=True).count()
-                }
-                category_suggestions.append(category_data)
-            except Exception as e:
-                print(f"Error processing category {category.id}: {e}")
-                continue
-
-        # آماده‌سازی جستجوهای پرتکرار
-        popular_suggestions = [{'query': ps.query, 'count': ps.count} for ps in popular_searches]
-
-        response_data.update({
-            'products': product_suggestions,
-            'categories': category_suggestions,
-            'popular_searches': popular_suggestions,
-            'total_products': products.count(),
-            'total_categories': categories.count()
-        })
+        # ثبت تاریخچه و شمارش جستجو در بافر (نوشتن دسته‌ای در پس‌زمینه)
+        record_search(request, query)
+
+        # پیشنهادها از شاخص پیشوندی حافظه (بدون کوئری در حالت عادی)
+        response_data.update(suggest(query))
 
     except Exception as e:
         print(f"Search error: {e}")
@@ -131,13 +49,11 @@ def search_results(request):
     products = Product.objects.filter(isActive=True)
     categories = Category.objects.filter(isActive=True)
 
+    relevance = {}
     if query:
-        products = products.filter(
-            Q(title__icontains=query) |
-            Q(description__icontains=query) |
-            Q(brand__title__icontains=query) |
-            Q(features_value__value__icontains=query)
-        ).distinct()
+        ranked = get_search_index().search(query)
+        relevance = {product_id: position for position, (product_id, _) in enumerate(ranked)}
+        products = products.filter(pk__in=list(relevance))
 
     if category_slug:
         products = products.filter(categories__slug=category_slug)
@@ -151,7 +67,9 @@ def search_results(request):
         products = products.order_by('-createAt')
     elif sort_by == 'popular':
         products = products.order_by('-createAt')  # می‌توانید منطق محبوبیت را اضافه کنید
-    else:  # relevance
+    elif relevance:
+        products = sorted(products.select_related('brand'), key=lambda product: relevance[product.pk])
+    else:  # relevance بدون عبارت جستجو
         products = products.order_by('-createAt')
 
     context = {
@@ -160,7 +78,7 @@ def search_results(request):
         'categories': categories,
         'selected_category': category_slug,
         'sort_by': sort_by,
-        'results_count': products.count()
+        'results_count': len(products) if isinstance(products, list) else products.count()
     }
 
     return render(request, 'search_app/search.html', context)
\ No newline at end of file
@@ -0,0 +1,23 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Task
+
+
+# =========================
+# Task Admin
+# =========================
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "attempts", "maxAttempts", "runAt", "createdAt", "finishedAt")
+    list_filter = ("status", "name")
+    search_fields = ("name", "lastError")
+    ordering = ("-createdAt",)
+    readonly_fields = ("lockedAt", "finishedAt", "lastError")
+    actions = ("retry",)
+
+    @admin.action(description="اجرای دوباره کارهای انتخاب‌شده")
+    def retry(self, request, queryset):
+        queryset.exclude(status=Task.RUNNING).update(
+            status=Task.PENDING, attempts=0, runAt=timezone.now(), finishedAt=None,
+        )
@@ -0,0 +1,24 @@
+from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_started
+from django.utils.module_loading import autodiscover_modules
+
+
+def start_periodic_tasks(sender, **kwargs):
+    if getattr(settings, 'TASKS_EAGER', False):
+        return
+    from .queue import get_broker
+    get_broker().start_periodic()
+
+
+class TasksConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.tasks'
+    verbose_name = 'کارهای پس‌زمینه'
+
+    def ready(self):
+        # ثبت task های ماژول tasks.py همه اپ‌ها تا worker نام آن‌ها را بشناسد
+        autodiscover_modules('tasks')
+        if getattr(settings, 'TASKS_BROKER', 'memory') == 'memory':
+            # task های دوره‌ای بدون run_tasks: با اولین درخواست هر پروسه وب شروع می‌شوند
+            request_started.connect(start_periodic_tasks, dispatch_uid='tasks.start_periodic')
@@ -0,0 +1,189 @@
+# brokers.py
+import logging
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+from .queue import registry
+
+logger = logging.getLogger(__name__)
+
+
+class Broker:
+    """پایه broker ها: enqueue را پیاده می‌کنند و زمان‌بندی دوره‌ای مشترک است"""
+
+    def enqueue(self, task, args, kwargs, countdown=0):
+        raise NotImplementedError
+
+    def schedule_periodic(self):
+        """
+        ثبت task های دوره‌ای (every) که زمانشان رسیده.
+
+        قفل cache.add با timeout برابر every مانع ثبت تکراری توسط چند worker
+        یا چند پروسه وب می‌شود (با کش مشترک)؛ خروجی نام task های ثبت‌شده.
+        """
+        scheduled = []
+        for task in registry.values():
+            if task.every and cache.add(f'tasks:periodic:{task.name}', 1, task.every):
+                self.enqueue(task, [], {})
+                scheduled.append(task.name)
+        return scheduled
+
+
+class MemoryBroker(Broker):
+    """
+    اجرای task ها در thread های همین پروسه (اجراکننده محلی، بدون worker).
+
+    task بعد از commit تراکنش جاری اجرا می‌شود تا ردیف‌های تازه را ببیند.
+    تلاش دوباره با threading.Timer زمان‌بندی می‌شود؛ کارهای در صف با خروج
+    پروسه از بین می‌روند، پس برای کارهای حیاتی broker دیتابیسی مناسب است.
+    task های دوره‌ای (every) در thread جدایی که با start_periodic شروع
+    می‌شود در صف همین پروسه گذاشته می‌شوند.
+    """
+
+    def __init__(self, workers=None, periodic_interval=None):
+        self.workers = workers or getattr(settings, 'TASKS_MEMORY_WORKERS', 2)
+        self.periodic_interval = periodic_interval or getattr(settings, 'TASKS_PERIODIC_INTERVAL', 60)
+        self.lock = threading.Lock()
+        self.executor = None
+        self.periodic_thread = None
+
+    def start_periodic(self):
+        """شروع thread زمان‌بندی task های دوره‌ای (یک بار برای هر پروسه)"""
+        if self.periodic_thread is not None:
+            return
+        with self.lock:
+            if self.periodic_thread is None:
+                self.periodic_thread = threading.Thread(target=self._periodic_loop, name='tasks-periodic', daemon=True)
+                self.periodic_thread.start()
+
+    def _periodic_loop(self):
+        while True:
+            # اولین بررسی بعد از یک بازه تا دستورات کوتاه‌مدت task دوره‌ای اجرا نکنند
+            time.sleep(self.periodic_interval)
+            try:
+                self.schedule_periodic()
+            except Exception:
+                logger.exception('scheduling periodic tasks failed')
+            finally:
+                connection.close()
+
+    def enqueue(self, task, args, kwargs, countdown=0):
+        transaction.on_commit(lambda: self._schedule(task, args, kwargs, countdown, 1))
+
+    def _schedule(self, task, args, kwargs, countdown, attempt):
+        if countdown:
+            timer = threading.Timer(countdown, self._submit, (task, args, kwargs, attempt))
+            timer.daemon = True
+            timer.start()
+        else:
+            self._submit(task, args, kwargs, attempt)
+
+    def _submit(self, task, args, kwargs, attempt):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix='tasks')
+        self.executor.submit(self._run, task, args, kwargs, attempt)
+
+    def _run(self, task, args, kwargs, attempt):
+        try:
+            task.func(*args, **kwargs)
+        except Exception:
+            if attempt < task.max_attempts:
+                logger.warning('task %s failed (attempt %s), retrying', task.name, attempt, exc_info=True)
+                self._schedule(task, args, kwargs, task.retry_delay(attempt), attempt + 1)
+            else:
+                logger.exception('task %s failed after %s attempts', task.name, attempt)
+        finally:
+            # اتصال دیتابیس مختص این thread است
+            connection.close()
+
+
+class DatabaseBroker(Broker):
+    """
+    صف کارها در جدول Task؛ اجرا با دستور run_tasks.
+
+    ثبت task داخل تراکنش درخواست انجام می‌شود و با rollback از بین می‌رود.
+    worker ها کار را با UPDATE شرطی روی status برمی‌دارند، پس چند worker
+    هم‌زمان یک کار را دوبار اجرا نمی‌کنند. worker برای کارهای در حال اجرا
+    lockedAt را با heartbeat تازه نگه می‌دارد؛ فقط کار worker متوقف‌شده با
+    requeue_stale دوباره اجرا می‌شود. اجرای دوباره (همین حالت یا تلاش
+    دوباره بعد از خطا) ممکن است، پس task ها باید تکرارپذیر (idempotent) باشند.
+    """
+
+    def enqueue(self, task, args, kwargs, countdown=0):
+        return Task.objects.create(
+            name=task.name,
+            args=args,
+            kwargs=kwargs,
+            maxAttempts=task.max_attempts,
+            runAt=timezone.now() + timedelta(seconds=countdown),
+        )
+
+    def claim(self, limit):
+        """برداشتن حداکثر limit کار سررسیدشده و علامت‌گذاری آن‌ها به‌عنوان در حال اجرا"""
+        if limit <= 0:
+            return []
+        now = timezone.now()
+        due = Task.objects.filter(status=Task.PENDING, runAt__lte=now).order_by('runAt', 'id')
+        claimed = []
+        for pk in due.values_list('id', flat=True)[:limit * 2]:
+            updated = Task.objects.filter(pk=pk, status=Task.PENDING).update(
+                status=Task.RUNNING, lockedAt=now, attempts=F('attempts') + 1,
+            )
+            if updated:
+                claimed.append(pk)
+                if len(claimed) == limit:
+                    break
+        return list(Task.objects.filter(pk__in=claimed).order_by('runAt', 'id'))
+
+    def execute(self, record):
+        """اجرای کار برداشته‌شده و ثبت نتیجه؛ خطا تا maxAttempts با backoff دوباره در صف می‌رود"""
+        task = registry.get(record.name)
+        try:
+            if task is None:
+                raise LookupError(f'task {record.name} is not registered')
+            task.func(*record.args, **record.kwargs)
+        except Exception:
+            error = traceback.format_exc()
+            if task is not None and record.attempts < record.maxAttempts:
+                logger.warning('task %s #%s failed (attempt %s), retrying', record.name, record.pk, record.attempts)
+                Task.objects.filter(pk=record.pk).update(
+                    status=Task.PENDING,
+                    runAt=timezone.now() + timedelta(seconds=task.retry_delay(record.attempts)),
+                    lastError=error,
+                )
+            else:
+                logger.error('task %s #%s failed after %s attempts', record.name, record.pk, record.attempts)
+                Task.objects.filter(pk=record.pk).update(
+                    status=Task.FAILED, lastError=error, finishedAt=timezone.now(),
+                )
+            return False
+        Task.objects.filter(pk=record.pk).update(status=Task.DONE, finishedAt=timezone.now())
+        return True
+
+    def heartbeat(self, pks):
+        """تازه کردن lockedAt کارهای در حال اجرای این worker تا stale حساب نشوند"""
+        if not pks:
+            return 0
+        return Task.objects.filter(pk__in=pks, status=Task.RUNNING).update(lockedAt=timezone.now())
+
+    def requeue_stale(self, seconds, exclude=()):
+        """
+        بازگرداندن کارهایی که worker آن‌ها بیش از seconds ثانیه heartbeat
+        نفرستاده (متوقف شده) به صف؛ کارهای exclude (در حال اجرای همین
+        worker) هرگز برگردانده نمی‌شوند.
+        """
+        threshold = timezone.now() - timedelta(seconds=seconds)
+        return Task.objects.filter(status=Task.RUNNING, lockedAt__lt=threshold).exclude(
+            pk__in=list(exclude),
+        ).update(status=Task.PENDING)
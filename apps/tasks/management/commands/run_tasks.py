@@ -0,0 +1,67 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.tasks.queue import get_broker
+
+
+class Command(BaseCommand):
+    help = (
+        'worker صف کارهای پس‌زمینه (broker دیتابیسی) با اجرای هم‌زمان محدود و تلاش دوباره؛ '
+        'کار worker متوقف‌شده دوباره اجرا می‌شود، پس task ها باید تکرارپذیر باشند'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help='حداکثر کارهای هم‌زمان')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='فاصله بررسی صف خالی به ثانیه')
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help='کار در حال اجرایی که این چند ثانیه heartbeat نداشته دوباره به صف برمی‌گردد')
+        parser.add_argument('--once', action='store_true', help='اجرای کارهای سررسیدشده و خروج')
+
+    def handle(self, *args, **options):
+        broker = get_broker('database')
+        concurrency = options['concurrency']
+        # future → شناسه کار در حال اجرا
+        running = {}
+        done = failed = 0
+        # heartbeat چند بار در هر بازه stale-after تا کار طولانی این worker برگردانده نشود
+        heartbeat_interval = max(1, options['stale_after'] / 4)
+        last_heartbeat = time.monotonic()
+        self.stdout.write(f'worker started (concurrency={concurrency})')
+        with ThreadPoolExecutor(concurrency, thread_name_prefix='tasks') as executor:
+            try:
+                while True:
+                    for name in broker.schedule_periodic():
+                        self.stdout.write(f'scheduled periodic task {name}')
+                    if running and time.monotonic() - last_heartbeat >= heartbeat_interval:
+                        broker.heartbeat(list(running.values()))
+                        last_heartbeat = time.monotonic()
+                    broker.requeue_stale(options['stale_after'], exclude=running.values())
+
+                    for future in [future for future in running if future.done()]:
+                        del running[future]
+                        if future.result():
+                            done += 1
+                        else:
+                            failed += 1
+
+                    records = broker.claim(concurrency - len(running))
+                    for record in records:
+                        running[executor.submit(self._execute, broker, record)] = record.pk
+
+                    if options['once'] and not records and not running:
+                        break
+                    if not records:
+                        time.sleep(options['poll_interval'] if not running else 0.05)
+            except KeyboardInterrupt:
+                self.stdout.write('waiting for running tasks...')
+        self.stdout.write(self.style.SUCCESS(f'{done} tasks done, {failed} failed'))
+
+    @staticmethod
+    def _execute(broker, record):
+        try:
+            return broker.execute(record)
+        finally:
+            connection.close()
@@ -0,0 +1,37 @@
+# Generated by Django 4.0.3 on 2026-10-17 21:00
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Task',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='نام task')),
+                ('args', models.JSONField(blank=True, default=list, verbose_name='آرگومان\u200cها')),
+                ('kwargs', models.JSONField(blank=True, default=dict, verbose_name='آرگومان\u200cهای نام\u200cدار')),
+                ('status', models.CharField(choices=[('pending', 'در انتظار'), ('running', 'در حال اجرا'), ('done', 'انجام\u200cشده'), ('failed', 'ناموفق')], default='pending', max_length=10, verbose_name='وضعیت')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='تعداد اجرا')),
+                ('maxAttempts', models.PositiveIntegerField(default=3, verbose_name='حداکثر اجرا')),
+                ('runAt', models.DateTimeField(default=django.utils.timezone.now, verbose_name='زمان اجرا')),
+                ('lockedAt', models.DateTimeField(blank=True, null=True, verbose_name='زمان شروع اجرا')),
+                ('lastError', models.TextField(blank=True, verbose_name='آخرین خطا')),
+                ('createdAt', models.DateTimeField(default=django.utils.timezone.now, verbose_name='تاریخ ایجاد')),
+                ('finishedAt', models.DateTimeField(blank=True, null=True, verbose_name='تاریخ پایان')),
+            ],
+            options={
+                'verbose_name': 'کار پس\u200cزمینه',
+                'verbose_name_plural': 'کارهای پس\u200cزمینه',
+                'indexes': [models.Index(fields=['status', 'runAt'], name='task_status_runat_idx')],
+            },
+        ),
+    ]
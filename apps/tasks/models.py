@@ -0,0 +1,41 @@
+from django.db import models
+from django.utils import timezone
+
+
+# =========================
+# Task
+# =========================
+class Task(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'در انتظار'),
+        (RUNNING, 'در حال اجرا'),
+        (DONE, 'انجام‌شده'),
+        (FAILED, 'ناموفق'),
+    )
+
+    name = models.CharField(max_length=200, verbose_name="نام task")
+    args = models.JSONField(default=list, blank=True, verbose_name="آرگومان‌ها")
+    kwargs = models.JSONField(default=dict, blank=True, verbose_name="آرگومان‌های نام‌دار")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name="وضعیت")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="تعداد اجرا")
+    maxAttempts = models.PositiveIntegerField(default=3, verbose_name="حداکثر اجرا")
+    runAt = models.DateTimeField(default=timezone.now, verbose_name="زمان اجرا")
+    lockedAt = models.DateTimeField(null=True, blank=True, verbose_name="زمان شروع اجرا")
+    lastError = models.TextField(blank=True, verbose_name="آخرین خطا")
+    createdAt = models.DateTimeField(default=timezone.now, verbose_name="تاریخ ایجاد")
+    finishedAt = models.DateTimeField(null=True, blank=True, verbose_name="تاریخ پایان")
+
+    class Meta:
+        verbose_name = "کار پس‌زمینه"
+        verbose_name_plural = "کارهای پس‌زمینه"
+        indexes = [
+            # انتخاب کارهای سررسیدشده توسط worker
+            models.Index(fields=['status', 'runAt'], name='task_status_runat_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
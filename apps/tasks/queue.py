@@ -0,0 +1,83 @@
+# queue.py
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# نام task → TaskFunction؛ با decorator task پر می‌شود
+registry = {}
+
+BROKERS = {
+    'memory': 'apps.tasks.brokers.MemoryBroker',
+    'database': 'apps.tasks.brokers.DatabaseBroker',
+}
+_brokers = {}
+
+
+def get_broker(name=None):
+    """broker تنظیم‌شده در TASKS_BROKER (پیش‌فرض memory)؛ یک نمونه برای هر پروسه"""
+    name = name or getattr(settings, 'TASKS_BROKER', 'memory')
+    if name not in _brokers:
+        _brokers[name] = import_string(BROKERS.get(name, name))()
+    return _brokers[name]
+
+
+class TaskFunction:
+    """
+    تابع ثبت‌شده با decorator task.
+
+    فراخوانی مستقیم همان تابع را اجرا می‌کند؛ delay و apply_async آن را به
+    broker می‌سپارند. با TASKS_EAGER (برای تست‌ها) همان لحظه و در همان
+    thread اجرا می‌شود و خطا به فراخواننده می‌رسد. آرگومان‌ها برای broker
+    دیتابیسی باید قابل تبدیل به JSON باشند (مثلاً id به‌جای شیء).
+    """
+
+    def __init__(self, func, name, max_attempts, backoff, every):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.every = every
+        self.__doc__ = func.__doc__
+
+    def __repr__(self):
+        return f'<task {self.name}>'
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return self.apply_async(args, kwargs)
+
+    def apply_async(self, args=(), kwargs=None, countdown=0):
+        kwargs = kwargs or {}
+        if getattr(settings, 'TASKS_EAGER', False):
+            return self.func(*args, **kwargs)
+        return get_broker().enqueue(self, list(args), kwargs, countdown)
+
+    def retry_delay(self, attempts):
+        """فاصله تا اجرای دوباره بعد از attempts اجرای ناموفق (backoff نمایی)"""
+        return self.backoff * 2 ** (attempts - 1)
+
+
+def task(func=None, *, name=None, max_attempts=None, backoff=None, every=None):
+    """
+    ثبت تابع به‌عنوان task.
+
+    max_attempts تعداد کل اجراها با احتساب تلاش‌های دوباره است و backoff
+    فاصله اولین تلاش دوباره به ثانیه. با every (ثانیه) task به‌صورت دوره‌ای
+    در صف گذاشته می‌شود: با broker دیتابیسی توسط run_tasks و با broker
+    حافظه در thread زمان‌بندی پروسه‌های وب.
+    """
+    def decorator(func):
+        task_function = TaskFunction(
+            func,
+            name or f'{func.__module__}.{func.__name__}',
+            max_attempts or getattr(settings, 'TASKS_MAX_ATTEMPTS', 3),
+            getattr(settings, 'TASKS_RETRY_BACKOFF', 10) if backoff is None else backoff,
+            every,
+        )
+        registry[task_function.name] = task_function
+        return task_function
+
+    if func is not None:
+        return decorator(func)
+    return decorator
@@ -0,0 +1,15 @@
+# tasks.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Task
+from .queue import task
+
+
+@task(every=3600)
+def purge_finished_tasks():
+    """حذف کارهای انجام‌شده قدیمی‌تر از TASKS_RESULT_DAYS روز؛ کارهای ناموفق برای بررسی می‌مانند"""
+    threshold = timezone.now() - timedelta(days=getattr(settings, 'TASKS_RESULT_DAYS', 7))
+    return Task.objects.filter(status=Task.DONE, finishedAt__lt=threshold).delete()[0]
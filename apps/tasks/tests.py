@@ -0,0 +1,159 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import QuerySet
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .brokers import DatabaseBroker
+from .models import Task
+from .queue import registry, task
+
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tasks-tests'}}
+
+calls = []
+
+
+@task(name='tests.record', backoff=10)
+def record(value):
+    calls.append(value)
+    return value
+
+
+@task(name='tests.fail', max_attempts=3, backoff=10)
+def fail():
+    raise RuntimeError('boom')
+
+
+class EagerTests(TestCase):
+    def setUp(self):
+        del calls[:]
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_runs_inline_and_returns_result(self):
+        self.assertEqual(record.delay(5), 5)
+        self.assertEqual(calls, [5])
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_propagates_exception(self):
+        with self.assertRaises(RuntimeError):
+            fail.delay()
+
+
+class DatabaseBrokerTests(TestCase):
+    def setUp(self):
+        del calls[:]
+        self.broker = DatabaseBroker()
+
+    def test_claim_hands_each_row_to_one_claimer(self):
+        for value in range(5):
+            self.broker.enqueue(record, [value], {})
+        first = self.broker.claim(3)
+        second = DatabaseBroker().claim(3)
+        first_ids = {row.pk for row in first}
+        second_ids = {row.pk for row in second}
+        self.assertEqual((len(first_ids), len(second_ids)), (3, 2))
+        self.assertFalse(first_ids & second_ids)
+        self.assertEqual(DatabaseBroker().claim(3), [])
+        self.assertEqual(Task.objects.filter(status=Task.RUNNING, attempts=1).count(), 5)
+
+    def test_claim_skips_row_taken_after_it_was_selected(self):
+        self.broker.enqueue(record, [1], {})
+        values_list = QuerySet.values_list
+
+        def select_then_lose_race(queryset, *args, **kwargs):
+            ids = list(values_list(queryset, *args, **kwargs))
+            # worker دیگری بین انتخاب ردیف و UPDATE شرطی آن را برداشته است
+            Task.objects.filter(pk__in=ids).update(status=Task.RUNNING, attempts=1)
+            return ids
+
+        with mock.patch.object(QuerySet, 'values_list', select_then_lose_race):
+            self.assertEqual(self.broker.claim(1), [])
+        self.assertEqual(Task.objects.get().attempts, 1)
+
+    def test_execute_retries_with_backoff_then_fails(self):
+        self.broker.enqueue(fail, [], {})
+        for attempt in (1, 2):
+            [row] = self.broker.claim(1)
+            self.assertEqual(row.attempts, attempt)
+            started = timezone.now()
+            self.assertFalse(self.broker.execute(row))
+            row.refresh_from_db()
+            self.assertEqual(row.status, Task.PENDING)
+            self.assertIn('RuntimeError: boom', row.lastError)
+            delay = (row.runAt - started).total_seconds()
+            self.assertAlmostEqual(delay, fail.retry_delay(attempt), delta=1)
+            # تا سررسید تلاش بعدی برداشته نمی‌شود
+            self.assertEqual(self.broker.claim(1), [])
+            Task.objects.filter(pk=row.pk).update(runAt=timezone.now())
+
+        [row] = self.broker.claim(1)
+        self.assertEqual(row.attempts, 3)
+        self.assertFalse(self.broker.execute(row))
+        row.refresh_from_db()
+        self.assertEqual(row.status, Task.FAILED)
+        self.assertIsNotNone(row.finishedAt)
+
+    def test_execute_success(self):
+        self.broker.enqueue(record, [7], {})
+        [row] = self.broker.claim(1)
+        self.assertTrue(self.broker.execute(row))
+        row.refresh_from_db()
+        self.assertEqual((row.status, calls), (Task.DONE, [7]))
+
+    def test_requeue_stale_skips_excluded_and_heartbeat_rows(self):
+        for value in range(3):
+            self.broker.enqueue(record, [value], {})
+        mine, heartbeat, crashed = self.broker.claim(3)
+        Task.objects.update(lockedAt=timezone.now() - timedelta(seconds=120))
+        self.broker.heartbeat([heartbeat.pk])
+        self.assertEqual(self.broker.requeue_stale(60, exclude=[mine.pk]), 1)
+        statuses = dict(Task.objects.values_list('pk', 'status'))
+        self.assertEqual(
+            [statuses[mine.pk], statuses[heartbeat.pk], statuses[crashed.pk]],
+            [Task.RUNNING, Task.RUNNING, Task.PENDING],
+        )
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SchedulePeriodicTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.periodic = task(name='tests.periodic', every=60)(lambda: None)
+        self.addCleanup(registry.pop, 'tests.periodic')
+
+    def test_enqueues_once_per_window(self):
+        broker = DatabaseBroker()
+        self.assertIn('tests.periodic', broker.schedule_periodic())
+        self.assertNotIn('tests.periodic', broker.schedule_periodic())
+        self.assertNotIn('tests.periodic', DatabaseBroker().schedule_periodic())
+        self.assertEqual(Task.objects.filter(name='tests.periodic').count(), 1)
+
+        # پایان بازه every: قفل کش منقضی شده است
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=timezone.now().timestamp() + 61):
+            self.assertIn('tests.periodic', broker.schedule_periodic())
+        self.assertEqual(Task.objects.filter(name='tests.periodic').count(), 2)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class RunTasksTests(TransactionTestCase):
+    def setUp(self):
+        del calls[:]
+        cache.clear()
+
+    def test_once_drains_due_tasks(self):
+        broker = DatabaseBroker()
+        for value in range(3):
+            broker.enqueue(record, [value], {})
+        later = broker.enqueue(record, ['later'], {}, countdown=3600)
+
+        call_command('run_tasks', once=True, concurrency=2, poll_interval=0.01, stdout=StringIO())
+
+        self.assertEqual(sorted(calls), [0, 1, 2])
+        self.assertFalse(Task.objects.filter(status__in=[Task.PENDING, Task.RUNNING]).exclude(pk=later.pk).exists())
+        later.refresh_from_db()
+        self.assertEqual(later.status, Task.PENDING)
@@ -2,7 +2,8 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
 
-from .models import CustomUser, UserSecurity, UserDevice
+from .models import BlockedIP, CustomUser, RequestLog, UserSecurity, UserDevice
+from . import rate_limit
 
 
 # =========================
@@ -51,3 +52,31 @@ class UserDeviceAdmin(admin.ModelAdmin):
     search_fields = ("user__mobileNumber", "deviceInfo", "ipAddress")
     list_filter = ("createdAt",)
     ordering = ("-createdAt",)
+
+
+
+# =========================
+# Rate Limit Admin
+# =========================
+@admin.register(BlockedIP)
+class BlockedIPAdmin(admin.ModelAdmin):
+    list_display = ("ip_address", "scope", "requests_count", "max_requests", "time_frame_seconds", "blocked_at", "expires_at", "is_active")
+    list_filter = ("is_active", "scope")
+    search_fields = ("ip_address", "reason")
+    ordering = ("-blocked_at",)
+    actions = ("unblock",)
+
+    @admin.action(description="رفع بلاک آی‌پی‌های انتخاب‌شده")
+    def unblock(self, request, queryset):
+        # بلاک فعال در کش است؛ غیرفعال کردن رکورد به‌تنهایی کافی نیست
+        blocks = set(queryset.values_list("ip_address", "scope", "time_frame_seconds"))
+        for ip, scope, time_frame_seconds in blocks:
+            rate_limit.unblock(ip, scope, time_frame_seconds)
+
+
+@admin.register(RequestLog)
+class RequestLogAdmin(admin.ModelAdmin):
+    list_display = ("ip_address", "scope", "timestamp")
+    list_filter = ("scope",)
+    search_fields = ("ip_address",)
+    ordering = ("-timestamp",)
@@ -0,0 +1,91 @@
+import time
+from datetime import timedelta
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.utils import timezone
+
+import utils
+from apps.user import rate_limit
+from apps.user.models import BlockedIP, RequestLog
+
+# هدف سربار محدودکننده برای هر درخواست
+TARGET_US = 100
+
+
+class Rollback(Exception):
+    pass
+
+
+def view(request):
+    return HttpResponse('ok')
+
+
+def legacy_hit(ip, max_requests, total_seconds):
+    """کوئری‌های نسخه قبلی rate_limit_ip برای هر درخواست"""
+    BlockedIP.objects.filter(ip_address=ip, is_active=True).first()
+    time_threshold = timezone.now() - timedelta(seconds=total_seconds)
+    RequestLog.objects.filter(ip_address=ip, timestamp__gte=time_threshold).count()
+    RequestLog.objects.create(ip_address=ip)
+
+
+class Command(BaseCommand):
+    help = 'سربار utils.rate_limit_ip برای هر درخواست (میکروثانیه) در مقایسه با view بدون محدودیت'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000)
+        parser.add_argument('--ips', type=int, default=500, help='تعداد IP متمایز')
+        parser.add_argument('--legacy', action='store_true', help='اندازه‌گیری نسخه دیتابیسی قبلی هم انجام شود')
+
+    def handle(self, *args, **options):
+        count, ip_count = options['requests'], options['ips']
+        factory = RequestFactory()
+        requests = [
+            factory.get('/', REMOTE_ADDR=f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}')
+            for i in (n % ip_count for n in range(count))
+        ]
+        # سقف بالا تا هیچ درخواستی بلاک نشود و مسیر عادی اندازه‌گیری شود
+        limited = utils.rate_limit_ip(count + 1, time_frame_minutes=1)(view)
+        caches[rate_limit.CACHE_ALIAS].clear()
+
+        bare_us = self._measure(view, requests)
+        limited_us = self._measure(limited, requests)
+        overhead = limited_us - bare_us
+        self.stdout.write(f"cache backend     {type(caches[rate_limit.CACHE_ALIAS]).__name__}")
+        self.stdout.write(f'bare view         {bare_us:8.1f} µs/request')
+        self.stdout.write(f'rate_limit_ip     {limited_us:8.1f} µs/request')
+        style = self.style.SUCCESS if overhead < TARGET_US else self.style.ERROR
+        self.stdout.write(style(f'overhead          {overhead:8.1f} µs/request (target < {TARGET_US})'))
+
+        if options['legacy']:
+            legacy_count = min(count, 2000)
+            try:
+                with transaction.atomic():
+                    started = time.perf_counter()
+                    for request in requests[:legacy_count]:
+                        legacy_hit(utils.get_client_ip(request), count + 1, 60)
+                    legacy_us = (time.perf_counter() - started) / legacy_count * 1e6
+                    raise Rollback
+            except Rollback:
+                pass
+            self.stdout.write(f'legacy (db)       {legacy_us:8.1f} µs/request overhead')
+
+        # بلاک شدن بعد از max_requests
+        caches[rate_limit.CACHE_ALIAS].clear()
+        strict = utils.rate_limit_ip(5, time_frame_seconds=60)(view)
+        statuses = [strict(requests[0]).status_code for _ in range(7)]
+        rate_limit.audit_buffer.records.clear()
+        caches[rate_limit.CACHE_ALIAS].clear()
+        self.stdout.write(f'statuses with max_requests=5: {statuses}')
+
+    @staticmethod
+    def _measure(func, requests):
+        for request in requests[:200]:
+            func(request)
+        started = time.perf_counter()
+        for request in requests:
+            func(request)
+        return (time.perf_counter() - started) / len(requests) * 1e6
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.user.models import BlockedIP, RequestLog
+
+
+class Command(BaseCommand):
+    help = 'حذف دسته‌ای RequestLog های قدیمی‌تر از --days روز و غیرفعال کردن بلاک‌های منقضی‌شده'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        threshold = timezone.now() - timedelta(days=options['days'])
+        old_logs = RequestLog.objects.filter(timestamp__lt=threshold)
+        deleted = 0
+        # حذف بر اساس pk در دسته‌های کوچک تا جدول بزرگ مدت طولانی قفل نشود
+        while True:
+            ids = list(old_logs.values_list('pk', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            deleted += RequestLog.objects.filter(pk__in=ids).delete()[0]
+
+        expired = BlockedIP.objects.filter(is_active=True, expires_at__lte=timezone.now()).update(is_active=False)
+        self.stdout.write(self.style.SUCCESS(
+            f'{deleted} request logs older than {options["days"]} days deleted; {expired} expired blocks deactivated'
+        ))
@@ -0,0 +1,48 @@
+# Generated by Django 4.0.3 on 2026-10-17 20:35
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ip_address', models.GenericIPAddressField(verbose_name='آی\u200cپی')),
+                ('scope', models.CharField(blank=True, max_length=100, verbose_name='بخش')),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now, verbose_name='زمان')),
+            ],
+            options={
+                'verbose_name': 'لاگ درخواست',
+                'verbose_name_plural': 'لاگ درخواست\u200cها',
+                'indexes': [models.Index(fields=['timestamp'], name='requestlog_timestamp_idx'), models.Index(fields=['ip_address', 'timestamp'], name='requestlog_ip_timestamp_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BlockedIP',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ip_address', models.GenericIPAddressField(verbose_name='آی\u200cپی')),
+                ('reason', models.CharField(max_length=255, verbose_name='دلیل')),
+                ('scope', models.CharField(blank=True, max_length=100, verbose_name='بخش محدودشده')),
+                ('max_requests', models.PositiveIntegerField(verbose_name='حداکثر درخواست مجاز')),
+                ('time_frame_seconds', models.PositiveIntegerField(verbose_name='بازه زمانی (ثانیه)')),
+                ('requests_count', models.PositiveIntegerField(verbose_name='تعداد درخواست\u200cها')),
+                ('blocked_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='زمان بلاک')),
+                ('expires_at', models.DateTimeField(verbose_name='پایان بلاک')),
+                ('is_active', models.BooleanField(default=True, verbose_name='فعال')),
+            ],
+            options={
+                'verbose_name': 'آی\u200cپی بلاک\u200cشده',
+                'verbose_name_plural': 'آی\u200cپی\u200cهای بلاک\u200cشده',
+                'indexes': [models.Index(fields=['ip_address', 'is_active'], name='blockedip_ip_active_idx')],
+            },
+        ),
+    ]
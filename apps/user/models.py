@@ -103,3 +103,51 @@ class UserDevice(models.Model):
 
     def __str__(self):
         return f"Device of {self.user.mobileNumber} - {self.deviceInfo}"
+
+
+# =========================
+# Rate Limit Audit
+# =========================
+# شمارنده‌ها و بلاک‌های فعال در کش هستند (apps.user.rate_limit)؛ این جدول‌ها
+# فقط برای گزارش و بررسی پنل مدیریت پر می‌شوند.
+class BlockedIP(models.Model):
+    ip_address = models.GenericIPAddressField(verbose_name="آی‌پی")
+    reason = models.CharField(max_length=255, verbose_name="دلیل")
+    scope = models.CharField(max_length=100, blank=True, verbose_name="بخش محدودشده")
+    max_requests = models.PositiveIntegerField(verbose_name="حداکثر درخواست مجاز")
+    time_frame_seconds = models.PositiveIntegerField(verbose_name="بازه زمانی (ثانیه)")
+    requests_count = models.PositiveIntegerField(verbose_name="تعداد درخواست‌ها")
+    blocked_at = models.DateTimeField(default=timezone.now, verbose_name="زمان بلاک")
+    expires_at = models.DateTimeField(verbose_name="پایان بلاک")
+    is_active = models.BooleanField(default=True, verbose_name="فعال")
+
+    class Meta:
+        verbose_name = "آی‌پی بلاک‌شده"
+        verbose_name_plural = "آی‌پی‌های بلاک‌شده"
+        indexes = [
+            models.Index(fields=['ip_address', 'is_active'], name='blockedip_ip_active_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.ip_address} ({self.reason})"
+
+    def is_block_expired(self):
+        return self.expires_at <= timezone.now()
+
+
+class RequestLog(models.Model):
+    ip_address = models.GenericIPAddressField(verbose_name="آی‌پی")
+    scope = models.CharField(max_length=100, blank=True, verbose_name="بخش")
+    timestamp = models.DateTimeField(default=timezone.now, verbose_name="زمان")
+
+    class Meta:
+        verbose_name = "لاگ درخواست"
+        verbose_name_plural = "لاگ درخواست‌ها"
+        indexes = [
+            # حذف دسته‌ای رکوردهای قدیمی (prune_request_log)
+            models.Index(fields=['timestamp'], name='requestlog_timestamp_idx'),
+            models.Index(fields=['ip_address', 'timestamp'], name='requestlog_ip_timestamp_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.ip_address} @ {self.timestamp}"
@@ -0,0 +1,117 @@
+# otp.py
+import hashlib
+import hmac
+
+from django.conf import settings
+from django.core.cache import caches
+
+import utils
+
+from .tasks import send_sms
+
+# کدهای در انتظار و شمارنده‌ها فقط در کش هستند؛ دیتابیس تنها بعد از تأیید موفق
+CACHE_ALIAS = getattr(settings, 'OTP_CACHE', 'tokens')
+CODE_LENGTH = getattr(settings, 'OTP_CODE_LENGTH', 5)
+CODE_TTL = getattr(settings, 'OTP_CODE_TTL', 120)
+MAX_VERIFY_ATTEMPTS = getattr(settings, 'OTP_MAX_VERIFY_ATTEMPTS', 5)
+# (حداکثر تعداد، بازه به ثانیه)
+SEND_LIMIT_PER_MOBILE = getattr(settings, 'OTP_SEND_LIMIT_PER_MOBILE', (5, 900))
+SEND_LIMIT_PER_IP = getattr(settings, 'OTP_SEND_LIMIT_PER_IP', (20, 3600))
+VERIFY_LIMIT_PER_IP = getattr(settings, 'OTP_VERIFY_LIMIT_PER_IP', (30, 3600))
+
+
+class OtpError(Exception):
+    message = 'خطا در بررسی کد تأیید'
+
+    def __init__(self, message=None):
+        super().__init__(message or self.message)
+        self.message = message or self.message
+
+
+class ThrottledError(OtpError):
+    message = 'تعداد درخواست‌ها بیش از حد مجاز است، کمی بعد دوباره تلاش کنید.'
+
+
+class ExpiredCodeError(OtpError):
+    message = '⏳ کد منقضی شده است، دوباره تلاش کنید.'
+
+
+class InvalidCodeError(OtpError):
+    message = '❌ کد تأیید اشتباه است.'
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _hash(mobile, code):
+    # کد خام در کش ذخیره نمی‌شود
+    return hmac.new(settings.SECRET_KEY.encode(), f'{mobile}:{code}'.encode(), hashlib.sha256).hexdigest()
+
+
+def _code_key(mobile):
+    return f'otp:code:{mobile}'
+
+
+def _attempts_key(mobile):
+    return f'otp:attempts:{mobile}'
+
+
+def _increment(key, timeout):
+    cache = _cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            return 1
+
+
+def _throttle(action, subject, limit):
+    max_count, period = limit
+    if subject and _increment(f'otp:{action}:{subject}', period) > max_count:
+        raise ThrottledError()
+
+
+def issue(mobile, ip=None):
+    """
+    ساخت کد جدید برای mobile و سپردن ارسال پیامک آن به task.
+
+    کد قبلی و شمارنده تلاش‌ها جایگزین می‌شوند؛ با عبور از سقف ارسال برای
+    شماره یا IP خطای ThrottledError. خروجی کد ساخته‌شده است.
+    """
+    _throttle('send-mobile', mobile, SEND_LIMIT_PER_MOBILE)
+    _throttle('send-ip', ip, SEND_LIMIT_PER_IP)
+    code = str(utils.create_random_code(CODE_LENGTH))
+    _cache().set_many({_code_key(mobile): _hash(mobile, code), _attempts_key(mobile): 0}, CODE_TTL)
+    send_sms.delay(mobile, f'کد تأیید شما: {code}')
+    return code
+
+
+def verify(mobile, code, ip=None):
+    """
+    بررسی code برای mobile؛ در صورت خطا یکی از زیرکلاس‌های OtpError.
+
+    بعد از MAX_VERIFY_ATTEMPTS تلاش اشتباه کد باطل می‌شود. کد موفق با
+    delete مصرف می‌شود تا دو درخواست همزمان با یک کد هر دو موفق نشوند.
+    """
+    _throttle('verify-ip', ip, VERIFY_LIMIT_PER_IP)
+    cache = _cache()
+    code_key, attempts_key = _code_key(mobile), _attempts_key(mobile)
+    expected = cache.get(code_key)
+    if expected is None:
+        raise ExpiredCodeError()
+    try:
+        attempts = cache.incr(attempts_key)
+    except ValueError:
+        raise ExpiredCodeError()
+    if attempts > MAX_VERIFY_ATTEMPTS:
+        cache.delete_many([code_key, attempts_key])
+        raise ThrottledError('تعداد تلاش‌های اشتباه بیش از حد مجاز است، کد جدید دریافت کنید.')
+    if not hmac.compare_digest(expected, _hash(mobile, str(code))):
+        raise InvalidCodeError()
+    if not cache.delete(code_key):
+        raise ExpiredCodeError()
+    cache.delete(attempts_key)
@@ -0,0 +1,189 @@
+# rate_limit.py
+import atexit
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.utils import timezone
+
+from .models import BlockedIP, RequestLog
+
+logger = logging.getLogger(__name__)
+
+# کش جداگانه تا پاک شدن کلیدهای کش صفحه‌ها شمارنده‌ها را از بین نبرد
+CACHE_ALIAS = getattr(settings, 'RATE_LIMIT_CACHE', 'default')
+# ثبت همه درخواست‌های محدودشده در RequestLog (بلاک‌ها همیشه در BlockedIP ثبت می‌شوند)
+AUDIT_REQUESTS = getattr(settings, 'RATE_LIMIT_AUDIT_REQUESTS', False)
+AUDIT_FLUSH_SIZE = getattr(settings, 'RATE_LIMIT_AUDIT_FLUSH_SIZE', 500)
+AUDIT_FLUSH_INTERVAL = getattr(settings, 'RATE_LIMIT_AUDIT_FLUSH_INTERVAL', 10)
+SCOPE_MAX_LENGTH = RequestLog._meta.get_field('scope').max_length
+
+
+def _block_key(ip):
+    return f'ratelimit:block:{ip}'
+
+
+def _window_key(scope, ip, window):
+    return f'ratelimit:{scope}:{ip}:{window}'
+
+
+class AuditBuffer:
+    """
+    نوشتن دسته‌ای رکوردهای BlockedIP و RequestLog خارج از مسیر درخواست.
+
+    مثل بافر آمار جستجو: تخلیه با رسیدن به flush_size رکورد، هر
+    flush_interval ثانیه در یک thread جدا و هنگام خروج پروسه.
+    """
+
+    def __init__(self, flush_size=AUDIT_FLUSH_SIZE, flush_interval=AUDIT_FLUSH_INTERVAL):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.records = []
+        self.timer = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def add(self, record):
+        with self.lock:
+            self.records.append(record)
+            should_flush = len(self.records) >= self.flush_size
+            if not should_flush:
+                self._start_timer()
+        if should_flush:
+            self.flush()
+
+    def _start_timer(self):
+        if self.timer is None and self.flush_interval:
+            self.timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            # اتصال دیتابیس مختص این thread است
+            connection.close()
+
+    def flush(self):
+        """نوشتن رکوردهای بافر؛ تعداد رکوردهای نوشته‌شده را برمی‌گرداند"""
+        with self.flush_lock:
+            with self.lock:
+                records, self.records = self.records, []
+                if self.timer is not None:
+                    self.timer.cancel()
+                    self.timer = None
+            if not records:
+                return 0
+            by_model = {}
+            for record in records:
+                by_model.setdefault(type(record), []).append(record)
+            try:
+                for model, objects in by_model.items():
+                    model.objects.bulk_create(objects, batch_size=500)
+            except Exception:
+                logger.exception('rate limit audit flush failed (%s records dropped)', len(records))
+                return 0
+            return len(records)
+
+
+audit_buffer = AuditBuffer()
+atexit.register(audit_buffer.flush)
+
+
+class RateLimiter:
+    """
+    محدودیت تعداد درخواست هر IP با پنجره لغزان تقریبی در کش.
+
+    شمارش پنجره جاری با cache.incr اتمیک است و سهم پنجره قبلی به نسبت
+    زمان باقی‌مانده از آن حساب می‌شود. هر درخواست یک get_many (بلاک و
+    پنجره قبلی) و یک incr است و به دیتابیس نمی‌رود؛ بلاک با TTL برابر
+    block_seconds در کش می‌ماند و رکورد آن برای گزارش با AuditBuffer نوشته
+    می‌شود.
+    """
+
+    def __init__(self, max_requests, window_seconds, scope='', block_seconds=None, cache_alias=CACHE_ALIAS):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.scope = scope[:SCOPE_MAX_LENGTH]
+        self.block_seconds = block_seconds or window_seconds
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def _increment(self, key):
+        cache = self.cache
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # دو پنجره نگه داشته می‌شود: جاری و قبلی
+            cache.add(key, 0, self.window_seconds * 2)
+            try:
+                return cache.incr(key)
+            except ValueError:
+                return 1
+
+    def hit(self, ip, now=None):
+        """
+        ثبت یک درخواست؛ خروجی دلیل بلاک یا None اگر درخواست مجاز است.
+
+        درخواست‌های IP بلاک‌شده شمرده نمی‌شوند تا بلاک بعد از TTL تمدید نشود.
+        """
+        now = time.time() if now is None else now
+        window, offset = divmod(now, self.window_seconds)
+        window = int(window)
+        block_key = _block_key(ip)
+        previous_key = _window_key(self.scope, ip, window - 1)
+
+        stored = self.cache.get_many([block_key, previous_key])
+        reason = stored.get(block_key)
+        if reason is not None:
+            return reason
+
+        current = self._increment(_window_key(self.scope, ip, window))
+        previous = stored.get(previous_key, 0)
+        estimated = previous * (1 - offset / self.window_seconds) + current
+        if AUDIT_REQUESTS:
+            audit_buffer.add(RequestLog(ip_address=ip, scope=self.scope))
+        if estimated <= self.max_requests:
+            return None
+
+        reason = f'تعداد درخواست‌ها بیش از حد مجاز ({self.max_requests} درخواست در {self.window_seconds} ثانیه)'
+        self.cache.set(block_key, reason, self.block_seconds)
+        blocked_at = timezone.now()
+        audit_buffer.add(BlockedIP(
+            ip_address=ip,
+            reason=reason,
+            scope=self.scope,
+            max_requests=self.max_requests,
+            time_frame_seconds=self.window_seconds,
+            requests_count=int(estimated),
+            blocked_at=blocked_at,
+            expires_at=blocked_at + timedelta(seconds=self.block_seconds),
+        ))
+        return reason
+
+
+def unblock(ip, scope=None, window_seconds=None, cache_alias=CACHE_ALIAS):
+    """
+    رفع بلاک یک IP در کش و غیرفعال کردن رکوردهای فعال آن.
+
+    با scope و window_seconds شمارنده‌های پنجره جاری و قبلی آن بخش هم پاک
+    می‌شوند تا درخواست بعدی دوباره بلاک نشود.
+    """
+    cache = caches[cache_alias]
+    keys = [_block_key(ip)]
+    if scope is not None and window_seconds:
+        window = int(time.time() // window_seconds)
+        keys += [_window_key(scope, ip, window), _window_key(scope, ip, window - 1)]
+    cache.delete_many(keys)
+    return BlockedIP.objects.filter(ip_address=ip, is_active=True).update(is_active=False)
@@ -0,0 +1,30 @@
+# sms.py
+import sys
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class ConsoleBackend:
+    """چاپ پیامک در خروجی؛ برای محیط توسعه"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, mobile, message):
+        self.stream.write(f'SMS {mobile}: {message}\n')
+        self.stream.flush()
+
+
+class LocMemBackend:
+    """نگهداری پیامک‌ها در LocMemBackend.outbox؛ برای تست‌ها"""
+
+    outbox = []
+
+    def send(self, mobile, message):
+        self.outbox.append((mobile, message))
+
+
+def get_backend():
+    """backend تنظیم‌شده در SMS_BACKEND؛ مسیر کلاسی با متد send(mobile, message)"""
+    return import_string(getattr(settings, 'SMS_BACKEND', 'apps.user.sms.ConsoleBackend'))()
@@ -0,0 +1,10 @@
+# tasks.py
+from apps.tasks.queue import task
+
+from .sms import get_backend
+
+
+@task(max_attempts=3, backoff=5)
+def send_sms(mobile, message):
+    """ارسال پیامک با SMS_BACKEND؛ خطای سرویس پیامک با backoff دوباره تلاش می‌شود"""
+    get_backend().send(mobile, message)
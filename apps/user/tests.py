@@ -1,3 +1,99 @@
-from django.test import TestCase
+import re
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import otp
+from .models import CustomUser, UserSecurity
+from .sms import LocMemBackend
+
+TEST_CACHES = {
+    alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'user-tests-{alias}'}
+    for alias in ('default', 'tokens', 'ratelimit')
+}
+MOBILE = '09120000022'
+
+
+@override_settings(TASKS_EAGER=True, SMS_BACKEND='apps.user.sms.LocMemBackend', CACHES=TEST_CACHES)
+class OtpViewTests(TestCase):
+    def setUp(self):
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+        del LocMemBackend.outbox[:]
+
+    def send(self, mobile=MOBILE, ip='10.0.0.1'):
+        return self.client.post(reverse('account:send_mobile'), {'mobileNumber': mobile}, REMOTE_ADDR=ip)
+
+    def verify(self, code):
+        data = {f'code{position}': digit for position, digit in enumerate(code, 1)}
+        return self.client.post(reverse('account:verify_code'), data, REMOTE_ADDR='10.0.0.1')
+
+    def sent_code(self):
+        mobile, message = LocMemBackend.outbox[-1]
+        self.assertEqual(mobile, MOBILE)
+        return re.search(r'\d{5}', message).group()
+
+    @staticmethod
+    def wrong(code):
+        return str((int(code[0]) + 1) % 10) + code[1:]
+
+    @staticmethod
+    def messages(response):
+        return [str(message) for message in get_messages(response.wsgi_request)]
+
+    def test_send_mobile_creates_no_user(self):
+        response = self.send()
+        self.assertRedirects(response, reverse('account:verify_code'), fetch_redirect_response=False)
+        self.assertEqual(len(LocMemBackend.outbox), 1)
+        self.assertFalse(CustomUser.objects.filter(mobileNumber=MOBILE).exists())
+
+    def test_correct_code_creates_and_logs_in_user(self):
+        self.send()
+        response = self.verify(self.sent_code())
+        self.assertRedirects(response, reverse('main:index'), fetch_redirect_response=False)
+        user = CustomUser.objects.get(mobileNumber=MOBILE)
+        self.assertTrue(user.is_active)
+        self.assertTrue(UserSecurity.objects.filter(user=user).exists())
+        self.assertEqual(self.client.session['_auth_user_id'], str(user.pk))
+
+    def test_wrong_code_is_rejected(self):
+        self.send()
+        response = self.verify(self.wrong(self.sent_code()))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(otp.InvalidCodeError.message, self.messages(response))
+        self.assertNotIn('_auth_user_id', self.client.session)
+        self.assertFalse(CustomUser.objects.filter(mobileNumber=MOBILE).exists())
+
+    def test_code_is_dead_after_max_attempts(self):
+        self.send()
+        code = self.sent_code()
+        for _ in range(otp.MAX_VERIFY_ATTEMPTS):
+            self.verify(self.wrong(code))
+        # کد درست هم بعد از سقف تلاش‌ها پذیرفته نمی‌شود
+        response = self.verify(code)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('_auth_user_id', self.client.session)
+        response = self.verify(code)
+        self.assertRedirects(response, reverse('account:send_mobile'), fetch_redirect_response=False)
+        self.assertFalse(CustomUser.objects.filter(mobileNumber=MOBILE).exists())
+
+    def test_per_mobile_throttle_returns_form_error(self):
+        with mock.patch.object(otp, 'SEND_LIMIT_PER_MOBILE', (2, 900)):
+            for ip in ('10.0.0.1', '10.0.0.2'):
+                self.assertEqual(self.send(ip=ip).status_code, 302)
+            response = self.send(ip='10.0.0.3')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(otp.ThrottledError.message, response.context['form'].errors['mobileNumber'])
+        self.assertEqual(len(LocMemBackend.outbox), 2)
+
+    def test_per_ip_throttle_returns_form_error(self):
+        with mock.patch.object(otp, 'SEND_LIMIT_PER_IP', (2, 3600)):
+            for mobile in ('09120000001', '09120000002'):
+                self.assertEqual(self.send(mobile=mobile).status_code, 302)
+            response = self.send(mobile='09120000003')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(otp.ThrottledError.message, response.context['form'].errors['mobileNumber'])
+        self.assertEqual([mobile for mobile, _ in LocMemBackend.outbox], ['09120000001', '09120000002'])
@@ -1,13 +1,12 @@
 from django.shortcuts import render, redirect
-from django.utils import timezone
 from django.contrib import messages
 from django.contrib.auth import login, logout
 from django.views.decorators.csrf import csrf_exempt
 import random
-from datetime import timedelta
 
 from .forms import MobileForm, VerificationCodeForm
 from .models import CustomUser, UserSecurity
+from . import otp
 import utils
 
 import json
@@ -24,33 +23,18 @@ def send_mobile(request):
         if form.is_valid():
             mobile = form.cleaned_data['mobileNumber']
 
-            # بررسی وجود کاربر
-            user, created = CustomUser.objects.get_or_create(mobileNumber=mobile)
-
-            if created:
-                user.isActive = False
-                user.save()
-                UserSecurity.objects.create(user=user)
-
-            # تولید کد تأیید
-            code = utils.create_random_code(5)
-            expire_time = timezone.now() + timedelta(minutes=2)
-
-            security = user.security
-            security.activeCode = code
-            security.expireCode = expire_time
-            security.isBan = False
-            security.save()
-
-            # TODO: ارسال SMS
-            print(f"کد تأیید برای {mobile}: {code}")
-
-            # ذخیره شماره موبایل و next در سشن
-            request.session["mobileNumber"] = mobile
-            if next_url:
-                request.session["next_url"] = next_url
+            # کد تأیید فقط در کش ذخیره می‌شود؛ کاربر بعد از تأیید ساخته می‌شود
+            try:
+                otp.issue(mobile, utils.get_client_ip(request))
+            except otp.OtpError as error:
+                form.add_error("mobileNumber", error.message)
+            else:
+                # ذخیره شماره موبایل و next در سشن
+                request.session["mobileNumber"] = mobile
+                if next_url:
+                    request.session["next_url"] = next_url
 
-            return redirect("account:verify_code")
+                return redirect("account:verify_code")
 
     else:
         form = MobileForm()
@@ -58,41 +42,44 @@ def send_mobile(request):
     return render(request, "user_app/register.html", {"form": form, "next": next_url})
 
 
+def _login_mobile(request, mobile):
+    """ساخت یا فعال‌سازی کاربر بعد از تأیید موفق کد و ورود"""
+    user, created = CustomUser.objects.get_or_create(mobileNumber=mobile, defaults={"is_active": True})
+    if created:
+        UserSecurity.objects.create(user=user)
+    elif not user.is_active:
+        user.is_active = True
+        user.save(update_fields=["is_active"])
+    login(request, user)
+
+
 # ======================
 # مرحله 2: تأیید کد
 # ======================
 def verify_code(request):
     mobile = request.session.get("mobileNumber")
     next_url = request.session.get("next_url")  # گرفتن next از سشن
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
 
     if not mobile:
-        if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        if is_ajax:
             return JsonResponse({'success': False, 'message': 'شماره موبایل یافت نشد'})
         return redirect("account:send_mobile")
 
-    try:
-        user = CustomUser.objects.get(mobileNumber=mobile)
-        security = user.security
-    except CustomUser.DoesNotExist:
-        if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-            return JsonResponse({'success': False, 'message': 'کاربری با این شماره موبایل یافت نشد'})
-        messages.error(request, "کاربری با این شماره موبایل یافت نشد.")
-        return redirect("account:send_mobile")
-
     if request.method == "POST":
+        ip = utils.get_client_ip(request)
+
         # بررسی ارسال مجدد
         if "resend" in request.POST and request.POST["resend"] == "true":
-            code = utils.create_random_code(5)
-            expire_time = timezone.now() + timedelta(minutes=2)
-
-            security.activeCode = code
-            security.expireCode = expire_time
-            security.isBan = False
-            security.save()
-
-            print(f"🔄 کد جدید برای {mobile}: {code}")
-
-            if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            try:
+                otp.issue(mobile, ip)
+            except otp.OtpError as error:
+                if is_ajax:
+                    return JsonResponse({'success': False, 'message': error.message})
+                messages.error(request, error.message)
+                return redirect("account:verify_code")
+
+            if is_ajax:
                 return JsonResponse({'success': True, 'message': 'کد جدید ارسال شد'})
 
             messages.success(request, "کد جدید ارسال شد ✅")
@@ -101,26 +88,15 @@ def verify_code(request):
         # بررسی کد
         form = VerificationCodeForm(request.POST)
         if form.is_valid():
-            code = form.cleaned_data['activeCode']
-
-            # بررسی تاریخ انقضا
-            if security.expireCode and security.expireCode < timezone.now():
-                messages.error(request, "⏳ کد منقضی شده است، دوباره تلاش کنید.")
+            try:
+                otp.verify(mobile, form.cleaned_data['activeCode'], ip)
+            except otp.ExpiredCodeError as error:
+                messages.error(request, error.message)
                 return redirect("account:send_mobile")
-
-            # بررسی صحت کد
-            if security.activeCode != code:
-                messages.error(request, "❌ کد تأیید اشتباه است.")
+            except otp.OtpError as error:
+                messages.error(request, error.message)
             else:
-                # فعال‌سازی و ورود
-                user.is_active = True
-                user.save()
-
-                security.activeCode = None
-                security.expireCode = None
-                security.save()
-
-                login(request, user)
+                _login_mobile(request, mobile)
                 messages.success(request, "✅ ورود موفقیت‌آمیز بود.")
 
                 # اگر next_url موجود بود برو همونجا
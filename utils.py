@@ -10,31 +10,6 @@ from uuid import uuid4
 from functools import wraps
 
 
-import socket
-
-def has_internet_connection():
-    """
-    Check if the device has an active internet connection.
-
-    Returns:
-        bool: True if the device has an active internet connection, False otherwise.
-    """
-    try:
-        # Try to connect to a well-known website
-        socket.create_connection(("www.google.com", 80))
-        return True
-    except OSError:
-        pass
-
-    try:
-        # Try to connect to a different well-known website
-        socket.create_connection(("www.example.com", 80))
-        return True
-    except OSError:
-        pass
-
-    return False
-
 def create_random_code(num):
     import random
     num-=1
@@ -60,70 +35,42 @@ class FileUpload:
 
 
 def rate_limit_ip(max_requests, time_frame_seconds=None, time_frame_minutes=None, time_frame_hours=None):
+    """
+    محدود کردن تعداد درخواست‌های هر IP به view
 
+    شمارش و بلاک در کش انجام می‌شود (apps.user.rate_limit.RateLimiter) و
+    مسیر درخواست به دیتابیس نمی‌رود.
+    """
+    # محاسبه کل زمان بر حسب ثانیه
+    total_seconds = 0
+    if time_frame_seconds:
+        total_seconds += time_frame_seconds
+    if time_frame_minutes:
+        total_seconds += time_frame_minutes * 60
+    if time_frame_hours:
+        total_seconds += time_frame_hours * 3600
+
+    if not total_seconds:
+        total_seconds = 3600  # مقدار پیش‌فرض: 1 ساعت
 
     def decorator(view_func):
 
-        from apps.user.models.loguser_model import BlockedIP,RequestLog
+        from apps.user.rate_limit import RateLimiter
+
+        limiter = RateLimiter(
+            max_requests,
+            total_seconds,
+            scope=f'{view_func.__module__}.{view_func.__name__}',
+        )
 
         @wraps(view_func)
         def _wrapped_view(request, *args, **kwargs):
-            # محاسبه کل زمان بر حسب ثانیه
-            total_seconds = 0
-            if time_frame_seconds:
-                total_seconds += time_frame_seconds
-            if time_frame_minutes:
-                total_seconds += time_frame_minutes * 60
-            if time_frame_hours:
-                total_seconds += time_frame_hours * 3600
-
-            if not total_seconds:
-                total_seconds = 3600  # مقدار پیش‌فرض: 1 ساعت
-
-            # دریافت IP کاربر
             ip = get_client_ip(request)
-
-            # بررسی وجود IP در لیست بلاک‌شده‌های فعال
-            blocked_ip = BlockedIP.objects.filter(
-                ip_address=ip,
-                is_active=True
-            ).first()
-
-            if blocked_ip:
-                # بررسی انقضای بلاک
-                if blocked_ip.is_block_expired():
-                    blocked_ip.is_active = False
-                    blocked_ip.save()
-                else:
-                    return HttpResponseForbidden(
-                        f'دسترسی شما به این سرویس موقتاً محدود شده است. دلیل: {blocked_ip.reason}'
-                    )
-
-            # ساخت کلید برای لاگ درخواست‌ها
-            request_log_key = f'request_log_{ip}'
-            request_log = RequestLog.objects.filter(ip_address=ip).order_by('-timestamp')
-
-            # محاسبه درخواست‌های اخیر
-            time_threshold = timezone.now() - timedelta(seconds=total_seconds)
-            recent_requests = request_log.filter(timestamp__gte=time_threshold).count()
-
-            # ذخیره لاگ درخواست فعلی
-            RequestLog.objects.create(ip_address=ip)
-
-            # بررسی تعداد درخواست‌ها
-            if recent_requests >= max_requests:
-                # بلاک کردن IP
-                BlockedIP.objects.create(
-                    ip_address=ip,
-                    max_requests=max_requests,
-                    time_frame_seconds=total_seconds,
-                    requests_count=recent_requests,
-                    reason=f'تعداد درخواست‌ها بیش از حد مجاز ({max_requests} درخواست در {total_seconds} ثانیه)'
-                )
+            reason = limiter.hit(ip)
+            if reason is not None:
                 return HttpResponseForbidden(
-                    f'تعداد درخواست‌های شما بیش از حد مجاز است. IP شما برای {total_seconds} ثانیه بلاک شد.'
+                    f'دسترسی شما به این سرویس موقتاً محدود شده است. دلیل: {reason}'
                 )
-
             return view_func(request, *args, **kwargs)
         return _wrapped_view
     return decorator
@@ -135,7 +82,7 @@ def get_client_ip(request):
     """
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
     if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
+        ip = x_forwarded_for.split(',')[0].strip()
     else:
         ip = request.META.get('REMOTE_ADDR')
     return ip
@@ -152,4 +99,101 @@ def price_by_delivery_tax(price, discount=0):
     total_sum = price_decimal + tax
     total_sum = total_sum - (total_sum * Decimal(str(discount)) / Decimal('100'))
 
-    return int(total_sum), int(tax)
\ No newline at end of file
+    return int(total_sum), int(tax)
+
+
+from datetime import datetime, timezone as dt_timezone
+
+def encode_keyset_cursor(moment, pk):
+    """
+    ساخت cursor صفحه‌بندی keyset از (تاریخ، شناسه) آخرین ردیف صفحه.
+
+    تاریخ به میکروثانیه UTC تبدیل می‌شود تا cursor کوتاه و قابل استفاده در URL باشد.
+    """
+    delta = moment - datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+    micros = (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    return f"{micros}_{pk}"
+
+
+def decode_keyset_cursor(value):
+    """خواندن cursor؛ برای مقدار نامعتبر None برمی‌گرداند"""
+    try:
+        micros, pk = (int(part) for part in value.split('_', 1))
+    except (AttributeError, ValueError):
+        return None
+    moment = datetime(1970, 1, 1, tzinfo=dt_timezone.utc) + timedelta(microseconds=micros)
+    return moment, pk
+
+
+
+import re
+from functools import lru_cache
+import jdatetime
+
+JALALI_DATE_FORMAT = '%Y/%m/%d'
+
+# دستورهای قالب تاریخ که بدون ساخت شیء jdatetime قابل تولید هستند
+_JALALI_DIRECTIVES = {'Y': '{0:04d}', 'm': '{1:02d}', 'd': '{2:02d}', 'H': '{3:02d}', 'M': '{4:02d}', 'S': '{5:02d}'}
+_JALALI_DIRECTIVE_RE = re.compile(r'%(.)')
+
+
+@lru_cache(maxsize=4096)
+def _jalali_date(gregorian_date):
+    """تبدیل یک روز میلادی به (سال، ماه، روز) شمسی؛ برای هر روز فقط یک بار محاسبه می‌شود"""
+    jalali = jdatetime.date.fromgregorian(date=gregorian_date)
+    return jalali.year, jalali.month, jalali.day
+
+
+@lru_cache(maxsize=64)
+def _jalali_template(fmt):
+    """تبدیل قالب strftime به قالب str.format؛ برای دستورهای پشتیبانی‌نشده None"""
+    parts = []
+    position = 0
+    for match in _JALALI_DIRECTIVE_RE.finditer(fmt):
+        directive = match.group(1)
+        if directive == '%':
+            replacement = '%'
+        elif directive in _JALALI_DIRECTIVES:
+            replacement = _JALALI_DIRECTIVES[directive]
+        else:
+            return None
+        parts.append(fmt[position:match.start()].replace('{', '{{').replace('}', '}}'))
+        parts.append(replacement)
+        position = match.end()
+    parts.append(fmt[position:].replace('{', '{{').replace('}', '}}'))
+    return ''.join(parts)
+
+
+def _format_jalali(value, fmt, template, tz):
+    if value is None:
+        return ''
+    is_datetime = isinstance(value, datetime)
+    if is_datetime and value.utcoffset() is not None:
+        value = value.astimezone(tz)
+
+    if template is None:
+        if is_datetime:
+            return jdatetime.datetime.fromgregorian(datetime=value).strftime(fmt)
+        return jdatetime.date.fromgregorian(date=value).strftime(fmt)
+
+    if is_datetime:
+        return template.format(*_jalali_date(value.date()), value.hour, value.minute, value.second)
+    return template.format(*_jalali_date(value), 0, 0, 0)
+
+
+def to_jalali(value, fmt=JALALI_DATE_FORMAT):
+    """
+    نمایش شمسی یک datetime یا date با قالب strftime.
+
+    تاریخ‌های aware ابتدا به منطقه زمانی پروژه برده می‌شوند. تبدیل روز با
+    lru_cache انجام می‌شود و قالب‌های عددی (%Y %m %d %H %M %S) بدون jdatetime
+    ساخته می‌شوند؛ بقیه قالب‌ها به jdatetime.strftime سپرده می‌شوند.
+    """
+    return _format_jalali(value, fmt, _jalali_template(fmt), timezone.get_current_timezone())
+
+
+def to_jalali_many(values, fmt=JALALI_DATE_FORMAT):
+    """نسخه دسته‌ای to_jalali برای لیست تاریخ‌ها (قالب و منطقه زمانی یک بار خوانده می‌شوند)"""
+    template = _jalali_template(fmt)
+    tz = timezone.get_current_timezone()
+    return [_format_jalali(value, fmt, template, tz) for value in values]
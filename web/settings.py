@@ -49,9 +49,11 @@ INSTALLED_APPS = [
     'apps.peyment.apps.PeymentConfig',
     'apps.search.apps.SearchConfig',
     'apps.blog.apps.BlogConfig',
+    'apps.tasks.apps.TasksConfig',
 ]
 
 MIDDLEWARE = [
+    'apps.main.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -140,6 +142,41 @@ STATICFILES_DIRS = (os.path.join(BASE_DIR,'static/'),)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR,'media/')
 
+# شاخص جستجوی محصولات (apps.search.search_index)
+SEARCH_INDEX_PATH = os.path.join(BASE_DIR,'var/search_index.pickle')
+# تعداد جستجوهای پرتکراری که پیشنهادهای هدر در حافظه هر پروسه نگه می‌دارد
+AUTOCOMPLETE_POPULAR_LIMIT = 5000
+
+# اندازه‌گیری کوئری‌های هر درخواست (apps.main.middleware)؛ در production فقط نمونه‌ای از درخواست‌ها
+SQL_INSTRUMENTATION_SAMPLE_RATE = 1.0 if DEBUG else 0.05
+SQL_N_PLUS_ONE_THRESHOLD = 5
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'apps.main.sql': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+# کش بخش‌های render_partial صفحه اصلی (apps.main.fragment_cache)
+# timeout به ثانیه؛ ذخیره/حذف هر یک از models بخش را باطل می‌کند
+_PRODUCT_CARD_MODELS = ['product.Product', 'product.Brand', 'product.ProductFeature', 'product.Comment', 'product.LikeOrUnlike']
+FRAGMENT_CACHE = {
+    'main:slider_list_view': {'timeout': 600, 'models': ['main.SliderSite']},
+    'main:slider_main_view': {'timeout': 600, 'models': ['main.SliderMain']},
+    'product:category_group': {'timeout': 1800, 'models': ['product.Category', 'product.Product']},
+    # فروش‌ها با هر سفارش تغییر می‌کنند؛ رتبه پرفروش‌ها فقط با timeout تازه می‌شود
+    'product:best_selling_products_view': {'timeout': 900, 'models': _PRODUCT_CARD_MODELS},
+    'product:recently': {'timeout': 1800, 'models': _PRODUCT_CARD_MODELS},
+    'product:brands': {'timeout': 1800, 'models': ['product.Brand', 'product.Product']},
+    # شمارش بازدید با update() ثبت می‌شود و بخش را باطل نمی‌کند
+    'blog:blogmain': {'timeout': 600, 'models': ['blog.BlogPost']},
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 
@@ -195,13 +232,79 @@ CKEDITOR_CONFIGS = {
 }
 
 # settings.py
+# کش: با REDIS_URL از Redis، با CACHE_DIR از فایل و در غیر این صورت حافظه همان پروسه.
+# قفل ساخت کش (cache.add)، شمارنده‌های rate limit و کد تأیید (cache.incr) و
+# شماره تغییرات شاخص پیشنهاد جستجو به add و incr اتمیک تکیه دارند. فقط Redis
+# این را بین پروسه‌ها تضمین می‌کند؛ FileBasedCache برای add و incr فایل را
+# می‌خواند و بعد می‌نویسد و بین دو پروسه شمارش‌ها گم می‌شوند. پس برای بیش از
+# یک worker (gunicorn با چند پروسه یا چند سرور) REDIS_URL لازم است و CACHE_DIR
+# فقط برای اجرای تک‌پروسه‌ای (مثلاً runserver کنار دستورات مدیریتی) است.
+# افزایش CACHE_VERSION همه کلیدهای قبلی را یکجا بی‌اعتبار می‌کند.
+REDIS_URL = os.environ.get('REDIS_URL')
+CACHE_DIR = os.environ.get('CACHE_DIR')
+CACHE_VERSION = int(os.environ.get('CACHE_VERSION', 1))
+
+
+def _cache_config(alias, local_location):
+    if REDIS_URL:
+        config = {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': alias,
+        }
+    elif CACHE_DIR:
+        config = {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(CACHE_DIR, alias),
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    else:
+        config = {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': local_location,
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    config['VERSION'] = CACHE_VERSION
+    return config
+
+
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
-    },
-    'tokens': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'token-cache',
-    }
+    'default': _cache_config('default', 'unique-snowflake'),
+    'tokens': _cache_config('tokens', 'token-cache'),
+    'ratelimit': _cache_config('ratelimit', 'ratelimit-cache'),
 }
+
+# محدودیت درخواست utils.rate_limit_ip (apps.user.rate_limit): شمارنده‌ها و
+# بلاک‌ها در کش؛ بلاک‌ها همیشه و هر درخواست فقط با RATE_LIMIT_AUDIT_REQUESTS
+# به‌صورت دسته‌ای در دیتابیس ثبت می‌شوند.
+RATE_LIMIT_CACHE = 'ratelimit'
+RATE_LIMIT_AUDIT_REQUESTS = False
+
+# کد تأیید ورود (apps.user.otp): کدها و شمارنده‌ها در کش tokens، پیامک با task
+# apps.user.tasks.send_sms؛ برای سرویس پیامک واقعی SMS_BACKEND را عوض کنید.
+SMS_BACKEND = 'apps.user.sms.ConsoleBackend'
+OTP_CODE_TTL = 120
+OTP_MAX_VERIFY_ATTEMPTS = 5
+
+# کارهای پس‌زمینه (apps.tasks): memory در thread های همان پروسه اجرا می‌کند،
+# database در جدول Task صف می‌کند و دستور run_tasks آن‌ها را اجرا می‌کند.
+# task های دوره‌ای (مثل apps.main.tasks.expire_slides): با memory هر پروسه وب
+# از اولین درخواست هر TASKS_PERIODIC_INTERVAL ثانیه آن‌ها را بررسی می‌کند؛ با
+# database فقط run_tasks آن‌ها را زمان‌بندی می‌کند و باید کنار وب اجرا شود.
+# TASKS_EAGER همه task ها را همان لحظه اجرا می‌کند (برای تست‌ها).
+TASKS_BROKER = os.environ.get('TASKS_BROKER', 'memory')
+TASKS_EAGER = False
+TASKS_MAX_ATTEMPTS = 3
+TASKS_RETRY_BACKOFF = 10
+TASKS_PERIODIC_INTERVAL = 60
+
+# درگاه زرین‌پال (apps.peyment.zarinpal)؛ برای تست بار بدون اینترنت
+# ZARINPAL_API_URL و ZARINPAL_STARTPAY_URL را به دستور zarinpal_stub بدهید.
+ZARINPAL_MERCHANT_ID = os.environ.get('ZARINPAL_MERCHANT_ID', '41cb2cdd-3a44-4fb4-a0b3-db471b673078')
+ZARINPAL_CALLBACK_URL = os.environ.get('ZARINPAL_CALLBACK_URL', 'https://rank0.ir/peyment/verify/')
+ZARINPAL_API_URL = os.environ.get('ZARINPAL_API_URL', 'https://api.zarinpal.com')
+ZARINPAL_STARTPAY_URL = os.environ.get('ZARINPAL_STARTPAY_URL', 'https://www.zarinpal.com/pg/StartPay/{authority}')
+# (ثانیه اتصال، ثانیه خواندن)
+ZARINPAL_TIMEOUT = (3.05, 10)
+ZARINPAL_POOL_SIZE = 10
+ZARINPAL_VERIFY_RETRIES = 2